@@ -3,26 +3,11 @@ import logging
 import sys
 from enum import Enum
 
+import numpy as np
 import pandas as pd
 
 from analysis.src.python.data_analysis.model.column_name import SubmissionColumns
-from analysis.src.python.data_analysis.utils.df_utils import append_df, write_df
-from analysis.src.python.data_analysis.utils.parsing_utils import str_to_datetime
-
-
-def check_same_code(submission_0: pd.Series, submission_1: pd.Series) -> bool:
-    """ Check if submission not the same as previous. """
-
-    return submission_0[SubmissionColumns.CODE].strip() == submission_1[SubmissionColumns.CODE].strip()
-
-
-def check_different_code(submission_0: pd.Series, submission_1: pd.Series, diff_ratio: float) -> bool:
-    """ Check if submission not so different with previous (lines number does not changed in `diff_ratio` times). """
-
-    code_0 = submission_0[SubmissionColumns.CODE]
-    code_1 = submission_1[SubmissionColumns.CODE]
-    code_lines_diff = len(code_0) / len(code_1)
-    return not (1 / diff_ratio <= code_lines_diff <= diff_ratio)
+from analysis.src.python.data_analysis.utils.df_utils import write_df
 
 
 class SubmissionsCheckStatus(Enum):
@@ -31,50 +16,53 @@ class SubmissionsCheckStatus(Enum):
     DIFFERENT = 'different'
 
 
-def filter_submissions_series(submissions_series: pd.DataFrame, diff_ratio: float) -> pd.DataFrame:
-    """ Filter submissions in submission series (group of submissions by one user on one step). """
+def get_submissions_statuses(df_submissions: pd.DataFrame, diff_ratio: float) -> pd.Series:
+    """ Check each submission against the previous submission in its series. Submissions must be sorted by series
+    and time. Submission is the same if its stripped code equals to the previous one and it is different if
+    length of code changed more than in `diff_ratio` times. Codes are compared by hashes of stripped code. """
+
+    code = df_submissions[SubmissionColumns.CODE]
+    code_hash = pd.util.hash_pandas_object(code.str.strip(), index=False)
+    code_length = code.str.len()
 
-    logging.info(f'Processing submission series group {submissions_series.iloc[0][SubmissionColumns.GROUP]}')
-    logging.info(f'Initial group shape {submissions_series.shape}')
+    has_previous = df_submissions[SubmissionColumns.GROUP].eq(df_submissions[SubmissionColumns.GROUP].shift())
+    is_same = has_previous & code_hash.eq(code_hash.shift())
+    length_ratio = code_length.shift() / code_length
+    is_different = has_previous & ~is_same & ~length_ratio.between(1 / diff_ratio, diff_ratio)
 
-    submissions_series = submissions_series.copy()
-    submissions_series[SubmissionColumns.STATUS] = [SubmissionsCheckStatus.OK.value] * submissions_series.shape[0]
-    submissions_series[SubmissionColumns.TIME] = submissions_series[SubmissionColumns.TIME].apply(str_to_datetime)
-    submissions_series.sort_values([SubmissionColumns.TIME], inplace=True)
+    statuses = np.select([is_same, is_different],
+                         [SubmissionsCheckStatus.SAME.value, SubmissionsCheckStatus.DIFFERENT.value],
+                         SubmissionsCheckStatus.OK.value)
+    return pd.Series(statuses, index=df_submissions.index)
 
-    prev_submission = None
-    for i, submission in submissions_series.iterrows():
-        if prev_submission is None:
-            prev_submission = submission
-            continue
 
-        if check_same_code(prev_submission, submission):
-            logging.info(f'Drop submission: '
-                         f'user={submission[SubmissionColumns.USER_ID]} '
-                         f'step={submission[SubmissionColumns.STEP_ID]} '
-                         f'attempt={i + 1}: '
-                         f'same submissions')
-            submission[SubmissionColumns.STATUS] = SubmissionsCheckStatus.SAME.value
-        elif check_different_code(submission, submission, diff_ratio):
-            logging.info(f'Drop submission: '
-                         f'user={submission[SubmissionColumns.USER_ID]} '
-                         f'step={submission[SubmissionColumns.STEP_ID]} '
-                         f'attempt={i + 1}: '
-                         f'different submissions')
-            submission[SubmissionColumns.STATUS] = SubmissionsCheckStatus.DIFFERENT.value
+def filter_submissions_series(df_submissions: pd.DataFrame, diff_ratio: float) -> pd.DataFrame:
+    """ Filter submissions in submission series (groups of submissions by one user on one step) in a few vectorized
+    passes over the whole dataframe. For each remaining submission add its attempt in series (in sorted by time order)
+    and total number of attempts in series. """
 
-    logging.info(f'Final group shape {submissions_series.shape}')
+    logging.info(f'Initial shape {df_submissions.shape}')
 
-    submissions_series = submissions_series[submissions_series[SubmissionColumns.STATUS] == SubmissionColumns.OK]
-    submissions_series = submissions_series.drop([SubmissionColumns.STATUS], axis=1)
-    group_size = submissions_series.shape[0]
-    submissions_series[SubmissionColumns.ATTEMPT.value] = list(range(1, group_size + 1))
-    submissions_series[SubmissionColumns.LAST_ATTEMPT.value] = [group_size] * group_size
+    df_submissions = df_submissions.copy()
+    df_submissions[SubmissionColumns.TIME] = pd.to_datetime(df_submissions[SubmissionColumns.TIME])
+    df_submissions.sort_values([SubmissionColumns.GROUP, SubmissionColumns.TIME], inplace=True, kind='mergesort')
 
-    return submissions_series
+    statuses = get_submissions_statuses(df_submissions, diff_ratio)
+    for status in [SubmissionsCheckStatus.SAME, SubmissionsCheckStatus.DIFFERENT]:
+        logging.info(f'Drop {(statuses == status.value).sum()} submissions: {status.value} submissions')
 
+    df_submissions = df_submissions[statuses == SubmissionsCheckStatus.OK.value]
+    logging.info(f'Final shape {df_submissions.shape}')
 
-def build_submission_series(submissions_path: str, output_path: str, diff_ration: float, chunk_size: int = 50000):
+    grouped_submissions = df_submissions.groupby(SubmissionColumns.GROUP.value, sort=False)
+    df_submissions[SubmissionColumns.ATTEMPT.value] = grouped_submissions.cumcount() + 1
+    df_submissions[SubmissionColumns.LAST_ATTEMPT.value] = \
+        grouped_submissions[SubmissionColumns.GROUP.value].transform('size')
+
+    return df_submissions.reset_index(drop=True)
+
+
+def build_submission_series(submissions_path: str, output_path: str, diff_ration: float):
     """ Group given submissions to series (by one user on one step) and filter same or noise submissions.
         For each submission add it's series number, attempt in group (in sorted by time order)
         and total number of attempts in group.
@@ -83,32 +71,15 @@ def build_submission_series(submissions_path: str, output_path: str, diff_ration
     df_submissions = pd.read_csv(submissions_path)
     df_submissions = df_submissions[df_submissions[SubmissionColumns.CODE].apply(lambda x: isinstance(x, str))]
 
-    df_submissions[SubmissionColumns.GROUP] = df_submissions \
+    df_submissions[SubmissionColumns.GROUP.value] = df_submissions \
         .groupby([SubmissionColumns.USER_ID, SubmissionColumns.STEP_ID]).ngroup()
+    logging.info(f'Groups count: {df_submissions[SubmissionColumns.GROUP].max() + 1}')
 
-    min_group, max_group = df_submissions[SubmissionColumns.GROUP].min(), df_submissions[SubmissionColumns.GROUP].max()
-    logging.info(f'Groups range: [{min_group}, {max_group}]')
-
-    for i in range(min_group, max_group + 1, chunk_size):
-        groups_range = [i, i + chunk_size - 1]
-        logging.info(f'Processing groups: [{groups_range[0]}, {groups_range[1]}]')
-
-        df_grouped_submission_series = df_submissions[df_submissions[SubmissionColumns.GROUP].isin(groups_range)] \
-            .groupby([SubmissionColumns.GROUP], as_index=False)
-        logging.info('Finish grouping')
-
-        df_filtered_submission_series = df_grouped_submission_series \
-            .apply(lambda g: filter_submissions_series(g, diff_ration))
-        logging.info('Finish filtering')
-
-        df_filtered_submission = df_filtered_submission_series.reset_index(drop=True)
-        logging.info('Finish aggregation')
+    df_filtered_submissions = filter_submissions_series(df_submissions, diff_ration)
+    logging.info('Finish filtering')
 
-        if i == 0:
-            write_df(df_filtered_submission, output_path)
-        else:
-            append_df(df_filtered_submission, output_path)
-        logging.info('Finish saving results')
+    write_df(df_filtered_submissions, output_path)
+    logging.info('Finish saving results')
 
 
 if __name__ == '__main__':
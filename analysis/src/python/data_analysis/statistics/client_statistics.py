@@ -6,7 +6,9 @@ import sys
 import pandas as pd
 
 from analysis.src.python.data_analysis.model.column_name import SubmissionColumns
-from analysis.src.python.data_analysis.utils.statistics_utils import get_statistics_by_group
+from analysis.src.python.data_analysis.utils.statistics_utils import (
+    get_statistics_by_group, get_statistics_by_group_from_csv,
+)
 
 
 def calculate_submissions_series_client_series(series: pd.DataFrame) -> pd.Series:
@@ -23,16 +25,19 @@ def calculate_submissions_series_client_series(series: pd.DataFrame) -> pd.Serie
 
 def get_submissions_client_series(submissions_path: str,
                                   client_series_statistics_path: str,
-                                  chunk_size: int):
-    """ For each submissions series build client series (the sequence of clients). """
+                                  chunk_size: int,
+                                  jobs: int = 1,
+                                  sorted_by_group: bool = False):
+    """ For each submissions series build client series (the sequence of clients). If submissions are sorted by group,
+    they are streamed from the file instead of loading all of them. """
 
-    df_submissions = pd.read_csv(submissions_path)
-
-    min_group, max_group = df_submissions[SubmissionColumns.GROUP].min(), df_submissions[SubmissionColumns.GROUP].max()
-    logging.info(f'Groups range: [{min_group}, {max_group}]')
-
-    get_statistics_by_group(df_submissions, client_series_statistics_path, chunk_size,
-                            calculate_submissions_series_client_series)
+    if sorted_by_group:
+        get_statistics_by_group_from_csv(submissions_path, client_series_statistics_path, chunk_size,
+                                         calculate_submissions_series_client_series, jobs)
+    else:
+        df_submissions = pd.read_csv(submissions_path)
+        get_statistics_by_group(df_submissions, client_series_statistics_path, chunk_size,
+                                calculate_submissions_series_client_series, jobs)
 
 
 if __name__ == '__main__':
@@ -47,6 +52,11 @@ if __name__ == '__main__':
                         help='Path to .csv file with submissions client series statistics')
     parser.add_argument('--chunk-size', '-c', default=5000, type=int,
                         help='Number of groups which will be processed simultaneously')
+    parser.add_argument('--jobs', '-j', default=1, type=int,
+                        help='Number of processes which process chunks of groups in parallel')
+    parser.add_argument('--sorted-by-group', action='store_true',
+                        help='Submissions are sorted by group, so they can be read by chunks without loading all')
 
     args = parser.parse_args(sys.argv[1:])
-    get_submissions_client_series(args.submissions_path, args.client_series_statistics_path, args.chunk_size)
+    get_submissions_client_series(args.submissions_path, args.client_series_statistics_path, args.chunk_size,
+                                  args.jobs, args.sorted_by_group)
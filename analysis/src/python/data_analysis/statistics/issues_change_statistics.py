@@ -1,6 +1,7 @@
 import argparse
 import logging
 import sys
+from functools import partial
 from typing import List
 
 import pandas as pd
@@ -40,7 +41,8 @@ def get_submissions_issues_change_statistics(submissions_path: str,
                                              issues_statistics_path: str,
                                              issues_change_statistics_path: str,
                                              issues_path: str,
-                                             chunk_size=20000):
+                                             chunk_size=20000,
+                                             jobs: int = 1):
     """ Calculate issues count diff between previous and current attempt in all submissions series. """
 
     df_submissions = pd.read_csv(submissions_path)
@@ -55,8 +57,7 @@ def get_submissions_issues_change_statistics(submissions_path: str,
     )
 
     get_statistics_by_group(df_submissions, issues_change_statistics_path, chunk_size,
-                            lambda submission_series: submission_series.apply(calculate_issues_change_statistics,
-                                                                              issues_classes=df_issues))
+                            partial(calculate_issues_change_statistics, issues_classes=df_issues), jobs)
 
 
 if __name__ == '__main__':
@@ -74,10 +75,13 @@ if __name__ == '__main__':
                         help='Path to .csv file with submissions issues statistics')
     parser.add_argument('--chunk-size', '-c', default=5000, type=int,
                         help='Number of groups which will be processed simultaneously')
+    parser.add_argument('--jobs', '-j', default=1, type=int,
+                        help='Number of processes which process chunks of groups in parallel')
 
     args = parser.parse_args(sys.argv[1:])
     get_submissions_issues_change_statistics(args.submissions_path,
                                              args.issues_statistics_path,
                                              args.issues_change_statistics_path,
                                              args.issues_path,
-                                             args.chunk_size)
+                                             args.chunk_size,
+                                             args.jobs)
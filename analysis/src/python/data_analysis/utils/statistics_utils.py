@@ -1,11 +1,20 @@
 import logging
-from typing import Callable
+import os
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional
 
+import numpy as np
 import pandas as pd
 
 from analysis.src.python.data_analysis.model.column_name import SubmissionColumns
 from analysis.src.python.data_analysis.utils.df_utils import append_df, write_df
 
+# Count of rows which are read from .csv file at once while streaming groups
+DEFAULT_ROWS_CHUNK_SIZE = 100000
+
 
 def save_chunk(df: pd.DataFrame, df_path: str, chunk_index: int):
     if chunk_index == 0:
@@ -14,24 +23,121 @@ def save_chunk(df: pd.DataFrame, df_path: str, chunk_index: int):
         append_df(df, df_path)
 
 
-def get_statistics_by_group(df: pd.DataFrame, df_statistics_path: str, chunk_size: int, func: Callable):
-    """ Process given dataframe dividing into chunks by group of range `chunk_size`. """
+def _get_group_starts(groups: np.ndarray) -> np.ndarray:
+    """ Get positions where groups start in sorted by group array. """
 
-    min_group, max_group = df[SubmissionColumns.GROUP.value].min(), df[SubmissionColumns.GROUP.value].max()
+    return np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
 
-    logging.info(f'Groups range: [{min_group}, {max_group}]')
 
-    for i in range(min_group, max_group + 1, chunk_size):
-        min_group_index, max_group_index = i, i + chunk_size - 1
-        logging.info(f'Processing {i}-th chunk with groups: [{min_group_index}, {max_group_index})')
+def _split_sorted_by_group(df: pd.DataFrame, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """ Split sorted by group dataframe into chunks with `chunk_size` groups. """
+
+    group_starts = _get_group_starts(df[SubmissionColumns.GROUP.value].to_numpy())
+    chunk_bounds = np.r_[group_starts[::chunk_size], len(df)]
+    for start, end in zip(chunk_bounds[:-1], chunk_bounds[1:]):
+        yield df.iloc[start:end]
+
+
+def iterate_group_chunks(df: pd.DataFrame, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """ Sort given dataframe by group once and split it into chunks with `chunk_size` groups. """
+
+    df = df.sort_values(SubmissionColumns.GROUP.value, kind='mergesort')
+    return _split_sorted_by_group(df, chunk_size)
+
+
+def iterate_group_chunks_from_csv(df_path: str, chunk_size: int,
+                                  rows_chunk_size: int = DEFAULT_ROWS_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """ Read sorted by group .csv file by `rows_chunk_size` rows and split it into chunks with `chunk_size` groups,
+    so only one chunk of groups is kept in memory. """
+
+    df_buffer: Optional[pd.DataFrame] = None
+    for df_rows in pd.read_csv(df_path, chunksize=rows_chunk_size):
+        df_buffer = df_rows if df_buffer is None else pd.concat([df_buffer, df_rows], ignore_index=True)
+
+        groups = df_buffer[SubmissionColumns.GROUP.value].to_numpy()
+        if (np.diff(groups) < 0).any():
+            raise ValueError(f'File {df_path} is not sorted by {SubmissionColumns.GROUP.value}')
+
+        # The last group can be continued in the next rows, so only groups before it are complete
+        group_starts = _get_group_starts(groups)
+        complete_groups_count = (len(group_starts) - 1) // chunk_size * chunk_size
+        if complete_groups_count > 0:
+            end = group_starts[complete_groups_count]
+            yield from _split_sorted_by_group(df_buffer.iloc[:end], chunk_size)
+            df_buffer = df_buffer.iloc[end:]
+
+    if df_buffer is not None and not df_buffer.empty:
+        yield from _split_sorted_by_group(df_buffer, chunk_size)
+
+
+def get_chunk_statistics(df_chunk: pd.DataFrame, func: Callable) -> pd.DataFrame:
+    """ Apply `func` to each group of given chunk. """
+
+    return df_chunk.groupby([SubmissionColumns.GROUP.value], as_index=False).apply(func)
+
+
+def _save_chunk_statistics(df_chunk: pd.DataFrame, func: Callable, df_statistics_path: str) -> str:
+    write_df(get_chunk_statistics(df_chunk, func), df_statistics_path)
+    return df_statistics_path
+
+
+def _merge_chunk_statistics(chunk_statistics_path: str, df_statistics_path: str, chunk_index: int):
+    """ Append partial result to the result file. Header is written only from the first partial result. """
+
+    with open(chunk_statistics_path, 'rb') as chunk_file, open(df_statistics_path, 'wb' if chunk_index == 0 else 'ab') \
+            as statistics_file:
+        if chunk_index > 0:
+            chunk_file.readline()
+        shutil.copyfileobj(chunk_file, statistics_file)
+    os.remove(chunk_statistics_path)
+
+
+def process_group_chunks(df_chunks: Iterable[pd.DataFrame], df_statistics_path: str, func: Callable, jobs: int = 1):
+    """ Apply `func` to each group of given chunks and save results in order of chunks. If `jobs` > 1, chunks are
+    processed by process pool which saves partial results to temporary files, then they are merged in order.
+    At most 2 * `jobs` chunks are in flight, so chunks can be read lazily. `func` must be picklable then. """
+
+    if jobs <= 1:
+        for i, df_chunk in enumerate(df_chunks):
+            logging.info(f'Processing {i}-th chunk with {len(df_chunk)} rows')
+            save_chunk(get_chunk_statistics(df_chunk, func), df_statistics_path, i)
+        return
+
+    tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(df_statistics_path)))
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = deque()
+            merged_count = 0
+            for i, df_chunk in enumerate(df_chunks):
+                logging.info(f'Submitting {i}-th chunk with {len(df_chunk)} rows')
+                chunk_statistics_path = os.path.join(tmp_dir, f'{i}.csv')
+                futures.append(executor.submit(_save_chunk_statistics, df_chunk, func, chunk_statistics_path))
+
+                while len(futures) >= 2 * jobs or (futures and futures[0].done()):
+                    _merge_chunk_statistics(futures.popleft().result(), df_statistics_path, merged_count)
+                    merged_count += 1
+
+            while futures:
+                _merge_chunk_statistics(futures.popleft().result(), df_statistics_path, merged_count)
+                merged_count += 1
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def get_statistics_by_group(df: pd.DataFrame, df_statistics_path: str, chunk_size: int, func: Callable,
+                            jobs: int = 1):
+    """ Process given dataframe dividing into chunks with `chunk_size` groups. """
+
+    min_group, max_group = df[SubmissionColumns.GROUP.value].min(), df[SubmissionColumns.GROUP.value].max()
+    logging.info(f'Groups range: [{min_group}, {max_group}]')
 
-        logging.info('Selecting dataframe chunk')
-        df_chunk = df[df[SubmissionColumns.GROUP].between(min_group_index, max_group_index, inclusive=True)]
+    process_group_chunks(iterate_group_chunks(df, chunk_size), df_statistics_path, func, jobs)
 
-        df_grouped_chunk = df_chunk.groupby([SubmissionColumns.GROUP], as_index=False)
 
-        logging.info('Applying function')
-        df_chunk_statistics = df_grouped_chunk.apply(func)
+def get_statistics_by_group_from_csv(df_path: str, df_statistics_path: str, chunk_size: int, func: Callable,
+                                     jobs: int = 1, rows_chunk_size: int = DEFAULT_ROWS_CHUNK_SIZE):
+    """ Process sorted by group .csv file dividing into chunks with `chunk_size` groups
+    without loading the whole file. """
 
-        logging.info('Saving chunk result')
-        save_chunk(df_chunk_statistics, df_statistics_path, i)
+    process_group_chunks(iterate_group_chunks_from_csv(df_path, chunk_size, rows_chunk_size),
+                         df_statistics_path, func, jobs)
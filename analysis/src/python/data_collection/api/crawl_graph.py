@@ -0,0 +1,95 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Set
+
+from analysis.src.python.data_collection.api.platform_client import PlatformClient
+from analysis.src.python.data_collection.api.platform_objects import Object
+from analysis.src.python.data_collection.api.utils import get_class_name
+
+# Count of referenced ids which are requested together
+DEFAULT_CRAWL_BATCH_SIZE = 200
+
+
+class CrawlGraph:
+    """ Collects root objects and all objects which are referenced by them through foreign keys of the client
+    (e.x. submission -> step -> topic, submission -> user) in one run. Referenced ids are gathered while root objects
+    are being received and are requested by batches concurrently with the root crawl. Each object is requested
+    at most once per run. All collected objects are passed to `sink` with their class. """
+
+    def __init__(self, client: PlatformClient,
+                 sink: Callable[[str, List[Object]], None],
+                 batch_size: int = DEFAULT_CRAWL_BATCH_SIZE):
+        self.client = client
+        self.sink = sink
+        self.batch_size = batch_size
+
+        self.counts: Dict[str, int] = {}
+        self._seen_ids: Dict[str, Set[int]] = {}
+        self._pending_ids: Dict[str, List[int]] = {}
+        self._futures: List[Future] = []
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def run(self, collect_root_objects: Callable[[], Any]):
+        """ Runs `collect_root_objects` (e.x. `lambda: client.get_objects('submission')`) and collects objects
+        referenced by root objects until there are no new references. """
+
+        previous_sink = self.client.sink
+        self.client.sink = self._handle_objects
+        try:
+            with ThreadPoolExecutor(max_workers=max(self.client.workers, 1)) as executor:
+                self._executor = executor
+                collect_root_objects()
+                self._wait_for_references()
+        finally:
+            self.client.sink = previous_sink
+            self._executor = None
+
+        logging.info('Crawled ' + ', '.join(f'{count} {obj_class}s' for obj_class, count in self.counts.items()))
+
+    def _handle_objects(self, obj_class: str, objects: List[Object]):
+        obj_class = get_class_name(obj_class)
+        with self._lock:
+            self.sink(obj_class, objects)
+            self.counts[obj_class] = self.counts.get(obj_class, 0) + len(objects)
+            self._seen_ids.setdefault(obj_class, set()).update(obj.id for obj in objects if hasattr(obj, 'id'))
+
+            for foreign_key in self.client.foreign_keys.get(obj_class, []):
+                ref_class = get_class_name(foreign_key.obj_class)
+                seen_ids = self._seen_ids.setdefault(ref_class, set())
+                pending_ids = self._pending_ids.setdefault(ref_class, [])
+                for obj in objects:
+                    for obj_id in foreign_key.get_ids(obj):
+                        if obj_id not in seen_ids:
+                            seen_ids.add(obj_id)
+                            pending_ids.append(obj_id)
+
+                while len(pending_ids) >= self.batch_size:
+                    self._submit(ref_class, pending_ids[:self.batch_size])
+                    del pending_ids[:self.batch_size]
+
+    def _submit(self, obj_class: str, ids: List[int]):
+        self._futures.append(self._executor.submit(self._collect_references, obj_class, ids))
+
+    def _collect_references(self, obj_class: str, ids: List[int]):
+        try:
+            self.client.get_objects(obj_class, ids)
+        except Exception as e:
+            logging.error(f'Unable to get {len(ids)} referenced {obj_class}s: {e}')
+
+    def _wait_for_references(self):
+        """ Waits for requested batches, then requests the rest of pending ids until there are no new references. """
+
+        while True:
+            with self._lock:
+                for obj_class, pending_ids in self._pending_ids.items():
+                    if pending_ids:
+                        self._submit(obj_class, list(pending_ids))
+                        pending_ids.clear()
+                futures, self._futures = self._futures, []
+
+            if not futures:
+                return
+            for future in futures:
+                future.result()
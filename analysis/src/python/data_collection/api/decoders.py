@@ -0,0 +1,124 @@
+import datetime
+from dataclasses import fields, is_dataclass, MISSING
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Tuple, Type, TypeVar, Union, get_args, get_origin, get_type_hints
+
+from analysis.src.python.data_collection.api.utils import str_to_datetime
+
+"""
+This file contains decoders of platform responses to dataclasses. Decoder of each dataclass is built once
+from its type hints, so decoding of a response does not inspect type hints for every object as dacite does.
+"""
+
+T = TypeVar('T')
+Decoder = Callable[[Any], Any]
+
+NONE_TYPE = type(None)
+
+
+class MissingValue(Enum):
+    """ What to do if json does not contain value of a field. """
+    USE_DEFAULT = 'use_default'
+    USE_NONE = 'use_none'
+    RAISE = 'raise'
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _matches(type_hint: Any, value: Any) -> bool:
+    """ Checks whether json value can be decoded to `type_hint`, it is used to choose a type of Union. """
+
+    if type_hint is Any:
+        return True
+    if value is None:
+        return type_hint is NONE_TYPE
+
+    origin = get_origin(type_hint) or type_hint
+    if is_dataclass(origin) or origin is dict:
+        return isinstance(value, dict)
+    if origin is list:
+        return isinstance(value, list)
+    if origin is datetime.datetime:
+        return isinstance(value, str)
+    if origin is float:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    return isinstance(origin, type) and isinstance(value, origin)
+
+
+def _build_decoder(type_hint: Any) -> Decoder:
+    if is_dataclass(type_hint):
+        # Decoder is taken on call, so recursive dataclasses are supported
+        return lambda value: get_decoder(type_hint)(value)
+    if type_hint is datetime.datetime:
+        return str_to_datetime
+
+    origin, args = get_origin(type_hint), get_args(type_hint)
+    if origin is Union:
+        not_none_args = [arg for arg in args if arg is not NONE_TYPE]
+        if len(not_none_args) == 1:
+            decode_value = _build_decoder(not_none_args[0])
+            if decode_value is _identity:
+                return _identity
+            return lambda value: None if value is None else decode_value(value)
+
+        decoders = [(arg, _build_decoder(arg)) for arg in args]
+
+        def decode_union(value: Any) -> Any:
+            for arg, decode_arg in decoders:
+                if _matches(arg, value):
+                    return decode_arg(value)
+            raise ValueError(f'Unable to decode {value!r} to {type_hint}')
+
+        return decode_union
+
+    if origin is list and args:
+        decode_item = _build_decoder(args[0])
+        if decode_item is _identity:
+            return _identity
+        return lambda value: [decode_item(item) for item in value]
+
+    return _identity
+
+
+def _get_missing_value(data_field: Any, type_hint: Any) -> MissingValue:
+    if data_field.default is not MISSING or data_field.default_factory is not MISSING:
+        return MissingValue.USE_DEFAULT
+    if get_origin(type_hint) is Union and NONE_TYPE in get_args(type_hint):
+        return MissingValue.USE_NONE
+    return MissingValue.RAISE
+
+
+@lru_cache(maxsize=None)
+def get_decoder(data_class: Type[T]) -> Callable[[Dict[str, Any]], T]:
+    """ Returns decoder of json object to `data_class`. Values of fields are taken by snake-case or kebab-case keys,
+    platform time strings are converted to datetime and nested dataclasses are decoded recursively. """
+
+    type_hints = get_type_hints(data_class)
+    field_decoders: List[Tuple[str, str, Decoder, MissingValue]] = []
+    for data_field in fields(data_class):
+        if not data_field.init:
+            continue
+        type_hint = type_hints[data_field.name]
+        field_decoders.append((data_field.name, data_field.name.replace('_', '-'),
+                               _build_decoder(type_hint), _get_missing_value(data_field, type_hint)))
+
+    def decode(data: Dict[str, Any]) -> T:
+        kwargs = {}
+        for name, kebab_name, decode_value, missing_value in field_decoders:
+            if name in data:
+                value = data[name]
+            elif kebab_name in data:
+                value = data[kebab_name]
+            elif missing_value == MissingValue.USE_DEFAULT:
+                continue
+            elif missing_value == MissingValue.USE_NONE:
+                value = None
+            else:
+                raise ValueError(f'Missing value of field "{name}" of {data_class.__name__}')
+            kwargs[name] = decode_value(value)
+        return data_class(**kwargs)
+
+    return decode
@@ -1,6 +1,6 @@
 import webbrowser
 from http.server import BaseHTTPRequestHandler, HTTPServer
-from typing import Optional
+from typing import Any, Dict, Optional
 from urllib.parse import parse_qs, urlparse
 
 import requests
@@ -32,6 +32,7 @@ class OauthHandler(BaseHTTPRequestHandler):
         self.send_response(200)
         self.send_header("Content-type", "text/html")
         self.end_headers()
+        self.server.platform_token_response = response.json()
         self.server.platform_token = response.json()['access_token']
         self.wfile.write(response.json()['access_token'].encode())
 
@@ -43,6 +44,7 @@ class OauthServer(HTTPServer):
     def __init__(self, platform_host: str, client_id: str, client_secret: str, port: int):
         self.platform_host = platform_host
         self.platform_token = None
+        self.platform_token_response = None
         self.client_id = client_id
         self.client_secret = client_secret
         self.port = port
@@ -61,3 +63,9 @@ class OauthServer(HTTPServer):
 
         self.handle_request()
         return self.platform_token
+
+    def get_token_response(self) -> Optional[Dict[str, Any]]:
+        """ Execute token request and return the whole response with refresh token and expiration time. """
+
+        self.handle_request()
+        return self.platform_token_response
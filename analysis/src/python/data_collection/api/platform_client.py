@@ -1,28 +1,130 @@
-import datetime
 import logging
-from dataclasses import asdict
-from typing import Dict, List, Optional, Type, TypeVar
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field, replace
+from email.utils import parsedate_to_datetime
+from itertools import takewhile
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, TypeVar
 
 import requests
-from dacite import Config, from_dict
+from requests.adapters import HTTPAdapter
 
+from analysis.src.python.data_collection.api.decoders import get_decoder
 from analysis.src.python.data_collection.api.platform_auth import OauthServer
-from analysis.src.python.data_collection.api.platform_objects import BaseRequestParams, Object, ObjectResponse
-from analysis.src.python.data_collection.api.utils import str_to_datetime
-from analysis.src.python.data_collection.utils.json_utils import kebab_to_snake_case
+from analysis.src.python.data_collection.api.platform_objects import (
+    BaseRequestParams, ForeignKey, Object, ObjectResponse,
+)
+from analysis.src.python.data_collection.api.rate_limiter import TokenBucket
+from analysis.src.python.data_collection.api.response_archive import ResponseArchive
+from analysis.src.python.data_collection.api.response_cache import CachedResponse, ResponseCache
+from analysis.src.python.data_collection.api.token_cache import CachedToken, TokenCache
+from analysis.src.python.data_collection.api.utils import get_class_name
 
 T = TypeVar('T', bound=Object)
 
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 60.0
+DEFAULT_POOL_SIZE = 10
+DEFAULT_WORKERS = 1
+
+# Responses which mean that platform is overloaded and request should be repeated later
+RETRY_STATUS_CODES = {429, 503}
+MAX_RETRIES = 5
+BACKOFF_FACTOR = 1.0
+MAX_BACKOFF = 60.0
+MAX_PAGE_ATTEMPTS = 3
+
+# Max length of ids in one request, so request url is not too long
+MAX_IDS_LENGTH = 2000
+# Length of the `&ids%5B%5D=` prefix of each id, if ids are sent as repeated params
+REPEATED_ID_PREFIX_LENGTH = len('&ids%5B%5D=')
+
+
+@dataclass
+class PageQuery:
+    """ Paginated request of objects by given `params` and `obj_id` with pages which have been received.
+    If `is_new` is defined, only objects which satisfy it are kept. If platform returns objects from the newest
+    to the oldest (by ids of the first received page), paging stops at the first object which is not new,
+    otherwise all pages are requested. """
+
+    params: BaseRequestParams
+    obj_id: Optional[int] = None
+    is_new: Optional[Callable[[Object], bool]] = None
+    is_newest_first: Optional[bool] = None
+    next_page: int = 1
+    last_page: Optional[int] = None
+    has_many_pages: bool = False
+    pages: Dict[int, list] = field(default_factory=dict)
+    attempts: Dict[int, int] = field(default_factory=dict)
+    retry_pages: List[int] = field(default_factory=list)
+
+    def has_page_to_request(self) -> bool:
+        """ First page is requested alone, next pages are requested concurrently only when query has several pages,
+        so queries by id do not make extra requests. """
+
+        if self.retry_pages:
+            return True
+        if self.last_page is not None and self.next_page > self.last_page:
+            return False
+        return self.next_page == 1 or self.has_many_pages
+
+    def take_page(self) -> int:
+        if self.retry_pages:
+            return self.retry_pages.pop(0)
+        self.next_page += 1
+        return self.next_page - 1
+
 
 class PlatformClient:
     """ Base class for Hyperskill and Stepik clients which wraps data exchange process according to open APIs. """
 
-    def __init__(self, host: str, client_id: str, client_secret: str, port: int):
+    # Fields of objects of each class which reference other objects of the platform
+    foreign_keys: Dict[str, List[ForeignKey]] = {}
+    # If True, list request values are sent as repeated `key[]` params instead of one comma-separated value
+    repeated_list_params: bool = False
+
+    def __init__(self, host: str, client_id: str, client_secret: str, port: int,
+                 timeout: Tuple[float, float] = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT),
+                 pool_size: int = DEFAULT_POOL_SIZE,
+                 workers: int = DEFAULT_WORKERS,
+                 rate_limit: Optional[float] = None,
+                 cache: Optional[ResponseCache] = None,
+                 token_cache: Optional[TokenCache] = None,
+                 archive: Optional[ResponseArchive] = None):
         self.host = host
         self.client_id = client_id
         self.client_secret = client_secret
         self.port = port
-        self.token = self._get_authentication_code_token()
+        self.timeout = timeout
+        self.workers = workers
+        self.rate_limiter = TokenBucket(rate_limit)
+        self.cache = cache
+        self.archive = archive
+        # If sink is defined, collected objects are passed to it with their class page by page instead of being returned
+        self.sink: Optional[Callable[[str, List[Object]], None]] = None
+        self.session = self._create_session(max(pool_size, workers))
+
+        self.token_cache = token_cache
+        self.token: Optional[str] = None
+        self._cached_token: Optional[CachedToken] = None
+        self._token_lock = threading.Lock()
+        if token_cache is None:
+            self._set_token(self._get_authentication_code_token())
+        else:
+            self._update_token()
+
+    @staticmethod
+    def _create_session(pool_size: int) -> requests.Session:
+        """ Creates session which keeps up to `pool_size` connections to the platform alive between requests,
+        so every request does not open a new connection. """
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update({'Accept-Encoding': 'gzip, deflate', 'Connection': 'keep-alive'})
+        return session
 
     def _get_authentication_code_token(self):
         """ Runs authorization process using authentication-code grant type and
@@ -32,14 +134,76 @@ class PlatformClient:
         server.open_oauth_page()
         return server.get_token()
 
+    def _get_authentication_code_token_response(self) -> Optional[Dict[str, Any]]:
+        """ Runs authorization process using authentication-code grant type and
+        gets the whole token response with refresh token and expiration time. """
+
+        server = OauthServer(self.host, self.client_id, self.client_secret, self.port)
+        server.open_oauth_page()
+        return server.get_token_response()
+
+    def _get_refreshed_token_response(self, refresh_token: str) -> Optional[Dict[str, Any]]:
+        """ Gets new token using refresh-token grant type. """
+
+        auth = requests.auth.HTTPBasicAuth(self.client_id, self.client_secret)
+        response = self.session.post('{host}/oauth2/token/'.format(host=self.host),
+                                     data={'grant_type': 'refresh_token', 'refresh_token': refresh_token},
+                                     auth=auth,
+                                     headers={'Authorization': None},
+                                     timeout=self.timeout)
+        if response.status_code != 200 or 'access_token' not in response.json():
+            logging.warning(f'Unable to refresh token: platform responded {response.status_code}')
+            return None
+        return response.json()
+
+    def _get_cached_token(self, rejected_token: Optional[str] = None) -> Optional[CachedToken]:
+        """ Returns token from the token cache if it is not expired and was not rejected by platform.
+        Otherwise token is refreshed with refresh token or, if it is impossible, authorization in browser is run.
+        Cache is locked meanwhile, so concurrent processes wait for the new token instead of authorizing again. """
+
+        key = self.token_cache.get_key(self.host, self.client_id)
+        with self.token_cache.lock():
+            token = self.token_cache.get(key)
+            if token is not None and token.access_token != rejected_token and not token.is_expired():
+                return token
+
+            response = None
+            if token is not None and token.refresh_token is not None:
+                logging.info('Refreshing cached token')
+                response = self._get_refreshed_token_response(token.refresh_token)
+            if response is None:
+                response = self._get_authentication_code_token_response()
+            if response is None:
+                return None
+
+            token = CachedToken.from_response(response)
+            self.token_cache.put(key, token)
+            return token
+
+    def _set_token(self, token: Optional[str]):
+        self.token = token
+        if token is not None:
+            self.session.headers['Authorization'] = 'Bearer {token}'.format(token=token)
+
+    def _update_token(self, rejected_token: Optional[str] = None):
+        """ Takes new token from the token cache. If several threads try to update the same token,
+        only the first one does it. """
+
+        with self._token_lock:
+            if rejected_token is not None and self.token != rejected_token:
+                return
+            self._cached_token = self._get_cached_token(rejected_token)
+            self._set_token(self._cached_token.access_token if self._cached_token is not None else None)
+
     def _get_client_credential_token(self) -> str:
         """ Runs authorization process using client-credential grant type and
         gets session token for data exchange. """
 
         auth = requests.auth.HTTPBasicAuth(self.client_id, self.client_secret)
-        response = requests.post('{host}/oauth2/token/'.format(host=self.host),
-                                 data={'grant_type': 'client_credentials'},
-                                 auth=auth)
+        response = self.session.post('{host}/oauth2/token/'.format(host=self.host),
+                                     data={'grant_type': 'client_credentials'},
+                                     auth=auth,
+                                     timeout=self.timeout)
         token = response.json().get('access_token', None)
         if not token:
             logging.error('Unable to authorize with provided credentials')
@@ -47,6 +211,14 @@ class PlatformClient:
         logging.info(f'Got token: {token}')
         return token
 
+    def _handle_objects(self, obj_class: str, new_objects: List[T], objects: List[T], to_sink: bool = True):
+        """ Passes `new_objects` to sink if it is defined, otherwise adds them to `objects`. """
+
+        if to_sink and self.sink is not None:
+            self.sink(obj_class, new_objects)
+        else:
+            objects += new_objects
+
     def _get_objects(self,
                      obj_class: str,
                      obj_response_type: Type[ObjectResponse[T]],
@@ -55,28 +227,27 @@ class PlatformClient:
                      count: Optional[int] = None) -> List[T]:
         """ Get objects (steps, topics, ect.) from platform by given `obj_class`, `params` and `obj_id`."""
 
-        objects = []
-        page = 1
-        while count is None or len(objects) < count:
-            logging.info(f'Getting {obj_class} page={page} params={params}')
-            try:
-                params.page = page
-                response = self._fetch(obj_class, params, obj_response_type, obj_id)
-                if response is None:
-                    break
-                objects += response.get_objects()
+        if obj_id is None and params.ids is not None:
+            return self._get_objects_by_ids(obj_class, params.ids, obj_response_type, params, count)
+        return self._get_objects_by_queries(obj_class, obj_response_type, [PageQuery(params, obj_id)], count)
 
-                if count is not None and len(objects) >= count:
-                    return objects[:count]
+    def _split_ids(self, obj_ids: List[int], max_count: int) -> List[List[int]]:
+        """ Split ids to chunks of up to `max_count` ids, which take not more than `MAX_IDS_LENGTH` chars of url. """
 
-                if response.meta.has_next:
-                    page += 1
-                else:
-                    break
-            except Exception as e:
-                logging.error(f'Unable to get {obj_class} page={page} params={params}: {e}')
+        separator_length = REPEATED_ID_PREFIX_LENGTH if self.repeated_list_params else 1
+        chunks = []
+        chunk, chunk_length = [], 0
+        for obj_id in obj_ids:
+            obj_id_length = len(str(obj_id)) + separator_length
+            if chunk and (len(chunk) >= max_count or chunk_length + obj_id_length > MAX_IDS_LENGTH):
+                chunks.append(chunk)
+                chunk, chunk_length = [], 0
+            chunk.append(obj_id)
+            chunk_length += obj_id_length
 
-        return objects
+        if chunk:
+            chunks.append(chunk)
+        return chunks
 
     def _get_objects_by_ids(self,
                             obj_class: str,
@@ -84,56 +255,265 @@ class PlatformClient:
                             obj_response_type: Type[ObjectResponse[T]],
                             params: BaseRequestParams,
                             count: Optional[int] = None) -> List[T]:
-        """ Get objects (steps, topics, ect.) from platform by given `obj_class`, `params` and `obj_ids`."""
+        """ Get objects (steps, topics, ect.) from platform by given `obj_class`, `params` and `obj_ids`.
+        Ids are requested by chunks of `page_size` ids, objects are returned once in order of `obj_ids`. """
 
-        objects = []
-        for obj_id in obj_ids:
-            objects += self._get_objects(obj_class, obj_response_type, params, obj_id)
-            if count is not None and len(objects) >= count:
-                return objects[:count]
+        unique_ids = list(dict.fromkeys(obj_ids))
+        chunks = self._split_ids(unique_ids, params.page_size)
+
+        # If count or sink is defined, chunks are requested by `workers` chunks until enough objects are received
+        step = len(chunks) if count is None and self.sink is None else self.workers
+        objects: List[T] = []
+        received_count, missing_ids_count = 0, 0
+        for i in range(0, len(chunks), max(step, 1)):
+            wave_chunks = chunks[i:i + step]
+            queries = [PageQuery(replace(params, ids=chunk)) for chunk in wave_chunks]
+            wave_objects = self._get_objects_by_queries(obj_class, obj_response_type, queries, to_sink=False)
+            objects_by_id = {obj.id: obj for obj in wave_objects}
+
+            wave_ids = [obj_id for chunk in wave_chunks for obj_id in chunk]
+            missing_ids_count += sum(obj_id not in objects_by_id for obj_id in wave_ids)
+            wave_objects = [objects_by_id[obj_id] for obj_id in wave_ids if obj_id in objects_by_id]
+            if count is not None:
+                wave_objects = wave_objects[:count - received_count]
+
+            received_count += len(wave_objects)
+            self._handle_objects(obj_class, wave_objects, objects)
+            if count is not None and received_count >= count:
+                break
+
+        if count is None and missing_ids_count > 0:
+            logging.warning(f'Unable to get {missing_ids_count} of {len(unique_ids)} {obj_class}s by ids')
 
         return objects
 
+    def _get_objects_by_params(self,
+                               obj_class: str,
+                               obj_response_type: Type[ObjectResponse[T]],
+                               params_list: List[BaseRequestParams],
+                               count: Optional[int] = None) -> List[T]:
+        """ Get objects (steps, topics, ect.) from platform by given `obj_class` for each of `params_list`."""
+
+        queries = [PageQuery(params) for params in params_list]
+        return self._get_objects_by_queries(obj_class, obj_response_type, queries, count)
+
+    def _get_objects_by_queries(self,
+                                obj_class: str,
+                                obj_response_type: Type[ObjectResponse[T]],
+                                queries: List[PageQuery],
+                                count: Optional[int] = None,
+                                to_sink: bool = True) -> List[T]:
+        """ Get objects of all `queries` keeping up to `workers` requests in flight across pages and queries.
+        Objects are returned in order of queries and pages, so the result is the same as for sequential requests.
+        If `to_sink` is True and client has sink, pages are passed to sink as soon as they are received in order. """
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures: Dict[Future, Tuple[PageQuery, int]] = {}
+            objects: List[T] = []
+            received_count = 0
+            query_index, page = 0, 1
+            while count is None or received_count < count:
+                for query in queries[query_index:]:
+                    while len(futures) < self.workers and query.has_page_to_request():
+                        query_page = query.take_page()
+                        future = executor.submit(self._fetch_page, obj_class, obj_response_type, query, query_page)
+                        futures[future] = (query, query_page)
+
+                if not futures:
+                    break
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    query, query_page = futures.pop(future)
+                    self._process_page(obj_class, query, query_page, future)
+
+                # Collect objects of pages which are received in order
+                while query_index < len(queries):
+                    query = queries[query_index]
+                    if page in query.pages:
+                        page_objects = query.pages.pop(page)
+                        if count is not None:
+                            page_objects = page_objects[:count - received_count]
+                        received_count += len(page_objects)
+                        self._handle_objects(obj_class, page_objects, objects, to_sink)
+                        page += 1
+                    elif query.last_page is not None and page > query.last_page:
+                        query_index, page = query_index + 1, 1
+                    else:
+                        break
+
+            for future in futures:
+                future.cancel()
+
+        return objects
+
+    def _fetch_page(self,
+                    obj_class: str,
+                    obj_response_type: Type[ObjectResponse[T]],
+                    query: PageQuery,
+                    page: int) -> Optional[ObjectResponse[T]]:
+        params = replace(query.params, page=page)
+        logging.info(f'Getting {obj_class} page={params.page} params={params}')
+        return self._fetch(obj_class, params, obj_response_type, query.obj_id)
+
     @staticmethod
-    def _prepare_params(params: BaseRequestParams) -> Dict[str, str]:
+    def _process_page(obj_class: str, query: PageQuery, page: int, future: Future):
+        """ Saves objects of received page to `query`. Failed page is requested again up to `MAX_PAGE_ATTEMPTS`
+        times, after that query is stopped at this page. """
+
+        query.attempts[page] = query.attempts.get(page, 0) + 1
+        try:
+            response = future.result()
+        except Exception as e:
+            logging.error(f'Unable to get {obj_class} page={page} params={query.params}: {e}')
+            if query.attempts[page] < MAX_PAGE_ATTEMPTS:
+                query.retry_pages.append(page)
+                return
+            response = None
+
+        if response is None:
+            query.last_page = min(page - 1, query.last_page if query.last_page is not None else page)
+            return
+
+        if query.last_page is not None and page > query.last_page:
+            return
+
+        objects = response.get_objects()
+        if query.is_new is not None:
+            if query.is_newest_first is None and len(objects) > 1:
+                query.is_newest_first = objects[0].id > objects[-1].id
+                if not query.is_newest_first:
+                    logging.warning(f'Platform returns {get_class_name(obj_class)}s from the oldest to the newest, '
+                                    f'so all pages are requested for params={query.params}')
+
+            if query.is_newest_first:
+                new_objects = list(takewhile(query.is_new, objects))
+                if len(new_objects) < len(objects):
+                    query.pages[page] = new_objects
+                    query.last_page = min(page, query.last_page if query.last_page is not None else page)
+                    return
+            else:
+                objects = list(filter(query.is_new, objects))
+
+        query.pages[page] = objects
+        if response.meta.has_next:
+            query.has_many_pages = True
+        else:
+            query.last_page = min(page, query.last_page if query.last_page is not None else page)
+
+    def _prepare_params(self, params: BaseRequestParams) -> Dict[str, Any]:
         """ Prepare request params. Remove None params and convert list request values to string objects,
-        separated by comma. """
+        separated by comma, or to repeated `key[]` params if `repeated_list_params` is True. """
 
         dict_params = {}
         for key, value in asdict(params).items():
             if value is None:
                 continue
             if isinstance(value, list):
-                value = ','.join(map(str, value))
+                if self.repeated_list_params:
+                    key, value = f'{key}[]', list(map(str, value))
+                else:
+                    value = ','.join(map(str, value))
             dict_params[key] = value
         return dict_params
 
+    @staticmethod
+    def _get_retry_delay(response: requests.Response, attempt: int) -> float:
+        """ Returns delay from Retry-After header (in seconds or as date) or exponential backoff delay. """
+
+        retry_after = response.headers.get('Retry-After')
+        if retry_after is not None:
+            if retry_after.isdigit():
+                return float(retry_after)
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+        return min(MAX_BACKOFF, BACKOFF_FACTOR * 2 ** attempt)
+
+    def _get(self, api_url: str, params: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """ Executes request respecting rate limit. If platform asks to slow down, all requests are paused
+        and request is repeated up to `MAX_RETRIES` times. Expired or rejected cached token is updated. """
+
+        is_token_updated = False
+        for attempt in range(MAX_RETRIES + 1):
+            token = self.token
+            if self._cached_token is not None and self._cached_token.is_expired():
+                self._update_token(token)
+                token = self.token
+
+            self.rate_limiter.acquire()
+            response = self.session.get(api_url, params=params, headers=headers, timeout=self.timeout)
+            if response.status_code == 401 and self.token_cache is not None and not is_token_updated:
+                # Token could be revoked before its expiration time, so it is updated once
+                logging.warning(f'Platform rejected token for {api_url}, updating token')
+                is_token_updated = True
+                self._update_token(token)
+                continue
+
+            if response.status_code not in RETRY_STATUS_CODES or attempt == MAX_RETRIES:
+                return response
+
+            delay = self._get_retry_delay(response, attempt)
+            logging.warning(f'Platform responded {response.status_code} to {api_url}, retrying in {delay} seconds')
+            self.rate_limiter.pause(delay)
+        return response
+
+    def _get_json(self, obj_class: str, api_url: str, params: Dict[str, Any]) -> Optional[Any]:
+        """ Returns response json from cache if it is fresh or has not been modified, otherwise requests it. """
+
+        if self.cache is None:
+            raw_response = self._get(api_url, params)
+            return raw_response.json() if raw_response.status_code == 200 else None
+
+        key = self.cache.get_key(api_url, params)
+        cached_response = self.cache.get(key)
+        if cached_response is not None and self.cache.is_fresh(cached_response, obj_class):
+            self.cache.count('hits')
+            return cached_response.json
+
+        headers = cached_response.get_validation_headers() if cached_response is not None else None
+        raw_response = self._get(api_url, params, headers)
+        if raw_response.status_code == 304 and cached_response is not None:
+            self.cache.count('revalidated')
+            cached_response.stored_at = time.time()
+            self.cache.put(key, cached_response)
+            return cached_response.json
+
+        self.cache.count('misses')
+        if raw_response.status_code != 200:
+            return None
+
+        response_json = raw_response.json()
+        self.cache.put(key, CachedResponse(
+            url=api_url,
+            params=params,
+            json=response_json,
+            stored_at=time.time(),
+            etag=raw_response.headers.get('ETag'),
+            last_modified=raw_response.headers.get('Last-Modified'),
+        ))
+        return response_json
+
     def _fetch(self,
                obj_class: str,
                params: BaseRequestParams,
                obj_response_type: Type[ObjectResponse[T]],
                obj_id: Optional[int] = None) -> Optional[ObjectResponse[T]]:
         """ Builds, executed and processes request to educational platform.
-        Response is parsed to `obj_response_type`."""
+        Response is parsed to `obj_response_type` by decoder, which is built once for each response type."""
 
         dict_params = self._prepare_params(params)
-        api_url = '{host}/api/{obj_class}s'.format(host=self.host, obj_class=obj_class)
+        api_url = '{host}/api/{obj_class}s'.format(host=self.host, obj_class=get_class_name(obj_class))
 
         if obj_id is not None:
             api_url = '{url}/{obj_id}'.format(url=api_url, obj_id=obj_id)
-        if self.token is not None:
-            raw_response = requests.get(api_url, headers={'Authorization': 'Bearer {token}'.format(token=self.token)},
-                                        params=dict_params, timeout=None)
-        else:
-            raw_response = requests.get(api_url, params=dict_params, timeout=None)
+        response_json = self._get_json(obj_class, api_url, dict_params)
 
-        if raw_response is None or raw_response.status_code != 200:
-            logging.warning(f"Failed to fetch {api_url}: {raw_response}")
+        if response_json is None:
+            logging.warning(f"Failed to fetch {api_url}")
             return None
-        else:
-            response_json = raw_response.json()
 
-        preprocessed_response = kebab_to_snake_case(response_json)
-        return from_dict(data_class=obj_response_type,
-                         data=preprocessed_response,
-                         config=Config(type_hooks={datetime.datetime: str_to_datetime}))
+        if self.archive is not None:
+            self.archive.write(obj_class, obj_response_type, api_url, dict_params, response_json)
+        return get_decoder(obj_response_type)(response_json)
@@ -18,6 +18,27 @@ class Object:
     pass
 
 
+@dataclass(frozen=True)
+class ForeignKey:
+    """ Field of object which references objects of `obj_class` by id or by list of ids. """
+
+    field: str
+    obj_class: str
+
+    def get_ids(self, obj: Object) -> List[int]:
+        value = getattr(obj, self.field, None)
+        if value is None:
+            return []
+
+        ids = []
+        for obj_id in value if isinstance(value, list) else [value]:
+            try:
+                ids.append(int(obj_id))
+            except (TypeError, ValueError):
+                continue
+        return ids
+
+
 @dataclass
 class BaseRequestParams:
     page: int = 1
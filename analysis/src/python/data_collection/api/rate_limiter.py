@@ -0,0 +1,41 @@
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """ Rate limiter which allows `rate` requests per second on average and bursts up to `capacity` requests.
+    If platform asks to slow down, all requests are paused for requested time. Limiter is shared between threads. """
+
+    def __init__(self, rate: Optional[float] = None, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate or 1, 1)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """ Waits until request is allowed. If `rate` is None, requests are only delayed by pauses. """
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                delay = self._paused_until - now
+                if delay <= 0:
+                    if self.rate is None:
+                        return
+
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                    self._updated_at = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+
+    def pause(self, delay: float):
+        """ Pauses all requests for `delay` seconds. """
+
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
@@ -0,0 +1,96 @@
+import gzip
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Type
+
+from analysis.src.python.data_collection.api.platform_objects import ObjectResponse
+from analysis.src.python.data_collection.api.utils import get_class_name
+
+DEFAULT_SEGMENT_SIZE = 1000
+SEGMENT_EXTENSION = '.ndjson.gz'
+
+
+def get_response_type_name(obj_response_type: Type[ObjectResponse]) -> str:
+    return f'{obj_response_type.__module__}:{obj_response_type.__qualname__}'
+
+
+def get_response_type(name: str) -> Type[ObjectResponse]:
+    module_name, qualname = name.split(':')
+    response_type = importlib.import_module(module_name)
+    for attribute in qualname.split('.'):
+        response_type = getattr(response_type, attribute)
+    return response_type
+
+
+class ResponseArchive:
+    """ Archive of raw platform responses, so objects can be built again without requests to the platform
+    (e.x. after changes of objects dataclasses). Each response is a json line with object class, response type,
+    request url and params. Lines are written to gzip-compressed segments of up to `segment_size` responses,
+    segments of one run are named by its start time and process id, so several processes can share an archive. """
+
+    def __init__(self, archive_dir: str, segment_size: int = DEFAULT_SEGMENT_SIZE):
+        self.archive_dir = archive_dir
+        self.segment_size = segment_size
+        os.makedirs(archive_dir, exist_ok=True)
+
+        self._prefix = f'segment-{time.strftime("%Y%m%d%H%M%S")}-{os.getpid()}'
+        self._segment_index = 0
+        self._segment: Optional[gzip.GzipFile] = None
+        self._segment_count = 0
+        self._lock = threading.Lock()
+
+    def _open_segment(self):
+        path = os.path.join(self.archive_dir, f'{self._prefix}-{self._segment_index:05d}{SEGMENT_EXTENSION}')
+        self._segment = gzip.open(path, 'wt', encoding='utf8')
+        self._segment_index += 1
+        self._segment_count = 0
+
+    def write(self, obj_class: str, obj_response_type: Type[ObjectResponse], url: str, params: Dict[str, Any],
+              response_json: Any):
+        record = {
+            'obj_class': get_class_name(obj_class),
+            'response_type': get_response_type_name(obj_response_type),
+            'url': url,
+            'params': params,
+            'json': response_json,
+        }
+        line = json.dumps(record) + '\n'
+
+        with self._lock:
+            if self._segment is None:
+                self._open_segment()
+            self._segment.write(line)
+            self._segment_count += 1
+            if self._segment_count >= self.segment_size:
+                self._segment.close()
+                self._segment = None
+
+    def close(self):
+        with self._lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+
+
+def get_segments(archive_dir: str) -> List[str]:
+    """ Returns paths of archive segments in order of their creation. """
+
+    return [os.path.join(archive_dir, name) for name in sorted(os.listdir(archive_dir))
+            if name.endswith(SEGMENT_EXTENSION)]
+
+
+def read_segment(path: str) -> Iterator[Dict[str, Any]]:
+    """ Reads archived responses from segment. If segment is truncated (e.x. collection was killed),
+    its complete responses are read. """
+
+    try:
+        with gzip.open(path, 'rt', encoding='utf8') as f:
+            for line in f:
+                yield json.loads(line)
+    except (EOFError, zlib.error, gzip.BadGzipFile, json.JSONDecodeError) as e:
+        logging.warning(f'Segment {path} is truncated, the rest of it is skipped: {e}')
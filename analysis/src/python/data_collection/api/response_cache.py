@@ -0,0 +1,86 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+DEFAULT_CACHE_TTL = 0.0
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    params: Dict[str, Any]
+    json: Any
+    stored_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def get_validation_headers(self) -> Dict[str, str]:
+        """ Headers for conditional request, so platform responds `304 Not Modified` if object has not changed. """
+
+        headers = {}
+        if self.etag is not None:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified is not None:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """ On-disk cache of platform responses keyed by request url and params. Response is used without request
+    while it is younger than TTL of its object class. After that response is revalidated with ETag or Last-Modified
+    headers if platform has provided them, otherwise response is requested again. """
+
+    def __init__(self, cache_dir: Union[str, Path],
+                 default_ttl: float = DEFAULT_CACHE_TTL,
+                 ttl_by_class: Optional[Dict[str, float]] = None):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.default_ttl = default_ttl
+        self.ttl_by_class = ttl_by_class or {}
+
+        self.statistics = {'hits': 0, 'revalidated': 0, 'misses': 0}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(url: str, params: Dict[str, Any]) -> str:
+        key_data = {'url': url, 'params': {key: str(value) for key, value in params.items()}}
+        return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode()).hexdigest()
+
+    def _get_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f'{key}.json'
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        try:
+            with open(self._get_path(key), encoding='utf8') as f:
+                return CachedResponse(**json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def put(self, key: str, response: CachedResponse):
+        path = self._get_path(key)
+        path.parent.mkdir(exist_ok=True)
+
+        # Write to temporary file first, so concurrent readers never see partially written response
+        tmp_path = path.with_name(f'{path.name}.{threading.get_ident()}.tmp')
+        with open(tmp_path, 'w', encoding='utf8') as f:
+            json.dump(asdict(response), f)
+        os.replace(tmp_path, path)
+
+    def is_fresh(self, response: CachedResponse, obj_class: str) -> bool:
+        ttl = self.ttl_by_class.get(obj_class, self.default_ttl)
+        return time.time() - response.stored_at < ttl
+
+    def count(self, event: str):
+        with self._lock:
+            self.statistics[event] += 1
+
+    def log_statistics(self):
+        total = sum(self.statistics.values())
+        logging.info(f'Response cache statistics: {total} requests, ' +
+                     ', '.join(f'{count} {event}' for event, count in self.statistics.items()))
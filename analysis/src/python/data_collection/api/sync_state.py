@@ -0,0 +1,56 @@
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional
+
+from analysis.src.python.data_collection.api.platform_objects import Object
+
+
+@dataclass
+class Watermark:
+    """ The latest collected object of some scope (for example, submissions of one user). """
+
+    id: int
+    time: Optional[str] = None
+
+
+class SyncState:
+    """ Watermarks of collected objects by scopes, which are stored in json file between runs, so the next run
+    requests only objects which are newer than watermarks. If platform returns objects from the newest to the oldest,
+    paging stops at the first already collected object, otherwise collected objects are skipped on all pages. """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.watermarks: Dict[str, Watermark] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.watermarks = {scope: Watermark(**watermark) for scope, watermark in json.load(f).items()}
+
+    def get_is_new(self, scope: str) -> Optional[Callable[[Object], bool]]:
+        """ Returns predicate which checks that object has not been collected yet or None for new scope. """
+
+        watermark = self.watermarks.get(scope)
+        if watermark is None:
+            return None
+        return lambda obj: obj.id > watermark.id
+
+    def update(self, scope: str, objects: List[Object]):
+        if not objects:
+            return
+
+        newest = max(objects, key=lambda obj: obj.id)
+        watermark = self.watermarks.get(scope)
+        if watermark is None or newest.id > watermark.id:
+            time = getattr(newest, 'time', None)
+            self.watermarks[scope] = Watermark(newest.id, time.isoformat() if time is not None else None)
+
+    def save(self):
+        """ Saves watermarks. Should be called after collected objects are saved, so no object is skipped
+        in the next run if this run is interrupted. """
+
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({scope: asdict(watermark) for scope, watermark in self.watermarks.items()}, f, indent=2)
+        os.replace(tmp_path, self.path)
+        logging.info(f'Saved watermarks of {len(self.watermarks)} scopes to {self.path}')
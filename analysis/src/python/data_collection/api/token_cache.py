@@ -0,0 +1,98 @@
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+DEFAULT_TOKEN_CACHE_PATH = os.path.join(Path.home(), '.cache', 'data_collection', 'tokens.json')
+
+# Token is refreshed this count of seconds before its expiry, so requests are not rejected
+EXPIRY_MARGIN = 60.0
+# Lock is held during authorization in browser, so it is considered stale only after a long time
+LOCK_TIMEOUT = 600.0
+POLL_INTERVAL = 0.1
+
+
+@dataclass
+class CachedToken:
+    access_token: str
+    expires_at: Optional[float] = None
+    refresh_token: Optional[str] = None
+
+    @classmethod
+    def from_response(cls, response: Dict[str, Any]) -> 'CachedToken':
+        """ Creates token from response of platform token endpoint. """
+
+        expires_in = response.get('expires_in')
+        return cls(access_token=response['access_token'],
+                   expires_at=time.time() + float(expires_in) if expires_in is not None else None,
+                   refresh_token=response.get('refresh_token'))
+
+    def is_expired(self) -> bool:
+        return self.expires_at is not None and time.time() > self.expires_at - EXPIRY_MARGIN
+
+
+class TokenCache:
+    """ Local json file with platform tokens by platform host and client id, so data collection runs do not
+    require authorization in browser until refresh token expires. File is readable only by its owner.
+    Concurrent processes take the lock of the cache, so only one of them refreshes the token or authorizes. """
+
+    def __init__(self, path: str = DEFAULT_TOKEN_CACHE_PATH):
+        self.path = path
+        self.lock_path = f'{path}.lock'
+
+    @staticmethod
+    def get_key(host: str, client_id: str) -> str:
+        return f'{host}|{client_id}'
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def get(self, key: str) -> Optional[CachedToken]:
+        token = self._load().get(key)
+        return CachedToken(**token) if token is not None else None
+
+    def put(self, key: str, token: CachedToken):
+        tokens = self._load()
+        tokens[key] = asdict(token)
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        fd = os.open(tmp_path, os.O_CREAT | os.O_TRUNC | os.O_WRONLY, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(tokens, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        """ Takes the lock of the cache, waits while it is taken by another process. """
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.lock_path)), exist_ok=True)
+        while True:
+            try:
+                os.close(os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.lock_path) > LOCK_TIMEOUT:
+                        logging.warning(f'Removing stale lock of token cache {self.lock_path}')
+                        os.remove(self.lock_path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                time.sleep(POLL_INTERVAL)
+
+        try:
+            yield
+        finally:
+            try:
+                os.remove(self.lock_path)
+            except FileNotFoundError:
+                pass
@@ -1,4 +1,5 @@
 import datetime
+from enum import Enum
 from typing import Optional
 
 
@@ -6,8 +7,19 @@ def str_to_datetime(date_string: Optional[str]) -> Optional[datetime.datetime]:
     """ Transform time string from platform in format `2013-07-12T07:00:00Z` to datetime. """
     if date_string is None:
         return None
+    if date_string.endswith('Z'):
+        # Fast path for the most of timestamps, strptime is much slower than fromisoformat
+        try:
+            return datetime.datetime.fromisoformat(date_string[:-1])
+        except ValueError:
+            pass
     try:
         timestamp = datetime.datetime.strptime(date_string, '%Y-%m-%dT%H:%M:%S.%fZ')
     except ValueError:
         timestamp = datetime.datetime.strptime(date_string, '%Y-%m-%dT%H:%M:%SZ')
     return timestamp
+
+
+def get_class_name(obj_class: str) -> str:
+    """ Returns name of object class, which can be defined by ObjectClass of platform or by string. """
+    return obj_class.value if isinstance(obj_class, Enum) else obj_class
@@ -0,0 +1,271 @@
+import argparse
+import datetime
+import json
+import logging
+import random
+import string
+import sys
+import threading
+import time
+from dataclasses import dataclass, fields, is_dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple, Type, Union, get_args, get_origin, get_type_hints
+from urllib.parse import parse_qs, urlparse
+
+from analysis.src.python.data_collection.api.platform_objects import ObjectResponse, Platform
+from analysis.src.python.data_collection.hyperskill.api.projects import ProjectsResponse
+from analysis.src.python.data_collection.hyperskill.api.steps import StepsResponse as HyperskillStepsResponse
+from analysis.src.python.data_collection.hyperskill.api.submissions import SubmissionResponse
+from analysis.src.python.data_collection.hyperskill.api.topics import TopicsResponse
+from analysis.src.python.data_collection.hyperskill.api.tracks import TracksResponse
+from analysis.src.python.data_collection.hyperskill.api.users import UserResponse
+from analysis.src.python.data_collection.stepik.api.courses import CoursesResponse
+from analysis.src.python.data_collection.stepik.api.lessons import LessonsResponse
+from analysis.src.python.data_collection.stepik.api.steps import StepsResponse as StepikStepsResponse
+from analysis.src.python.data_collection.stepik.api.submissions import SubmissionsResponse
+from analysis.src.python.data_collection.stepik.api.users import UsersResponse
+
+"""
+This file contains local HTTP server which imitates Hyperskill or Stepik API with synthetic objects,
+so throughput of PlatformClient can be measured without requests to the platforms.
+"""
+
+response_types: Dict[Platform, Dict[str, Type[ObjectResponse]]] = {
+    Platform.HYPERSKILL: {
+        'step': HyperskillStepsResponse,
+        'topic': TopicsResponse,
+        'track': TracksResponse,
+        'project': ProjectsResponse,
+        'user': UserResponse,
+        'submission': SubmissionResponse,
+    },
+    Platform.STEPIK: {
+        'step': StepikStepsResponse,
+        'lesson': LessonsResponse,
+        'course': CoursesResponse,
+        'user': UsersResponse,
+        'submission': SubmissionsResponse,
+    },
+}
+
+# Hyperskill takes ids as one comma-separated param, Stepik takes them as repeated `ids[]` params
+IDS_PARAMS = {
+    Platform.HYPERSKILL: 'ids',
+    Platform.STEPIK: 'ids[]',
+}
+
+# Platforms return submissions from the newest to the oldest, unless `newest_first` of config is False
+DESCENDING_CLASSES = {'submission'}
+
+DEFAULT_OBJECTS_COUNT = 10000
+DEFAULT_MAX_PAGE_SIZE = 1000
+# Count of different synthetic objects of each class, objects with other ids are their copies
+TEMPLATES_COUNT = 100
+
+NONE_TYPE = type(None)
+BASE_TIME = datetime.datetime(2021, 1, 1)
+
+
+@dataclass
+class FakePlatformConfig:
+    platform: Platform = Platform.HYPERSKILL
+    objects_count: int = DEFAULT_OBJECTS_COUNT
+    max_page_size: int = DEFAULT_MAX_PAGE_SIZE
+    latency: float = 0.0
+    # Part of requests which are answered with `429 Too Many Requests`
+    throttle_rate: float = 0.0
+    retry_after: int = 0
+    seed: int = 0
+    newest_first: bool = True
+
+
+def _generate_value(type_hint: Any, rnd: random.Random, objects_count: int) -> Any:
+    """ Generates json value of `type_hint`. Integers are in range of object ids, so they can be used as references. """
+
+    origin, args = get_origin(type_hint), get_args(type_hint)
+    if origin is Union:
+        return _generate_value(next(arg for arg in args if arg is not NONE_TYPE), rnd, objects_count)
+    if is_dataclass(type_hint):
+        return generate_object(type_hint, rnd.randint(1, objects_count), rnd, objects_count)
+    if origin is list:
+        return [_generate_value(args[0], rnd, objects_count) for _ in range(3)] if args else []
+    if origin is dict or type_hint is dict:
+        return {}
+    if type_hint is datetime.datetime:
+        return (BASE_TIME + datetime.timedelta(seconds=rnd.randint(0, 10 ** 8))).strftime('%Y-%m-%dT%H:%M:%SZ')
+    if type_hint is bool:
+        return rnd.random() < 0.5
+    if type_hint is int:
+        return rnd.randint(1, objects_count)
+    if type_hint is float:
+        return round(rnd.random() * 100, 2)
+    if type_hint is str:
+        return ''.join(rnd.choices(string.ascii_lowercase, k=12))
+    return None
+
+
+def generate_object(obj_type: Type, obj_id: int, rnd: random.Random, objects_count: int) -> Dict[str, Any]:
+    type_hints = get_type_hints(obj_type)
+    obj = {obj_field.name: _generate_value(type_hints[obj_field.name], rnd, objects_count)
+           for obj_field in fields(obj_type) if obj_field.init}
+    if 'id' in obj:
+        obj['id'] = obj_id
+    return obj
+
+
+def _get_objects_field(obj_response_type: Type[ObjectResponse]) -> Tuple[str, Type]:
+    """ Returns name of response field with list of objects and type of objects. """
+
+    type_hints = get_type_hints(obj_response_type)
+    name = next(obj_field.name for obj_field in fields(obj_response_type) if obj_field.name != 'meta')
+    return name, get_args(type_hints[name])[0]
+
+
+class FakePlatformHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format: str, *args: Any):  # noqa: A002
+        pass
+
+    def _send_json(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):  # noqa: N802
+        url = urlparse(self.path)
+        if url.path == '/stats':
+            self._send_json(200, self.server.get_statistics())
+            return
+
+        if self.server.count_request():
+            self._send_json(429, {}, {'Retry-After': str(self.server.config.retry_after)})
+            return
+        time.sleep(self.server.config.latency)
+
+        parts = url.path.strip('/').split('/')
+        obj_id = int(parts[2]) if len(parts) == 3 and parts[2].isdigit() else None
+        obj_class = parts[1][:-1] if len(parts) >= 2 and parts[0] == 'api' else None
+        if obj_class not in self.server.objects_fields:
+            self._send_json(404, {})
+            return
+
+        query = parse_qs(url.query)
+        ids_param = IDS_PARAMS[self.server.config.platform]
+        page = int(query.get('page', ['1'])[0])
+        page_size = min(int(query.get('page_size', [str(self.server.config.max_page_size)])[0]),
+                        self.server.config.max_page_size)
+        if obj_id is not None:
+            ids = [obj_id]
+        elif ids_param in query:
+            ids = [int(i) for value in query[ids_param] for i in value.split(',')]
+        else:
+            ids = self.server.get_page_ids(obj_class, page, page_size)
+        ids = [i for i in ids if 1 <= i <= self.server.config.objects_count]
+
+        has_next = obj_id is None and ids_param not in query and page * page_size < self.server.config.objects_count
+        field_name = self.server.objects_fields[obj_class][0]
+        self._send_json(200, {
+            'meta': {'page': page, 'has_next': has_next, 'has_previous': page > 1},
+            field_name: [self.server.get_object(obj_class, i) for i in ids],
+        })
+
+    def do_POST(self):  # noqa: N802
+        """ Token endpoint, so clients can refresh tokens. """
+
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self._send_json(200, {'access_token': 'fake', 'expires_in': 36000, 'refresh_token': 'fake'})
+
+
+class FakePlatformServer(ThreadingHTTPServer):
+    """ Server which serves paginated `/api/<class>s` endpoints of the platform with synthetic objects
+    with configurable latency, page size and part of throttled requests. """
+
+    daemon_threads = True
+
+    def __init__(self, config: FakePlatformConfig, port: int = 0):
+        super().__init__(('127.0.0.1', port), FakePlatformHandler)
+        self.config = config
+        self.objects_fields = {obj_class: _get_objects_field(obj_response_type)
+                               for obj_class, obj_response_type in response_types[config.platform].items()}
+
+        rnd = random.Random(config.seed)
+        self.templates: Dict[str, List[Dict[str, Any]]] = {
+            obj_class: [generate_object(obj_type, i, rnd, config.objects_count) for i in range(TEMPLATES_COUNT)]
+            for obj_class, (_, obj_type) in self.objects_fields.items()
+        }
+
+        self._random = random.Random(config.seed)
+        self._statistics = {'requests': 0, 'throttled': 0}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def get_page_ids(self, obj_class: str, page: int, page_size: int) -> List[int]:
+        start = (page - 1) * page_size
+        ids = range(start + 1, min(start + page_size, self.config.objects_count) + 1)
+        if obj_class in DESCENDING_CLASSES and self.config.newest_first:
+            return [self.config.objects_count + 1 - i for i in ids]
+        return list(ids)
+
+    def get_object(self, obj_class: str, obj_id: int) -> Dict[str, Any]:
+        return dict(self.templates[obj_class][obj_id % TEMPLATES_COUNT], id=obj_id)
+
+    def count_request(self) -> bool:
+        """ Counts request, returns True if it should be throttled. """
+
+        with self._lock:
+            self._statistics['requests'] += 1
+            is_throttled = self._random.random() < self.config.throttle_rate
+            if is_throttled:
+                self._statistics['throttled'] += 1
+            return is_throttled
+
+    def get_statistics(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._statistics)
+
+
+def configure_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('platform', type=str, help='platform to imitate', choices=Platform.values())
+    parser.add_argument('--port', '-p', type=int, default=8080, help='port to run server at')
+    add_config_arguments(parser)
+    return parser
+
+
+def add_config_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--objects_count', type=int, default=DEFAULT_OBJECTS_COUNT,
+                        help='count of objects of each class')
+    parser.add_argument('--max_page_size', type=int, default=DEFAULT_MAX_PAGE_SIZE,
+                        help='max count of objects in one page')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds to wait before every response')
+    parser.add_argument('--throttle_rate', type=float, default=0.0,
+                        help='part of requests which are answered with `429 Too Many Requests`')
+    parser.add_argument('--retry_after', type=int, default=0,
+                        help='seconds in `Retry-After` header of throttled responses')
+    parser.add_argument('--seed', type=int, default=0, help='seed of synthetic objects and throttled requests')
+    parser.add_argument('--oldest_first', action='store_true',
+                        help='return submissions from the oldest to the newest')
+
+
+def get_config(args: argparse.Namespace) -> FakePlatformConfig:
+    return FakePlatformConfig(Platform(args.platform), args.objects_count, args.max_page_size, args.latency,
+                              args.throttle_rate, args.retry_after, args.seed, not args.oldest_first)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = configure_parser()
+    args = parser.parse_args(sys.argv[1:])
+
+    server = FakePlatformServer(get_config(args), args.port)
+    logging.info(f'Serving fake {args.platform} platform at {server.url}')
+    server.serve_forever()
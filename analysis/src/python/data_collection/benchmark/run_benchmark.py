@@ -0,0 +1,152 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from analysis.src.python.data_collection.api.crawl_graph import CrawlGraph
+from analysis.src.python.data_collection.api.platform_client import DEFAULT_POOL_SIZE, DEFAULT_WORKERS, PlatformClient
+from analysis.src.python.data_collection.api.platform_objects import Object, Platform
+from analysis.src.python.data_collection.benchmark.fake_platform import (
+    add_config_arguments, FakePlatformConfig, FakePlatformServer, get_config,
+)
+from analysis.src.python.data_collection.hyperskill.hyperskill_client import HyperskillClient
+from analysis.src.python.data_collection.stepik.stepik_client import StepikClient
+from analysis.src.python.data_collection.utils.object_writers import ObjectWritersByClass, OutputFormat
+
+"""
+This file contains benchmark of data collection, which crawls local fake platform and reports throughput,
+count of requests and peak memory, so changes of PlatformClient can be compared offline.
+"""
+
+
+@dataclass
+class BenchmarkResult:
+    objects: int
+    seconds: float
+    objects_per_second: float
+    requests: int
+    throttled_requests: int
+    peak_memory_mb: float
+
+
+class HyperskillBenchmarkClient(HyperskillClient):
+    def _get_authentication_code_token(self):
+        return None
+
+
+class StepikBenchmarkClient(StepikClient):
+    def _get_authentication_code_token(self):
+        return None
+
+
+benchmark_client = {
+    Platform.HYPERSKILL: HyperskillBenchmarkClient,
+    Platform.STEPIK: StepikBenchmarkClient,
+}
+
+
+def configure_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('platform', type=str, help='platform to imitate', choices=Platform.values())
+    parser.add_argument('object', type=str, help='objects to crawl')
+    parser.add_argument('--ids_count', type=int, default=None,
+                        help='request objects by ids from 1 to `ids_count` instead of all objects by pages')
+    parser.add_argument('--count', '-cnt', type=int, default=None, help='count of requested objects')
+    parser.add_argument('--crawl', action='store_true', help='also collect referenced objects')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='count of requests to platform to execute concurrently')
+    parser.add_argument('--pool_size', type=int, default=DEFAULT_POOL_SIZE,
+                        help='count of connections to platform to keep alive')
+    parser.add_argument('--rate_limit', type=float, default=None,
+                        help='max count of requests to platform per second')
+    parser.add_argument('--output_format', type=str, default=OutputFormat.CSV.value, choices=OutputFormat.values(),
+                        help='format of files with collected objects')
+    parser.add_argument('--output', '-out', type=str, default=None,
+                        help='path to directory where to save collected objects, temporary directory by default')
+    parser.add_argument('--report', type=str, default=None, help='json file where to save benchmark result')
+    add_config_arguments(parser)
+    return parser
+
+
+def _serve(config: FakePlatformConfig, urls: multiprocessing.Queue):
+    server = FakePlatformServer(config)
+    urls.put(server.url)
+    server.serve_forever()
+
+
+def start_fake_platform(config: FakePlatformConfig) -> Tuple[multiprocessing.Process, str]:
+    """ Starts fake platform in a separate process, so it does not share CPU time of the client process. """
+
+    urls = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(config, urls), daemon=True)
+    process.start()
+    return process, urls.get()
+
+
+def run_benchmark(client: PlatformClient, url: str, obj_class: str, output_path: str,
+                  output_format: OutputFormat = OutputFormat.CSV,
+                  ids: Optional[List[int]] = None,
+                  count: Optional[int] = None,
+                  crawl: bool = False) -> BenchmarkResult:
+    counts: Dict[str, int] = {}
+
+    start_statistics = requests.get(f'{url}/stats').json()
+    start = time.perf_counter()
+    with ObjectWritersByClass(output_path, output_format) as writers:
+        def write_objects(objects_class: str, objects: List[Object]):
+            counts[objects_class] = counts.get(objects_class, 0) + len(objects)
+            writers.write(objects_class, objects)
+
+        if crawl:
+            CrawlGraph(client, write_objects).run(lambda: client.get_objects(obj_class, ids, count))
+        else:
+            client.sink = write_objects
+            client.get_objects(obj_class, ids, count)
+    seconds = time.perf_counter() - start
+    statistics = requests.get(f'{url}/stats').json()
+
+    objects = sum(counts.values())
+    return BenchmarkResult(
+        objects=objects,
+        seconds=round(seconds, 3),
+        objects_per_second=round(objects / seconds, 1),
+        requests=statistics['requests'] - start_statistics['requests'],
+        throttled_requests=statistics['throttled'] - start_statistics['throttled'],
+        # Max resident set size of the client process is reported in kilobytes on Linux
+        peak_memory_mb=round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    )
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+    parser = configure_parser()
+    args = parser.parse_args(sys.argv[1:])
+
+    platform = Platform(args.platform)
+    server_process, url = start_fake_platform(get_config(args))
+    try:
+        client = benchmark_client[platform](pool_size=args.pool_size, workers=args.workers,
+                                            rate_limit=args.rate_limit)
+        client.host = url
+
+        ids = list(range(1, args.ids_count + 1)) if args.ids_count is not None else None
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            result = run_benchmark(client, url, args.object, args.output or tmp_dir, OutputFormat(args.output_format),
+                                   ids, args.count, args.crawl)
+    finally:
+        server_process.terminate()
+
+    for name, value in asdict(result).items():
+        print(f'{name}: {value}')
+    if args.report is not None:
+        with open(args.report, 'w') as f:
+            json.dump(asdict(result), f, indent=2)
@@ -1,8 +1,14 @@
 import os
-from typing import Callable, Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
-from analysis.src.python.data_collection.api.platform_client import PlatformClient
-from analysis.src.python.data_collection.api.platform_objects import BaseRequestParams, Object
+from analysis.src.python.data_collection.api.platform_client import (
+    DEFAULT_CONNECT_TIMEOUT, DEFAULT_POOL_SIZE, DEFAULT_READ_TIMEOUT, DEFAULT_WORKERS, PageQuery, PlatformClient,
+)
+from analysis.src.python.data_collection.api.platform_objects import BaseRequestParams, ForeignKey, Object
+from analysis.src.python.data_collection.api.response_archive import ResponseArchive
+from analysis.src.python.data_collection.api.response_cache import ResponseCache
+from analysis.src.python.data_collection.api.sync_state import SyncState
+from analysis.src.python.data_collection.api.token_cache import TokenCache
 from analysis.src.python.data_collection.hyperskill.api.projects import Project, ProjectsResponse
 from analysis.src.python.data_collection.hyperskill.api.search_results import \
     SearchResult, SearchResultsRequestParams, SearchResultsResponse
@@ -22,10 +28,24 @@ class HyperskillClient(PlatformClient):
     for data exchange.
     """
 
-    def __init__(self, port: int = 8000):
+    foreign_keys = {
+        ObjectClass.SUBMISSION: [ForeignKey('step', ObjectClass.STEP), ForeignKey('user_id', ObjectClass.USER)],
+        ObjectClass.STEP: [ForeignKey('topic', ObjectClass.TOPIC)],
+        ObjectClass.TRACK: [ForeignKey('projects', ObjectClass.PROJECT)],
+    }
+
+    def __init__(self, port: int = 8000,
+                 timeout: Tuple[float, float] = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT),
+                 pool_size: int = DEFAULT_POOL_SIZE,
+                 workers: int = DEFAULT_WORKERS,
+                 rate_limit: Optional[float] = None,
+                 cache: Optional[ResponseCache] = None,
+                 token_cache: Optional[TokenCache] = None,
+                 archive: Optional[ResponseArchive] = None):
         client_id = os.environ.get(HyperskillPlatform.CLIENT_ID)
         client_secret = os.environ.get(HyperskillPlatform.CLIENT_SECRET)
-        super().__init__(HyperskillPlatform.BASE_URL, client_id, client_secret, port)
+        super().__init__(HyperskillPlatform.BASE_URL, client_id, client_secret, port, timeout, pool_size,
+                         workers, rate_limit, cache, token_cache, archive)
 
         self._get_objects_by_class: Dict[
             ObjectClass, Callable[[Optional[List[int]], Optional[int]], List[Object]]] = {
@@ -55,14 +75,8 @@ class HyperskillClient(PlatformClient):
          return all steps. """
         if topic_ids is None:
             return self._get_objects(ObjectClass.STEP, StepsResponse, StepsRequestParams(ids=ids), count=count)
-        else:
-            steps = []
-            for topic_id in topic_ids:
-                steps += self._get_objects(ObjectClass.STEP, StepsResponse,
-                                           StepsRequestParams(topic=topic_id), count=count)
-                if count is not None and len(steps) >= count:
-                    return steps[:count]
-        return steps
+        return self._get_objects_by_params(ObjectClass.STEP, StepsResponse,
+                                           [StepsRequestParams(topic=topic_id) for topic_id in topic_ids], count=count)
 
     def get_topics(self, ids: Optional[List[int]] = None, count: Optional[int] = None) -> List[Topic]:
         """ Returns topics data. """
@@ -87,17 +101,45 @@ class HyperskillClient(PlatformClient):
     def get_submissions(self, ids: Optional[List[int]] = None,
                         count: Optional[int] = None,
                         step_ids: Optional[List[int]] = None,
-                        user_ids: Optional[List[int]] = None) -> List[Submission]:
+                        user_ids: Optional[List[int]] = None,
+                        sync_state: Optional[SyncState] = None) -> List[Submission]:
         """ Returns submissions data. Only for steps, which have been passed by application owner and only submissions
-        which were shared by user. """
+        which were shared by user. If `sync_state` is defined, returns only submissions which are newer than its
+        watermarks. """
+        if sync_state is not None and ids is None:
+            return self._get_new_submissions(sync_state, step_ids, user_ids)
+
         if user_ids is None:
             return self._get_objects(ObjectClass.SUBMISSION, SubmissionResponse,
                                      SubmissionRequestParams(ids=ids, step=step_ids), count=count)
 
-        submissions = []
-        for user_id in user_ids:
-            submissions += self._get_objects(ObjectClass.SUBMISSION, SubmissionResponse,
-                                             SubmissionRequestParams(ids=ids, step=step_ids, user=user_id), count=count)
-            if count is not None and len(submissions) >= count:
-                return submissions[:count]
-        return submissions
+        return self._get_objects_by_params(ObjectClass.SUBMISSION, SubmissionResponse,
+                                           [SubmissionRequestParams(ids=ids, step=step_ids, user=user_id)
+                                            for user_id in user_ids],
+                                           count=count)
+
+    def _get_new_submissions(self, sync_state: SyncState,
+                             step_ids: Optional[List[int]] = None,
+                             user_ids: Optional[List[int]] = None) -> List[Submission]:
+        """ Returns submissions which are newer than watermarks of `sync_state` and updates the watermarks.
+        Watermarks are kept for every user from `user_ids` or for all submissions of `step_ids`. """
+        step_scope = 'step={steps}'.format(steps=','.join(map(str, step_ids))) if step_ids else 'all'
+        if user_ids is None:
+            params_by_scope = {step_scope: SubmissionRequestParams(step=step_ids)}
+        else:
+            params_by_scope = {f'{step_scope}/user={user_id}': SubmissionRequestParams(step=step_ids, user=user_id)
+                               for user_id in user_ids}
+
+        queries = [PageQuery(params, is_new=sync_state.get_is_new(scope)) for scope, params in params_by_scope.items()]
+        submissions = self._get_objects_by_queries(ObjectClass.SUBMISSION, SubmissionResponse, queries, to_sink=False)
+
+        if user_ids is None:
+            sync_state.update(step_scope, submissions)
+        else:
+            for user_id in user_ids:
+                sync_state.update(f'{step_scope}/user={user_id}',
+                                  [submission for submission in submissions if submission.user_id == user_id])
+
+        new_submissions = []
+        self._handle_objects(ObjectClass.SUBMISSION, submissions, new_submissions)
+        return new_submissions
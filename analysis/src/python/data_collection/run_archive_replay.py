@@ -0,0 +1,83 @@
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, List
+
+from analysis.src.python.data_collection.api.decoders import get_decoder
+from analysis.src.python.data_collection.api.response_archive import get_response_type, get_segments, read_segment
+from analysis.src.python.data_collection.utils.object_writers import (
+    merge_object_files, ObjectWritersByClass, OutputFormat,
+)
+
+
+def configure_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('archive_dir', type=str, help='directory with archived platform responses')
+    parser.add_argument('--output', '-out', type=str, default='results',
+                        help='path to directory where to save the results')
+    parser.add_argument('--output_format', type=str, default=OutputFormat.CSV.value, choices=OutputFormat.values(),
+                        help='format of files with the results (parquet requires pyarrow)')
+    parser.add_argument('--jobs', type=int, default=1, help='count of archive segments to replay in parallel')
+    return parser
+
+
+def replay_segment(segment_path: str, output_path: str, output_format: OutputFormat) -> Dict[str, str]:
+    """ Builds objects from responses of archive segment and writes them to `output_path`.
+    Returns written files by object classes. """
+
+    with ObjectWritersByClass(output_path, output_format) as writers:
+        for record in read_segment(segment_path):
+            response_type = get_response_type(record['response_type'])
+            response = get_decoder(response_type)(record['json'])
+            writers.write(record['obj_class'], response.get_objects())
+
+    return {obj_class: writer.path for obj_class, writer in writers.writers.items() if writer.count > 0}
+
+
+def replay_archive(archive_dir: str, output_path: str, output_format: OutputFormat = OutputFormat.CSV,
+                   jobs: int = 1) -> Dict[str, str]:
+    """ Rebuilds files of all object classes from the archive without requests to the platform. Segments are
+    replayed to separate files in parallel, then files of each class are merged in order of segments.
+    Returns result files by object classes. """
+
+    segments = get_segments(archive_dir)
+    logging.info(f'Replaying {len(segments)} segments of archive {archive_dir}')
+
+    os.makedirs(output_path, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=output_path)
+    try:
+        part_dirs = [os.path.join(tmp_dir, str(i)) for i in range(len(segments))]
+        if jobs > 1:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                files_by_segment = list(executor.map(replay_segment, segments, part_dirs, repeat(output_format)))
+        else:
+            files_by_segment = list(map(replay_segment, segments, part_dirs, repeat(output_format)))
+
+        files_by_class: Dict[str, List[str]] = {}
+        for files in files_by_segment:
+            for obj_class, file in files.items():
+                files_by_class.setdefault(obj_class, []).append(file)
+
+        result_files = {}
+        for obj_class, files in files_by_class.items():
+            result_files[obj_class] = os.path.join(output_path, os.path.basename(files[0]))
+            merge_object_files(files, result_files[obj_class], output_format)
+            logging.info(f'Replayed {obj_class}s to {result_files[obj_class]}')
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    return result_files
+
+
+logging.basicConfig(level=logging.DEBUG)
+
+if __name__ == '__main__':
+    parser = configure_parser()
+    args = parser.parse_args(sys.argv[1:])
+    replay_archive(args.archive_dir, args.output, OutputFormat(args.output_format), args.jobs)
@@ -1,14 +1,27 @@
 import argparse
 import logging
 import sys
-from typing import List
+from functools import partial
+from typing import List, Tuple
 
 import pandas as pd
 
+from analysis.src.python.data_collection.api.crawl_graph import CrawlGraph, DEFAULT_CRAWL_BATCH_SIZE
+from analysis.src.python.data_collection.api.platform_client import (
+    DEFAULT_CONNECT_TIMEOUT, DEFAULT_POOL_SIZE, DEFAULT_READ_TIMEOUT, DEFAULT_WORKERS,
+)
 from analysis.src.python.data_collection.api.platform_objects import Platform
+from analysis.src.python.data_collection.api.response_archive import DEFAULT_SEGMENT_SIZE, ResponseArchive
+from analysis.src.python.data_collection.api.response_cache import DEFAULT_CACHE_TTL, ResponseCache
+from analysis.src.python.data_collection.api.sync_state import SyncState
+from analysis.src.python.data_collection.api.token_cache import DEFAULT_TOKEN_CACHE_PATH, TokenCache
 from analysis.src.python.data_collection.hyperskill.hyperskill_client import HyperskillClient
 from analysis.src.python.data_collection.stepik.stepik_client import StepikClient
-from analysis.src.python.data_collection.utils.csv_utils import save_objects_to_csv
+from analysis.src.python.data_collection.utils.object_writers import (
+    create_object_writer, ObjectWritersByClass, OutputFormat,
+)
+
+SYNC_OBJECT = 'submission'
 
 platform_client = {
     Platform.HYPERSKILL: HyperskillClient,
@@ -29,7 +42,42 @@ def configure_parser() -> argparse.ArgumentParser:
     parser.add_argument('--count', '-cnt', type=int, default=None, help='count of requested objects')
     parser.add_argument('--output', '-out', type=str, default='results',
                         help='path to directory where to save the results')
+    parser.add_argument('--output_format', type=str, default=OutputFormat.CSV.value, choices=OutputFormat.values(),
+                        help='format of file with the results (parquet requires pyarrow)')
     parser.add_argument('--port', '-p', type=int, default=8000, help='port to run authorization server at')
+    parser.add_argument('--token_cache', type=str, default=DEFAULT_TOKEN_CACHE_PATH,
+                        help='json file where to keep platform tokens between runs')
+    parser.add_argument('--no_token_cache', action='store_true',
+                        help='authorize in browser in every run without keeping tokens')
+    parser.add_argument('--connect_timeout', type=float, default=DEFAULT_CONNECT_TIMEOUT,
+                        help='seconds to wait for connection to platform')
+    parser.add_argument('--read_timeout', type=float, default=DEFAULT_READ_TIMEOUT,
+                        help='seconds to wait for platform response')
+    parser.add_argument('--pool_size', type=int, default=DEFAULT_POOL_SIZE,
+                        help='count of connections to platform to keep alive')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='count of requests to platform to execute concurrently')
+    parser.add_argument('--rate_limit', type=float, default=None,
+                        help='max count of requests to platform per second')
+    parser.add_argument('--cache_dir', type=str, default=None,
+                        help='path to directory where to cache platform responses')
+    parser.add_argument('--cache_ttl', type=float, default=DEFAULT_CACHE_TTL,
+                        help='seconds during which cached responses are used without revalidation')
+    parser.add_argument('--cache_ttl_by_class', nargs='*', type=str, default=[],
+                        help='seconds during which cached responses of objects are used without revalidation '
+                             'for specific objects in format `object=seconds`, e.x. `topic=86400`')
+    parser.add_argument('--archive_dir', type=str, default=None,
+                        help='path to directory where to archive raw platform responses for replay')
+    parser.add_argument('--archive_segment_size', type=int, default=DEFAULT_SEGMENT_SIZE,
+                        help='count of responses in one compressed archive segment')
+    parser.add_argument('--sync_state', type=str, default=None,
+                        help='json file with the latest collected submissions to request only newer submissions '
+                             'and append them to existing csv')
+    parser.add_argument('--crawl', action='store_true',
+                        help='also collect objects which are referenced by requested objects (e.x. steps and users '
+                             'of submissions) to their own files in one run')
+    parser.add_argument('--crawl_batch_size', type=int, default=DEFAULT_CRAWL_BATCH_SIZE,
+                        help='count of referenced ids which are requested together in crawl')
     return parser
 
 
@@ -38,7 +86,13 @@ def get_object_ids_from_file(csv_file_path: str, column_name: str) -> List[int]:
     Get ids from scv file column. Method is useful when extra information is required for some subset of objects,
     which are already used in existing dataset (e.x. dataset of solutions).
     """
-    return list(pd.read_csv(csv_file_path)[column_name].unique().values)
+    return pd.read_csv(csv_file_path)[column_name].dropna().unique().tolist()
+
+
+def get_ttl_by_class(value: str) -> Tuple[str, float]:
+    """ Parse TTL of object class in format `object=seconds`. """
+    obj_class, ttl = value.split('=')
+    return obj_class, float(ttl)
 
 
 logging.basicConfig(level=logging.DEBUG)
@@ -49,7 +103,15 @@ if __name__ == '__main__':
     args = parser.parse_args(sys.argv[1:])
 
     platform = Platform(args.platform)
-    client = platform_client[platform]()
+    cache = None
+    if args.cache_dir is not None:
+        ttl_by_class = dict(get_ttl_by_class(value) for value in args.cache_ttl_by_class)
+        cache = ResponseCache(args.cache_dir, args.cache_ttl, ttl_by_class)
+
+    token_cache = None if args.no_token_cache else TokenCache(args.token_cache)
+    archive = ResponseArchive(args.archive_dir, args.archive_segment_size) if args.archive_dir is not None else None
+    client = platform_client[platform](args.port, (args.connect_timeout, args.read_timeout), args.pool_size,
+                                       args.workers, args.rate_limit, cache, token_cache, archive)
 
     if args.ids is not None:
         ids = args.ids
@@ -58,5 +120,34 @@ if __name__ == '__main__':
     else:
         ids = None
 
-    objects = client.get_objects(args.object, ids, args.count)
-    save_objects_to_csv(args.output, objects, args.object)
+    if args.sync_state is not None:
+        if args.object != SYNC_OBJECT:
+            logging.error(f'Incremental sync is supported only for {SYNC_OBJECT} objects')
+            sys.exit(1)
+        if args.count is not None:
+            logging.warning('Count of requested objects is ignored in incremental sync')
+
+        sync_state = SyncState(args.sync_state)
+        collect_objects = partial(client.get_submissions, ids, sync_state=sync_state)
+    else:
+        sync_state = None
+        collect_objects = partial(client.get_objects, args.object, ids, args.count)
+
+    # Objects are written page by page as they are received, so they are not kept in memory
+    output_format = OutputFormat(args.output_format)
+    if args.crawl:
+        with ObjectWritersByClass(args.output, output_format, append=sync_state is not None) as writers:
+            CrawlGraph(client, writers.write, args.crawl_batch_size).run(collect_objects)
+    else:
+        with create_object_writer(args.output, args.object, output_format,
+                                  append=sync_state is not None) as writer:
+            client.sink = lambda _, objects: writer.write(objects)
+            collect_objects()
+
+    if archive is not None:
+        archive.close()
+    if cache is not None:
+        cache.log_statistics()
+
+    if sync_state is not None:
+        sync_state.save()
@@ -14,7 +14,7 @@ Steps are available by API requests, described at
 
 @dataclass
 class SubmissionRequestParams(BaseRequestParams):
-    pass
+    order: Optional[str] = None
 
 
 @dataclass(frozen=True)
@@ -1,26 +1,52 @@
 import os
-from typing import Callable, Dict, List, Optional, Type, TypeVar
+from typing import Callable, Dict, List, Optional, Tuple, Type, TypeVar
 
-from analysis.src.python.data_collection.api.platform_client import PlatformClient
-from analysis.src.python.data_collection.api.platform_objects import BaseRequestParams, Object, ObjectResponse
+from analysis.src.python.data_collection.api.platform_client import (
+    DEFAULT_CONNECT_TIMEOUT, DEFAULT_POOL_SIZE, DEFAULT_READ_TIMEOUT, DEFAULT_WORKERS, PageQuery, PlatformClient,
+)
+from analysis.src.python.data_collection.api.platform_objects import (
+    BaseRequestParams, ForeignKey, Object, ObjectResponse,
+)
+from analysis.src.python.data_collection.api.response_archive import ResponseArchive
+from analysis.src.python.data_collection.api.response_cache import ResponseCache
+from analysis.src.python.data_collection.api.sync_state import SyncState
+from analysis.src.python.data_collection.api.token_cache import TokenCache
 from analysis.src.python.data_collection.stepik.api.courses import Course, CoursesResponse
 from analysis.src.python.data_collection.stepik.api.lessons import Lesson, LessonsResponse
 from analysis.src.python.data_collection.stepik.api.search_results import SearchResult, SearchResultsRequestParams, \
     SearchResultsResponse
 from analysis.src.python.data_collection.stepik.api.steps import Step, StepsResponse
-from analysis.src.python.data_collection.stepik.api.submissions import Submission, SubmissionsResponse
+from analysis.src.python.data_collection.stepik.api.submissions import Submission, SubmissionRequestParams, \
+    SubmissionsResponse
 from analysis.src.python.data_collection.stepik.api.users import User, UsersResponse
 from analysis.src.python.data_collection.stepik.stepik_objects import ObjectClass, StepikPlatform
 
 T = TypeVar('T', bound=Object)
 
+SYNC_SCOPE = 'all'
+
 
 class StepikClient(PlatformClient):
 
-    def __init__(self, port: int = 8000):
+    foreign_keys = {
+        ObjectClass.STEP: [ForeignKey('lesson', ObjectClass.LESSON)],
+        ObjectClass.LESSON: [ForeignKey('courses', ObjectClass.COURSE)],
+    }
+    # Stepik API takes ids as `ids[]=1&ids[]=2`
+    repeated_list_params = True
+
+    def __init__(self, port: int = 8000,
+                 timeout: Tuple[float, float] = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT),
+                 pool_size: int = DEFAULT_POOL_SIZE,
+                 workers: int = DEFAULT_WORKERS,
+                 rate_limit: Optional[float] = None,
+                 cache: Optional[ResponseCache] = None,
+                 token_cache: Optional[TokenCache] = None,
+                 archive: Optional[ResponseArchive] = None):
         client_id = os.environ.get('STEPIK_CLIENT_ID')
         client_secret = os.environ.get('STEPIK_CLIENT_SECRET')
-        super().__init__(StepikPlatform.BASE_URL, client_id, client_secret, port)
+        super().__init__(StepikPlatform.BASE_URL, client_id, client_secret, port, timeout, pool_size,
+                         workers, rate_limit, cache, token_cache, archive)
 
         self._get_objects_by_class: Dict[
             ObjectClass, Callable[[Optional[List[int]], Optional[int]], List[Object]]] = {
@@ -53,7 +79,21 @@ class StepikClient(PlatformClient):
     def get_users(self, ids: Optional[List[int]] = None, count: Optional[int] = None) -> List[User]:
         return self._get_objects_default(ids, count, ObjectClass.USER, UsersResponse)
 
-    def get_submissions(self, ids: Optional[List[int]] = None, count: Optional[int] = None) -> List[Submission]:
+    def get_submissions(self, ids: Optional[List[int]] = None,
+                        count: Optional[int] = None,
+                        sync_state: Optional[SyncState] = None) -> List[Submission]:
+        """ Returns submissions data. If `sync_state` is defined, returns only submissions which are newer than
+        its watermark. """
+        if sync_state is not None and ids is None:
+            query = PageQuery(SubmissionRequestParams(order='desc'), is_new=sync_state.get_is_new(SYNC_SCOPE))
+            submissions = self._get_objects_by_queries(ObjectClass.SUBMISSION, SubmissionsResponse, [query],
+                                                       to_sink=False)
+            sync_state.update(SYNC_SCOPE, submissions)
+
+            new_submissions = []
+            self._handle_objects(ObjectClass.SUBMISSION, submissions, new_submissions)
+            return new_submissions
+
         return self._get_objects_default(ids, count, ObjectClass.SUBMISSION, SubmissionsResponse)
 
     def _get_objects_default(self,
@@ -1,40 +1,37 @@
 import csv
-import logging
 import os
-from dataclasses import asdict
-from typing import List, TypeVar
+from typing import Iterable, List
 
-from analysis.src.python.data_collection.api.platform_objects import Object
+WRITE_BUFFER_SIZE = 1024 ** 2
 
 
 class CsvWriter:
+    """ Writes rows to csv through one buffered file, which is opened on creation and should be closed
+    after writing (writer can be used as context manager). """
 
-    def __init__(self, result_dir: str, csv_file: str, field_names: List[str]):
+    def __init__(self, result_dir: str, csv_file: str, field_names: List[str], append: bool = False):
         os.makedirs(result_dir, exist_ok=True)
         self.csv_path = os.path.join(result_dir, csv_file)
         self.fieldnames = field_names
 
-        with open(self.csv_path, 'w+', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=field_names)
-            writer.writeheader()
+        write_header = not (append and os.path.exists(self.csv_path))
+        self._file = open(self.csv_path, 'w' if write_header else 'a', newline='', encoding='utf8',
+                          buffering=WRITE_BUFFER_SIZE)
+        self._writer = csv.DictWriter(self._file, fieldnames=field_names, extrasaction='ignore')
+        if write_header:
+            self._writer.writeheader()
 
     def write_csv(self, data: dict):
-        with open(self.csv_path, 'a+', newline='', encoding='utf8') as f:
-            writer = csv.DictWriter(f, fieldnames=self.fieldnames)
-            writer.writerow({k: data[k] for k in self.fieldnames})
+        self._writer.writerow(data)
 
+    def write_rows(self, rows: Iterable[dict]):
+        self._writer.writerows(rows)
 
-T = TypeVar('T', bound=Object)
+    def close(self):
+        self._file.close()
 
+    def __enter__(self) -> 'CsvWriter':
+        return self
 
-def save_objects_to_csv(output_path: str, objects: List[T], obj_class: str):
-    if len(objects) == 0:
-        return
-
-    if not os.path.exists(output_path):
-        os.makedirs(output_path)
-
-    logging.info(f'Writing {len(objects)} of type {type(objects[0])} to csv: {output_path}/{obj_class}s.csv')
-    csv_writer = CsvWriter(output_path, f'{obj_class}s.csv', list(type(objects[0]).__annotations__.keys()))
-    for obj in objects:
-        csv_writer.write_csv(asdict(obj))
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
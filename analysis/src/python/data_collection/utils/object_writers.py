@@ -0,0 +1,252 @@
+import datetime
+import json
+import logging
+import os
+import shutil
+from dataclasses import asdict, fields, is_dataclass
+from enum import Enum, unique
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar, Union, get_args, get_origin, get_type_hints
+
+from analysis.src.python.data_collection.api.platform_objects import Object
+from analysis.src.python.data_collection.utils.csv_utils import CsvWriter, WRITE_BUFFER_SIZE
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa, pq = None, None
+
+T = TypeVar('T', bound=Object)
+
+NONE_TYPE = type(None)
+
+
+@unique
+class OutputFormat(str, Enum):
+    CSV = 'csv'
+    JSONL = 'jsonl'
+    PARQUET = 'parquet'
+
+    @classmethod
+    def values(cls):
+        return list(map(lambda c: c.value, cls))
+
+
+@lru_cache(maxsize=None)
+def get_field_names(obj_type: Type[Object]) -> Tuple[str, ...]:
+    """ Returns field names of object dataclass. Names are computed once per dataclass. """
+    return tuple(obj_field.name for obj_field in fields(obj_type))
+
+
+def _to_plain_value(value: Any) -> Any:
+    if is_dataclass(value):
+        return asdict(value)
+    if isinstance(value, list) and value and is_dataclass(value[0]):
+        return [asdict(item) for item in value]
+    return value
+
+
+def object_to_dict(obj: Object) -> Dict[str, Any]:
+    """ Converts object to dict like `asdict`, but only nested dataclasses are copied. """
+    return {name: _to_plain_value(getattr(obj, name)) for name in get_field_names(type(obj))}
+
+
+class ObjectWriter:
+    """ Writes objects of one class to `{obj_class}s.{format}` file in `output_path` page by page, so collected
+    objects are not kept in memory. File is opened on the first page, so nothing is created if there are no objects.
+    Writer should be closed after writing (writer can be used as context manager). """
+
+    output_format: OutputFormat
+
+    def __init__(self, output_path: str, obj_class: str, append: bool = False):
+        self.output_path = output_path
+        self.path = os.path.join(output_path, f'{obj_class}s.{self.output_format.value}')
+        self.append = append
+        self.count = 0
+        self._obj_type: Optional[Type[Object]] = None
+
+    def write(self, objects: List[T]):
+        if not objects:
+            return
+
+        if self._obj_type is None:
+            self._obj_type = type(objects[0])
+            os.makedirs(self.output_path, exist_ok=True)
+            logging.info(f'Writing objects of type {self._obj_type} to {self.output_format.value}: {self.path}')
+            self._open()
+
+        self._write(objects)
+        self.count += len(objects)
+
+    def close(self):
+        if self._obj_type is not None:
+            self._close()
+            logging.info(f'Written {self.count} objects to {self.path}')
+
+    def _open(self):
+        raise NotImplementedError
+
+    def _write(self, objects: List[T]):
+        raise NotImplementedError
+
+    def _close(self):
+        raise NotImplementedError
+
+    def __enter__(self) -> 'ObjectWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class CsvObjectWriter(ObjectWriter):
+    """ Writes objects to csv. If `append` is True, objects are appended to existing csv. """
+
+    output_format = OutputFormat.CSV
+
+    def _open(self):
+        self._writer = CsvWriter(self.output_path, os.path.basename(self.path),
+                                 list(get_field_names(self._obj_type)), self.append)
+
+    def _write(self, objects: List[T]):
+        self._writer.write_rows(map(object_to_dict, objects))
+
+    def _close(self):
+        self._writer.close()
+
+
+class JsonlObjectWriter(ObjectWriter):
+    """ Writes objects to json lines, one object per line. If `append` is True, objects are appended
+    to existing file. """
+
+    output_format = OutputFormat.JSONL
+
+    def _open(self):
+        self._file = open(self.path, 'a' if self.append else 'w', encoding='utf8', buffering=WRITE_BUFFER_SIZE)
+
+    def _write(self, objects: List[T]):
+        self._file.writelines(f'{json.dumps(object_to_dict(obj), default=str)}\n' for obj in objects)
+
+    def _close(self):
+        self._file.close()
+
+
+class ParquetObjectWriter(ObjectWriter):
+    """ Writes objects to parquet, every page is written as a separate row group. Columns of numbers, strings,
+    booleans and datetimes keep their types, other values (nested objects and lists) are stored as json strings.
+    Requires pyarrow, appending to existing file is not supported. """
+
+    output_format = OutputFormat.PARQUET
+
+    def __init__(self, output_path: str, obj_class: str, append: bool = False):
+        if pa is None:
+            raise ImportError('Parquet output requires pyarrow, install it with `pip install pyarrow`')
+        super().__init__(output_path, obj_class, append)
+        if append and os.path.exists(self.path):
+            raise ValueError(f'Unable to append objects to existing parquet file {self.path}')
+
+    @staticmethod
+    def _get_arrow_type(type_hint: Any) -> Optional['pa.DataType']:
+        """ Returns arrow type for primitive type hint (which can be optional) or None for other type hints. """
+
+        if get_origin(type_hint) is Union:
+            args = [arg for arg in get_args(type_hint) if arg is not NONE_TYPE]
+            if len(args) != 1:
+                return None
+            type_hint = args[0]
+
+        return {
+            bool: pa.bool_(),
+            int: pa.int64(),
+            float: pa.float64(),
+            str: pa.string(),
+            datetime.datetime: pa.timestamp('us'),
+        }.get(type_hint)
+
+    def _open(self):
+        type_hints = get_type_hints(self._obj_type)
+        self._arrow_types = {name: self._get_arrow_type(type_hints[name]) for name in get_field_names(self._obj_type)}
+        self._schema = pa.schema([(name, arrow_type or pa.string()) for name, arrow_type in self._arrow_types.items()])
+        self._writer = pq.ParquetWriter(self.path, self._schema)
+
+    def _write(self, objects: List[T]):
+        columns = []
+        for name, arrow_type in self._arrow_types.items():
+            values = [getattr(obj, name) for obj in objects]
+            if arrow_type is None:
+                values = [None if value is None else json.dumps(_to_plain_value(value), default=str)
+                          for value in values]
+            columns.append(pa.array(values, type=arrow_type or pa.string()))
+        self._writer.write_table(pa.Table.from_arrays(columns, schema=self._schema))
+
+    def _close(self):
+        self._writer.close()
+
+
+object_writer_by_format = {
+    OutputFormat.CSV: CsvObjectWriter,
+    OutputFormat.JSONL: JsonlObjectWriter,
+    OutputFormat.PARQUET: ParquetObjectWriter,
+}
+
+
+def create_object_writer(output_path: str, obj_class: str, output_format: OutputFormat = OutputFormat.CSV,
+                         append: bool = False) -> ObjectWriter:
+    return object_writer_by_format[output_format](output_path, obj_class, append)
+
+
+class ObjectWritersByClass:
+    """ Writes objects of several classes, objects of each class are written to their own file. """
+
+    def __init__(self, output_path: str, output_format: OutputFormat = OutputFormat.CSV, append: bool = False):
+        self.output_path = output_path
+        self.output_format = output_format
+        self.append = append
+        self.writers: Dict[str, ObjectWriter] = {}
+
+    def write(self, obj_class: str, objects: List[T]):
+        if obj_class not in self.writers:
+            self.writers[obj_class] = create_object_writer(self.output_path, obj_class, self.output_format, self.append)
+        self.writers[obj_class].write(objects)
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+
+    def __enter__(self) -> 'ObjectWritersByClass':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def merge_object_files(files: List[str], output_file: str, output_format: OutputFormat = OutputFormat.CSV):
+    """ Merges files with objects of one class, which are written by writers of `output_format`, in given order. """
+
+    if output_format == OutputFormat.PARQUET:
+        if pq is None:
+            raise ImportError('Parquet output requires pyarrow, install it with `pip install pyarrow`')
+        writer = None
+        for file in files:
+            table = pq.read_table(file)
+            writer = writer or pq.ParquetWriter(output_file, table.schema)
+            writer.write_table(table)
+        if writer is not None:
+            writer.close()
+        return
+
+    with open(output_file, 'wb') as output:
+        for i, file in enumerate(files):
+            with open(file, 'rb') as f:
+                # Header of csv is written only once
+                if output_format == OutputFormat.CSV and i > 0:
+                    f.readline()
+                shutil.copyfileobj(f, output, WRITE_BUFFER_SIZE)
+
+
+def save_objects_to_csv(output_path: str, objects: List[T], obj_class: str, append: bool = False):
+    """ Saves objects to csv. If `append` is True, objects are appended to existing csv. """
+
+    with CsvObjectWriter(output_path, obj_class, append) as writer:
+        writer.write(objects)
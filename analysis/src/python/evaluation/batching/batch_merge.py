@@ -0,0 +1,119 @@
+import logging
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Union
+
+import pandas as pd
+
+from analysis.src.python.evaluation.common.file_util import AnalysisExtension
+from analysis.src.python.evaluation.common.pandas_util import read_df_from_file, write_df_to_file
+
+logger = logging.getLogger(__name__)
+
+# Files of these formats are merged by concatenation of their lines
+LINE_BASED_EXTENSIONS = {AnalysisExtension.TXT}
+# Files of these formats cannot be concatenated at the byte level, so they are merged with pandas
+DF_EXTENSIONS = {AnalysisExtension.XLSX}
+
+MERGEABLE_EXTENSIONS = {AnalysisExtension.CSV, *LINE_BASED_EXTENSIONS, *DF_EXTENSIONS}
+
+COPY_BUFFER_SIZE = 16 * 1024 ** 2
+
+
+def _read_header(path: Union[str, Path]) -> bytes:
+    with open(path, 'rb') as f:
+        return f.readline()
+
+
+def _append_file(output_file: BinaryIO, path: Union[str, Path], offset: int = 0) -> None:
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        shutil.copyfileobj(f, output_file, COPY_BUFFER_SIZE)
+
+
+def _ensure_line_break(output_file: BinaryIO) -> None:
+    """
+    If the output does not end with a line break, add it, so the next file starts from a new line.
+    """
+
+    if output_file.tell() == 0:
+        return
+
+    output_file.seek(-1, 1)
+    last_byte = output_file.read(1)
+    if last_byte != b'\n':
+        output_file.write(b'\n')
+
+
+def merge_csv_files(files: List[Union[str, Path]], output_path: Union[str, Path]) -> bool:
+    """
+    Merge csv-files at the byte level: the first file is copied completely, the others are copied without headers.
+    The files are not merged if their headers do not match.
+    """
+
+    headers = [_read_header(file) for file in files]
+    mismatched_files = [str(file) for file, header in zip(files, headers) if header != headers[0]]
+    if mismatched_files:
+        logger.error(f'Headers of {mismatched_files} do not match the header of {files[0]}, they are not merged.')
+        return False
+
+    with open(output_path, 'wb+') as output_file:
+        for i, file in enumerate(files):
+            _ensure_line_break(output_file)
+            _append_file(output_file, file, offset=0 if i == 0 else len(headers[i]))
+
+    return True
+
+
+def merge_line_based_files(files: List[Union[str, Path]], output_path: Union[str, Path]) -> bool:
+    with open(output_path, 'wb+') as output_file:
+        for file in files:
+            _ensure_line_break(output_file)
+            _append_file(output_file, file)
+
+    return True
+
+
+def merge_df_files(files: List[Union[str, Path]], output_path: Union[str, Path]) -> bool:
+    """
+    Merge files that cannot be concatenated at the byte level (for example, xlsx-files) with pandas.
+    """
+
+    df = pd.concat([read_df_from_file(Path(file)) for file in files], ignore_index=True)
+    write_df_to_file(df, Path(output_path), AnalysisExtension.get_extension_from_file(output_path))
+    return True
+
+
+def merge_files(files: List[Union[str, Path]], output_path: Union[str, Path]) -> bool:
+    logger.info(f'Merging {len(files)} files to {output_path}.')
+
+    extension = AnalysisExtension.get_extension_from_file(output_path)
+    if extension == AnalysisExtension.CSV:
+        return merge_csv_files(files, output_path)
+    if extension in LINE_BASED_EXTENSIONS:
+        return merge_line_based_files(files, output_path)
+    if extension in DF_EXTENSIONS:
+        return merge_df_files(files, output_path)
+
+    logger.error(f'Files with the {extension.value} extension cannot be merged.')
+    return False
+
+
+def merge_files_by_name(
+        output_files_by_name: Dict[str, List[str]],
+        output_dir: Union[str, Path],
+        jobs: int = 1,
+) -> bool:
+    """
+    Merge each group of files to a file with the corresponding name in the output directory.
+    With `jobs` > 1, several groups are merged in parallel.
+
+    :return: True if all groups were merged.
+    """
+
+    def merge(name: str) -> bool:
+        return merge_files(output_files_by_name[name], Path(output_dir) / name)
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        return all(executor.map(merge, output_files_by_name.keys()))
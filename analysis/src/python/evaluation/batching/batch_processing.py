@@ -2,20 +2,31 @@ import argparse
 import logging
 import os
 import re
+import threading
 import time
 from collections import defaultdict
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Tuple
+from typing import Iterator, List, Tuple
 
 import pandas as pd
 
 from analysis.src.python.evaluation.batching.batch_config import BatchConfig
-from analysis.src.python.evaluation.common.csv_util import append_dataframe_to_csv, write_dataframe_to_csv
-from analysis.src.python.evaluation.common.file_util import AnalysisExtension, create_directory, get_name_from_path
-from analysis.src.python.evaluation.common.parallel_util import run_and_wait
+from analysis.src.python.evaluation.batching.batch_merge import merge_files_by_name, MERGEABLE_EXTENSIONS
+from analysis.src.python.evaluation.batching.batch_queue import (
+    BatchQueue, DEFAULT_LEASE_TIMEOUT, QUEUE_DIR_NAME, run_worker, wait_for_batches,
+)
+from analysis.src.python.evaluation.batching.batch_scheduler import Batch, BatchState, run_batches, STATE_FILE_NAME
+from analysis.src.python.evaluation.common.csv_util import get_csv_record_ranges, write_dataframe_to_csv
+from analysis.src.python.evaluation.common.file_util import create_directory, get_name_from_path
 
 logger = logging.getLogger(__name__)
 
+STATE_LOCK_FILE_NAME = 'state.lock'
+# The lock is held while the input is split, so it is considered stale only after a long time
+STATE_LOCK_TIMEOUT = 600.0
+POLL_INTERVAL = 1.0
+
 
 def configure_arguments(parser: argparse.ArgumentParser) -> None:
     parser.add_argument("input_path", help="Path to the csv file with data to process",
@@ -26,6 +37,18 @@ def configure_arguments(parser: argparse.ArgumentParser) -> None:
                         type=lambda value: Path(value).absolute())
     parser.add_argument("--batch-size", help="Batch size for data", nargs='?', default=1000, type=int)
     parser.add_argument("--start-from", help="Index of batch to start processing from", nargs='?', default=0, type=int)
+    parser.add_argument("--jobs", help="Number of batches to process in parallel", nargs='?', default=1, type=int)
+    parser.add_argument("--retries", help="Number of times to restart a failed batch", nargs='?', default=0, type=int)
+    parser.add_argument("--split-by-ranges", help="Pass ranges of byte offsets of the input file to batches instead "
+                                                  "of copying their data", action='store_true')
+    parser.add_argument("--merge-jobs", help="Number of output files to merge in parallel", nargs='?', default=1,
+                        type=int)
+    parser.add_argument("--worker", help="Run as a worker that claims batches from the queue in the output directory, "
+                                         "does not merge the results", action='store_true')
+    parser.add_argument("--coordinator", help="Wait until workers finish all batches and merge the results",
+                        action='store_true')
+    parser.add_argument("--lease-timeout", help="Seconds after which a batch claimed by a dead worker is reclaimed",
+                        nargs='?', default=DEFAULT_LEASE_TIMEOUT, type=float)
 
 
 def run_batching():
@@ -33,29 +56,118 @@ def run_batching():
     configure_arguments(parser)
 
     args = parser.parse_args()
-    batch_paths = split_to_batches(args.input_path, args.output_path, args.batch_size)
+
+    state = load_or_create_state(args.input_path, args.output_path, args.batch_size, args.split_by_ranges)
+
     config = BatchConfig.from_yaml(args.config_path)
 
-    for index, input_file_path, logs_path, output_path in batch_paths[args.start_from:]:
-        logs_file_path = os.path.join(logs_path, f"log{AnalysisExtension.TXT.value}")
+    def get_command(batch: Batch) -> List[str]:
+        # create run script with python3
+        command = ['python3', config.script_path, batch.input_file_path]
+        # add script args and flags
+        command += config.script_args + config.script_flags
+        # add script output flag
+        command += [f'-o={batch.output_path}']
+        # add the range of the input file that the batch consists of
+        if batch.input_range is not None:
+            start, end = batch.input_range
+            command += [f'--input-range={start}:{end}']
+        return command
+
+    if args.worker or args.coordinator:
+        queue = BatchQueue(os.path.join(args.output_path, QUEUE_DIR_NAME), state.batches, args.lease_timeout)
+        if args.worker:
+            run_worker(queue, get_command, config.project_path, args.retries, poll_interval=POLL_INTERVAL)
+            return
+        is_successful = wait_for_batches(queue, POLL_INTERVAL)
+    else:
+        is_successful = run_batches(
+            state, get_command, config.project_path, args.jobs, args.retries, args.start_from,
+        )
+
+    if not is_successful:
+        logging.error('Some batches failed, so the results are not merged. Restart to process unfinished batches.')
+        return
+
+    if not merge_batch_results(state.get_batch_paths(), args.output_path, args.merge_jobs):
+        logging.error('Some results were not merged.')
+
+
+def _is_stale_lock(lock_path: str, lock_timeout: float) -> bool:
+    try:
+        return time.time() - os.path.getmtime(lock_path) > lock_timeout
+    except FileNotFoundError:
+        return False
+
 
-        with open(logs_file_path, 'w+') as logs_file:
-            # create run script with python3
-            command = ['python3', config.script_path, input_file_path]
-            # add script args and flags
-            command += config.script_args + config.script_flags
-            # add script output flag
-            command += [f'-o={output_path}']
+def _renew_lock(lock_path: str, stop: threading.Event, renew_interval: float) -> None:
+    while not stop.wait(renew_interval):
+        try:
+            os.utime(lock_path)
+        except FileNotFoundError:
+            return
 
-            logging.info(f"Command to execute batch {index}: {command}")
 
-            logging.info(f'Start batch {index} processing')
-            start_time = time.time()
-            run_and_wait(command, stdout=logs_file, stderr=logs_file, cwd=config.project_path)
-            end_time = time.time()
-            logging.info(f'Finish batch {index} processing in {end_time - start_time}')
+@contextmanager
+def renewed_lock(lock_path: str, lock_timeout: float) -> Iterator[None]:
+    """
+    Renew the modification time of the held lock in the background, so other processes do not consider it stale
+    while the work takes longer than `lock_timeout` seconds. The lock is removed on exit.
+    """
 
-    merge_batch_results(batch_paths, args.output)
+    stop = threading.Event()
+    renewal = threading.Thread(target=_renew_lock, args=(lock_path, stop, lock_timeout / 3), daemon=True)
+    renewal.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        renewal.join()
+        os.remove(lock_path)
+
+
+def load_or_create_state(input_path: str, output_path: str, batch_size: int, split_by_ranges: bool,
+                         lock_timeout: float = STATE_LOCK_TIMEOUT) -> BatchState:
+    """
+    Load the state of the previous run or split the input to batches and save the new state.
+    If several processes start at the same time (for example, workers), only one of them splits the input,
+    the others wait for the state. The splitting process renews its lock, so if the lock is older than `lock_timeout`
+    seconds, the process is considered dead and the lock is removed.
+    """
+
+    state_path = os.path.join(output_path, STATE_FILE_NAME)
+    state = BatchState.load(state_path)
+    if state is not None:
+        logging.info(f'Found the state of the previous run: {state_path}. Unfinished batches will be processed.')
+        return state
+
+    create_directory(output_path)
+    lock_path = os.path.join(output_path, STATE_LOCK_FILE_NAME)
+    try:
+        lock_fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        logging.info('The input is being split to batches by another process, waiting for the state.')
+        while os.path.exists(lock_path):
+            if _is_stale_lock(lock_path, lock_timeout):
+                logging.warning(f'Removing stale lock of the state: {lock_path}')
+                try:
+                    os.remove(lock_path)
+                except FileNotFoundError:
+                    pass
+                break
+            time.sleep(POLL_INTERVAL)
+        # If the other process failed to split the input, this process tries to do it
+        return load_or_create_state(input_path, output_path, batch_size, split_by_ranges, lock_timeout)
+
+    os.close(lock_fd)
+    # Splitting of a large input can take longer than the lock timeout
+    with renewed_lock(lock_path, lock_timeout):
+        if split_by_ranges:
+            state = BatchState(state_path, split_to_batch_ranges(input_path, output_path, batch_size))
+        else:
+            state = BatchState.from_batch_paths(state_path, split_to_batches(input_path, output_path, batch_size))
+        state.save()
+    return state
 
 
 def create_sub_directory(base_path: str, directory_name: str) -> str:
@@ -90,22 +202,63 @@ def split_to_batches(dataset_path: str, output_dir_path: str, batch_size: int) -
     return batch_paths
 
 
-def merge_batch_results(batch_paths: List[Tuple[int, str, str, str]], output: str):
+def _link_dataset(dataset_path: str, input_path: str) -> str:
+    """
+    Hard link the dataset to the input directory, so batches do not depend on the original path.
+    If the link cannot be created (for example, on another file system), the original dataset is used.
+    """
+
+    dataset_link = os.path.join(input_path, get_name_from_path(dataset_path))
+    if os.path.exists(dataset_link):
+        os.remove(dataset_link)
+
+    try:
+        os.link(dataset_path, dataset_link)
+    except OSError:
+        logging.warning(f'Cannot create a hard link to the dataset, the original one is used: {dataset_path}')
+        return str(dataset_path)
+
+    return dataset_link
+
+
+def split_to_batch_ranges(dataset_path: str, output_dir_path: str, batch_size: int) -> List[Batch]:
+    """
+    Split the csv-file to batches by scanning it for record boundaries once, without parsing and copying the data.
+    Each batch gets the same input file and its own range of byte offsets.
+    """
+
+    input_path = create_sub_directory(output_dir_path, 'input')
+    logs_path = create_sub_directory(output_dir_path, 'logs')
+    output_path = create_sub_directory(output_dir_path, 'output')
+
+    dataset_link = _link_dataset(dataset_path, input_path)
+
+    batches = []
+    for index, input_range in enumerate(get_csv_record_ranges(dataset_link, batch_size)):
+        batch_name = f'batch_{index}'
+
+        logging.info(f"Creating batch {index}")
+        batch_logs_path = create_sub_directory(logs_path, batch_name)
+        batch_output_path = create_sub_directory(output_path, batch_name)
+
+        batches.append(Batch(index, dataset_link, batch_logs_path, batch_output_path, input_range=input_range))
+
+    return batches
+
+
+def merge_batch_results(batch_paths: List[Tuple[int, str, str, str]], output: str, jobs: int = 1) -> bool:
     output_files_by_name = defaultdict(list)
+    mergeable_suffixes = {extension.value for extension in MERGEABLE_EXTENSIONS}
 
     for _, _, _, output_path in batch_paths:
-        output_files = os.listdir(output_path)
+        output_files = sorted(os.listdir(output_path))
         for output_file in output_files:
-            if AnalysisExtension.get_extension_from_file(output_file) == AnalysisExtension.CSV:
+            # Output folders can contain files of unknown extensions, e.g. journals of the chunk mode
+            if os.path.splitext(output_file)[1] in mergeable_suffixes:
                 output_file_id = re.sub(r'\.*batch_[0-9]+\.*', '', get_name_from_path(output_file))
                 output_files_by_name[output_file_id].append(os.path.join(output_path, output_file))
-    for output_file_name, output_files in output_files_by_name.items():
-        for i, output_file in enumerate(output_files):
-            output_df = pd.read_csv(output_file)
-            if i == 0:
-                write_dataframe_to_csv(os.path.join(output, output_file_name), output_df)
-            else:
-                append_dataframe_to_csv(os.path.join(output, output_file_name), output_df)
+
+    return merge_files_by_name(output_files_by_name, output, jobs)
 
 
 if __name__ == "__main__":
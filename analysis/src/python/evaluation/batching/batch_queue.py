@@ -0,0 +1,277 @@
+import logging
+import os
+import socket
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Union
+
+from analysis.src.python.evaluation.batching.batch_scheduler import Batch, BatchStatus, start_batch
+
+logger = logging.getLogger(__name__)
+
+QUEUE_DIR_NAME = 'queue'
+
+LEASE_SUFFIX = '.lease'
+DONE_SUFFIX = '.done'
+FAILED_SUFFIX = '.failed'
+STALE_SUFFIX = '.stale'
+
+DEFAULT_LEASE_TIMEOUT = 60.0
+# The lease is missing for a moment while another worker checks whether it expired, so renewal is retried once
+RENEW_RETRY_DELAY = 0.1
+
+
+def get_worker_id() -> str:
+    return f'{socket.gethostname()}_{os.getpid()}'
+
+
+class BatchQueue:
+    """
+    Queue of batches that is shared by workers through files in the queue directory, so workers can run on
+    different machines with a shared file system.
+
+    A worker claims a batch by creating its lease file exclusively and renews the lease by updating its
+    modification time while the batch is running. A lease that was not renewed for `lease_timeout` seconds
+    belongs to a dead worker, so the batch can be claimed by another worker.
+    Finished batches are marked with done or failed files. Failed files are removed when a worker starts,
+    so failed batches are processed again after restart.
+    """
+
+    def __init__(self, path: Union[str, Path], batches: List[Batch], lease_timeout: float = DEFAULT_LEASE_TIMEOUT):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.batches = batches
+        self.lease_timeout = lease_timeout
+
+    def _get_path(self, batch: Batch, suffix: str) -> Path:
+        return self.path / f'batch_{batch.index}{suffix}'
+
+    def get_status(self, batch: Batch) -> BatchStatus:
+        if self._get_path(batch, DONE_SUFFIX).exists():
+            return BatchStatus.DONE
+        if self._get_path(batch, FAILED_SUFFIX).exists():
+            return BatchStatus.FAILED
+        if self._get_path(batch, LEASE_SUFFIX).exists():
+            return BatchStatus.RUNNING
+        return BatchStatus.PENDING
+
+    def get_batches_by_status(self, status: BatchStatus) -> List[Batch]:
+        return [batch for batch in self.batches if self.get_status(batch) == status]
+
+    def get_unfinished_batches(self) -> List[Batch]:
+        return [batch for batch in self.batches
+                if self.get_status(batch) in {BatchStatus.PENDING, BatchStatus.RUNNING}]
+
+    def _is_expired(self, lease_mtime: float) -> bool:
+        return time.time() - lease_mtime > self.lease_timeout
+
+    def _create_lease(self, batch: Batch, worker_id: str) -> bool:
+        try:
+            fd = os.open(self._get_path(batch, LEASE_SUFFIX), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+
+        with os.fdopen(fd, 'w') as f:
+            f.write(worker_id)
+        return True
+
+    def _remove_expired_lease(self, batch: Batch, worker_id: str) -> None:
+        lease_path = self._get_path(batch, LEASE_SUFFIX)
+        stale_path = lease_path.with_name(f'{lease_path.name}.{worker_id}{STALE_SUFFIX}')
+        try:
+            expired_stat = lease_path.stat()
+            if not self._is_expired(expired_stat.st_mtime):
+                return
+            # The owner could renew the lease after the check, then it must not be renamed
+            if lease_path.stat().st_mtime != expired_stat.st_mtime:
+                return
+            # Only one of the workers that found the expired lease can rename it
+            os.rename(lease_path, stale_path)
+        except FileNotFoundError:
+            return
+
+        stale_stat = stale_path.stat()
+        if (stale_stat.st_ino, stale_stat.st_mtime) != (expired_stat.st_ino, expired_stat.st_mtime):
+            # The lease was renewed or claimed again right before renaming, so it is returned to its owner
+            try:
+                os.link(stale_path, lease_path)
+            except FileExistsError:
+                logger.warning(f'The renewed lease of batch {batch.index} was claimed by another worker.')
+            os.remove(stale_path)
+            return
+
+        logger.warning(f'The lease of batch {batch.index} expired, the batch will be processed again.')
+        os.remove(stale_path)
+
+    def try_claim(self, batch: Batch, worker_id: str) -> bool:
+        if self.get_status(batch) not in {BatchStatus.PENDING, BatchStatus.RUNNING}:
+            return False
+
+        if not self._create_lease(batch, worker_id):
+            self._remove_expired_lease(batch, worker_id)
+            if not self._create_lease(batch, worker_id):
+                return False
+
+        # The batch could be finished by another worker before the lease was created
+        if self.get_status(batch) in {BatchStatus.DONE, BatchStatus.FAILED}:
+            self.release(batch)
+            return False
+
+        return True
+
+    def renew(self, batch: Batch, worker_id: str) -> bool:
+        """
+        Renew the lease of the batch.
+
+        :return: False if the lease no longer belongs to the worker.
+        """
+
+        lease_path = self._get_path(batch, LEASE_SUFFIX)
+        for attempt in range(2):
+            try:
+                if lease_path.read_text() != worker_id:
+                    return False
+                os.utime(lease_path)
+                return True
+            except FileNotFoundError:
+                if attempt == 0:
+                    time.sleep(RENEW_RETRY_DELAY)
+
+        return False
+
+    def release(self, batch: Batch) -> None:
+        try:
+            os.remove(self._get_path(batch, LEASE_SUFFIX))
+        except FileNotFoundError:
+            pass
+
+    def reset_failed(self) -> List[Batch]:
+        """
+        Remove the failed marks, so the failed batches can be claimed again.
+
+        :return: batches that were failed.
+        """
+
+        failed_batches = []
+        for batch in self.batches:
+            try:
+                os.remove(self._get_path(batch, FAILED_SUFFIX))
+            except FileNotFoundError:
+                continue
+            failed_batches.append(batch)
+        return failed_batches
+
+    def finish(self, batch: Batch, status: BatchStatus, worker_id: str) -> None:
+        suffix = DONE_SUFFIX if status == BatchStatus.DONE else FAILED_SUFFIX
+        self._get_path(batch, suffix).write_text(worker_id)
+        self.release(batch)
+
+
+def _run_leased_batch(
+        queue: BatchQueue,
+        batch: Batch,
+        command: List[str],
+        cwd: Optional[str],
+        worker_id: str,
+        poll_interval: float,
+) -> Optional[int]:
+    """
+    Run the batch and renew its lease until the batch is finished.
+
+    :return: return code of the batch or None if the lease was lost.
+    """
+
+    process, logs_file, start_time = start_batch(batch, command, cwd)
+    renew_interval = queue.lease_timeout / 3
+    renew_time = time.time()
+    try:
+        while process.poll() is None:
+            time.sleep(poll_interval)
+            if time.time() - renew_time < renew_interval:
+                continue
+
+            if not queue.renew(batch, worker_id):
+                logger.error(f'The lease of batch {batch.index} was lost, the batch is stopped.')
+                process.kill()
+                process.wait()
+                return None
+            renew_time = time.time()
+    finally:
+        logs_file.close()
+
+    logger.info(f'Finish batch {batch.index} processing in {time.time() - start_time} with code {process.returncode}')
+    return process.returncode
+
+
+def run_worker(
+        queue: BatchQueue,
+        get_command: Callable[[Batch], List[str]],
+        cwd: Optional[str] = None,
+        retries: int = 0,
+        worker_id: Optional[str] = None,
+        poll_interval: float = 1.0,
+) -> int:
+    """
+    Claim and run batches from the queue one by one until all batches are finished. While the batches that are
+    claimed by other workers are running, the worker waits to reclaim them if their workers die.
+    A failed batch is restarted up to `retries` times, then it is marked as failed.
+    Batches that failed in the previous run are processed again, as `run_batches` does.
+
+    :return: number of batches processed by this worker.
+    """
+
+    if worker_id is None:
+        worker_id = get_worker_id()
+    logger.info(f'Worker {worker_id} started.')
+
+    failed_batches = queue.reset_failed()
+    if failed_batches:
+        logger.info(f'Failed batches will be processed again: {[batch.index for batch in failed_batches]}.')
+
+    processed = 0
+    while True:
+        unfinished_batches = queue.get_unfinished_batches()
+        if not unfinished_batches:
+            break
+
+        batch = next((batch for batch in unfinished_batches if queue.try_claim(batch, worker_id)), None)
+        if batch is None:
+            time.sleep(poll_interval)
+            continue
+
+        batch.attempts = 0
+        return_code = None
+        while batch.attempts <= retries:
+            return_code = _run_leased_batch(queue, batch, get_command(batch), cwd, worker_id, poll_interval)
+            if return_code is None or return_code == 0:
+                break
+            logger.warning(f'Batch {batch.index} failed with code {return_code} (attempt {batch.attempts}).')
+
+        if return_code is None:
+            continue
+
+        status = BatchStatus.DONE if return_code == 0 else BatchStatus.FAILED
+        if status == BatchStatus.FAILED:
+            logger.error(f'Batch {batch.index} failed after {batch.attempts} attempts.')
+        queue.finish(batch, status, worker_id)
+        processed += 1
+
+    logger.info(f'Worker {worker_id} finished, {processed} batches were processed.')
+    return processed
+
+
+def wait_for_batches(queue: BatchQueue, poll_interval: float = 1.0) -> bool:
+    """
+    Wait until all batches of the queue are finished.
+
+    :return: True if all batches are done.
+    """
+
+    while queue.get_unfinished_batches():
+        time.sleep(poll_interval)
+
+    failed_batches = queue.get_batches_by_status(BatchStatus.FAILED)
+    if failed_batches:
+        logger.error(f'Failed batches: {[batch.index for batch in failed_batches]}.')
+
+    return not failed_batches
@@ -0,0 +1,173 @@
+import json
+import logging
+import os
+import subprocess
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from enum import Enum, unique
+from pathlib import Path
+from typing import Callable, Deque, Dict, IO, List, Optional, Tuple, Union
+
+from analysis.src.python.evaluation.common.file_util import AnalysisExtension
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE_NAME = f'state{AnalysisExtension.JSON.value}'
+LOG_FILE_NAME = f'log{AnalysisExtension.TXT.value}'
+
+BATCHES = 'batches'
+STATUS = 'status'
+INPUT_RANGE = 'input_range'
+
+
+@unique
+class BatchStatus(Enum):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+
+@dataclass
+class Batch:
+    index: int
+    input_file_path: str
+    logs_path: str
+    output_path: str
+    status: BatchStatus = BatchStatus.PENDING
+    attempts: int = 0
+    # Range of byte offsets of the input file, if the batch is a slice of the input file instead of a copy
+    input_range: Optional[Tuple[int, int]] = None
+
+    def to_paths(self) -> Tuple[int, str, str, str]:
+        return self.index, self.input_file_path, self.logs_path, self.output_path
+
+
+class BatchState:
+    """
+    State of the batches of a batching run, which is stored in a json-file in the output directory.
+    The state is saved after each change of a batch status, so a restarted run can pick up unfinished batches.
+    """
+
+    def __init__(self, path: Union[str, Path], batches: List[Batch]):
+        self.path = Path(path)
+        self.batches = batches
+
+    @classmethod
+    def from_batch_paths(cls, path: Union[str, Path], batch_paths: List[Tuple[int, str, str, str]]) -> 'BatchState':
+        return cls(path, [Batch(*paths) for paths in batch_paths])
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> Optional['BatchState']:
+        if not os.path.exists(path):
+            return None
+
+        with open(path) as f:
+            state = json.load(f)
+
+        batches = []
+        for batch in state[BATCHES]:
+            batch[STATUS] = BatchStatus(batch[STATUS])
+            if batch.get(INPUT_RANGE) is not None:
+                batch[INPUT_RANGE] = tuple(batch[INPUT_RANGE])
+            batches.append(Batch(**batch))
+
+        return cls(path, batches)
+
+    def save(self) -> None:
+        batches = []
+        for batch in self.batches:
+            batch_dict = asdict(batch)
+            batch_dict[STATUS] = batch.status.value
+            batches.append(batch_dict)
+
+        # Write to a temporary file first, so the state is never partially written
+        tmp_path = self.path.parent / f'{self.path.name}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({BATCHES: batches}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get_batch_paths(self) -> List[Tuple[int, str, str, str]]:
+        return [batch.to_paths() for batch in self.batches]
+
+    def get_batches_by_status(self, status: BatchStatus) -> List[Batch]:
+        return [batch for batch in self.batches if batch.status == status]
+
+
+def start_batch(batch: Batch, command: List[str], cwd: Optional[str]) -> Tuple[subprocess.Popen, IO, float]:
+    batch.status = BatchStatus.RUNNING
+    batch.attempts += 1
+
+    logger.info(f'Command to execute batch {batch.index}: {command}')
+    logger.info(f'Start batch {batch.index} processing (attempt {batch.attempts})')
+
+    logs_file = open(os.path.join(batch.logs_path, LOG_FILE_NAME), 'a')
+    process = subprocess.Popen(command, stdout=logs_file, stderr=logs_file, cwd=cwd)
+    return process, logs_file, time.time()
+
+
+def run_batches(
+        state: BatchState,
+        get_command: Callable[[Batch], List[str]],
+        cwd: Optional[str] = None,
+        jobs: int = 1,
+        retries: int = 0,
+        start_from: int = 0,
+        poll_interval: float = 1.0,
+) -> bool:
+    """
+    Run unfinished batches with up to `jobs` subprocesses at once. A failed batch is restarted up to `retries` times.
+    Batches with index less than `start_from` are skipped.
+
+    :return: True if all scheduled batches are done.
+    """
+
+    # Batches that were running or failed in the previous run are unfinished and must be restarted
+    for batch in state.batches:
+        if batch.status in {BatchStatus.RUNNING, BatchStatus.FAILED}:
+            batch.status = BatchStatus.PENDING
+            batch.attempts = 0
+
+    pending: Deque[Batch] = deque(
+        batch for batch in state.get_batches_by_status(BatchStatus.PENDING) if batch.index >= start_from
+    )
+    logger.info(f'{len(pending)} batches will be processed with {jobs} jobs.')
+
+    running: Dict[int, Tuple[Batch, subprocess.Popen, IO, float]] = {}
+    while pending or running:
+        while pending and len(running) < jobs:
+            batch = pending.popleft()
+            running[batch.index] = (batch, *start_batch(batch, get_command(batch), cwd))
+            state.save()
+
+        finished = False
+        for index, (batch, process, logs_file, start_time) in list(running.items()):
+            return_code = process.poll()
+            if return_code is None:
+                continue
+
+            finished = True
+            logs_file.close()
+            del running[index]
+
+            if return_code == 0:
+                batch.status = BatchStatus.DONE
+                logger.info(f'Finish batch {batch.index} processing in {time.time() - start_time}')
+            elif batch.attempts <= retries:
+                batch.status = BatchStatus.PENDING
+                pending.append(batch)
+                logger.warning(f'Batch {batch.index} failed with code {return_code}, it will be restarted.')
+            else:
+                batch.status = BatchStatus.FAILED
+                logger.error(f'Batch {batch.index} failed with code {return_code} after {batch.attempts} attempts.')
+            state.save()
+
+        if not finished:
+            time.sleep(poll_interval)
+
+    failed_batches = state.get_batches_by_status(BatchStatus.FAILED)
+    if failed_batches:
+        logger.error(f'Failed batches: {[batch.index for batch in failed_batches]}.')
+
+    return not failed_batches
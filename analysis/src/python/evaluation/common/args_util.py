@@ -37,6 +37,15 @@ class EvaluationRunToolArgument(Enum):
 
     DUPLICATES = ArgumentsInfo(None, '--remove-duplicates', 'Remove duplicates around inspections')
 
+    CACHE_DIR = ArgumentsInfo(None, '--cache-dir',
+                              'Path to the directory with the on-disk cache of inspection results. '
+                              'Fragments whose results are in the cache will not be inspected again. '
+                              'If not specified, the cache is not used.')
+
+    CACHE_SIZE_LIMIT = ArgumentsInfo(None, '--cache-size-limit',
+                                     'Maximum size of the inspection cache in megabytes. If it is exceeded, '
+                                     'the least recently used results are evicted.')
+
 
 script_structure_rule = ('Please, make sure your XLSX-file matches following script standards: \n'
                          '1. Your XLSX-file or CSV-file should have 2 obligatory columns named:'
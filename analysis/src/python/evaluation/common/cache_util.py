@@ -0,0 +1,228 @@
+import hashlib
+import json
+import logging
+import os
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from analysis.src.python.evaluation.common.csv_util import ColumnName
+
+logger = logging.getLogger(__name__)
+
+MEGABYTE = 1024 ** 2
+DEFAULT_CACHE_SIZE_LIMIT_MB = 1024
+
+TMP_SUFFIX = '.tmp'
+
+
+def get_hyperstyle_version() -> str:
+    try:
+        return version('hyperstyle')
+    except PackageNotFoundError:
+        return 'unknown'
+
+
+def normalize_code(code: str) -> str:
+    """ Unify line endings, so the same code written on different platforms has the same cache key. """
+    return code.replace('\r\n', '\n').replace('\r', '\n')
+
+
+class InspectionCache:
+    """
+    On-disk cache of inspection results. Every result is stored in a separate file. The name of the file is
+    a hash of the normalized code, the language version, the hyperstyle version and the flags that affect
+    the result (for example, the flags of the tool that inspects the code).
+
+    When the total size of the cache exceeds `size_limit` bytes, the least recently used results are evicted.
+    The total size is scanned once and then kept up to date on each `put`, so the cache directory is scanned
+    again only when results have to be evicted.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path], flags: Dict[str, Any],
+                 size_limit: int = DEFAULT_CACHE_SIZE_LIMIT_MB * MEGABYTE):
+        self.cache_dir = Path(cache_dir)
+        self.flags = flags
+        self.size_limit = size_limit
+        self.hyperstyle_version = get_hyperstyle_version()
+        self.hits = 0
+        self.misses = 0
+        self._size: Optional[int] = None
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def get_key(self, code: str, lang: str, history: Optional[str] = None) -> str:
+        key_data = {
+            'code': normalize_code(code),
+            'lang': lang,
+            'history': history,
+            'hyperstyle_version': self.hyperstyle_version,
+            'flags': self.flags,
+        }
+        return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode()).hexdigest()
+
+    def _get_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / key
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._get_path(key)
+        try:
+            with open(path, encoding='utf8') as f:
+                result = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        # Update the modification time to evict the least recently used results first
+        os.utime(path)
+        self.hits += 1
+        return result
+
+    def put(self, key: str, result: str) -> None:
+        path = self._get_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temporary file first, so readers never see a partially written result
+        tmp_path = path.parent / f'{key}.{os.getpid()}{TMP_SUFFIX}'
+        with open(tmp_path, 'w', encoding='utf8') as f:
+            f.write(result)
+
+        if self._size is not None:
+            self._size += tmp_path.stat().st_size
+            try:
+                self._size -= path.stat().st_size
+            except FileNotFoundError:
+                pass
+        os.replace(tmp_path, path)
+
+    def _get_files(self) -> List[Tuple[Path, os.stat_result]]:
+        files = []
+        for path in self.cache_dir.glob('*/*'):
+            if path.suffix == TMP_SUFFIX:
+                continue
+            try:
+                files.append((path, path.stat()))
+            except FileNotFoundError:
+                continue
+        return files
+
+    def get_size(self) -> int:
+        """ Get the total size of the cached results in bytes. The cache directory is scanned only on the first call,
+        then the size is updated by `put` and `evict`. """
+
+        if self._size is None:
+            self._size = sum(stat.st_size for _, stat in self._get_files())
+        return self._size
+
+    def evict(self) -> None:
+        if self.get_size() <= self.size_limit:
+            return
+
+        # Other processes may share the cache directory, so the actual size is scanned before eviction
+        files = self._get_files()
+        total_size = sum(stat.st_size for _, stat in files)
+        self._size = total_size
+        if total_size <= self.size_limit:
+            return
+
+        evicted = 0
+        for path, stat in sorted(files, key=lambda file: file[1].st_mtime):
+            if total_size <= self.size_limit:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_size -= stat.st_size
+            evicted += 1
+
+        self._size = total_size
+        logger.info(f'Inspection cache: {evicted} results were evicted, the cache size is {total_size} bytes.')
+
+    def log_statistics(self) -> None:
+        total = self.hits + self.misses
+        hit_ratio = self.hits / total if total != 0 else 0
+        logger.info(f'Inspection cache: {self.hits} hits, {self.misses} misses (hit ratio: {hit_ratio:.2f}).')
+
+
+def is_valid_result(result: Any) -> bool:
+    """ Check that the inspection succeeded: the result is a non-empty json. Empty or broken output of a failed
+    or interrupted inspection must not be cached, otherwise it would be returned for the same code forever. """
+
+    if not isinstance(result, str) or not result.strip():
+        return False
+
+    try:
+        json.loads(result)
+    except ValueError:
+        return False
+    return True
+
+
+def _get_row_key(row: pd.Series, cache: InspectionCache, history_column: Optional[str]) -> Optional[str]:
+    code = row[ColumnName.CODE.value]
+    lang = row[ColumnName.LANG.value]
+    if not isinstance(code, str) or not isinstance(lang, str):
+        return None
+
+    history = None
+    if history_column is not None:
+        history = row.get(history_column)
+        history = history if isinstance(history, str) else None
+
+    return cache.get_key(code, lang, history)
+
+
+def inspect_with_cache(df: pd.DataFrame,
+                       inspect: Callable[[pd.DataFrame], pd.Series],
+                       cache: Optional[InspectionCache],
+                       history_column: Optional[str] = None) -> pd.Series:
+    """
+    Get inspection results for each row of `df`. The `inspect` function is called only for rows, whose results
+    are not in the cache, and only once for the rows with the same code. New valid results are saved to the cache.
+    """
+
+    if cache is None or df.empty:
+        return inspect(df)
+
+    keys = df.apply(_get_row_key, args=(cache, history_column), axis=1, result_type='reduce')
+
+    cached_results: Dict[str, str] = {}
+    for key in keys.dropna().unique():
+        result = cache.get(key)
+        if result is not None:
+            cached_results[key] = result
+
+    # Rows without key are always inspected, for rows with the same key the first one is inspected
+    is_missed = keys.isnull() | ~(keys.isin(list(cached_results.keys())) | keys.duplicated())
+    df_to_inspect = df[is_missed]
+    logger.info(f'Inspection cache: {df.shape[0] - df_to_inspect.shape[0]} of {df.shape[0]} fragments '
+                'will not be inspected.')
+
+    new_results: Dict[str, Any] = {}
+    inspected = pd.Series(dtype=object)
+    if not df_to_inspect.empty:
+        inspected = inspect(df_to_inspect)
+        for index, result in inspected.items():
+            key = keys[index]
+            if pd.isnull(key):
+                continue
+            new_results[key] = result
+            if is_valid_result(result):
+                cache.put(key, result)
+
+    results: List[Any] = []
+    for index, key in keys.items():
+        if index in inspected.index:
+            results.append(inspected[index])
+        elif key in cached_results:
+            results.append(cached_results[key])
+        else:
+            results.append(new_results[key])
+
+    cache.evict()
+    cache.log_statistics()
+
+    return pd.Series(results, index=df.index, dtype=object)
@@ -1,7 +1,9 @@
+import io
 from enum import Enum, unique
 from pathlib import Path
-from typing import Union
+from typing import List, Tuple, Union
 
+import numpy as np
 import pandas as pd
 from hyperstyle.src.python.review.common.file_system import Encoding
 
@@ -22,6 +24,106 @@ def append_dataframe_to_csv(csv_file_path: Union[str, Path], df: pd.DataFrame) -
         df.to_csv(csv_file_path, encoding=Encoding.UTF_ENCODING.value, index=False, mode='a', header=False)
 
 
+# Range of byte offsets [start, end) of whole records of a csv-file
+CsvRange = Tuple[int, int]
+
+CSV_SCAN_BLOCK_SIZE = 16 * 1024 ** 2
+
+QUOTE_BYTE = ord('"')
+LINE_BREAK_BYTE = ord('\n')
+
+
+def _find_record_ends(block: bytes, in_quotes: bool) -> Tuple[np.ndarray, bool]:
+    """
+    Find line breaks that end records in the block of a csv-file. The line breaks inside quoted values are skipped.
+    An escaped quote ("") toggles the quoting twice, so it does not change the result.
+
+    :return: positions of the line breaks and whether the end of the block is inside a quoted value.
+    """
+
+    data = np.frombuffer(block, dtype=np.uint8)
+    is_quoted = np.logical_xor.accumulate(data == QUOTE_BYTE)
+    if in_quotes:
+        is_quoted = ~is_quoted
+
+    record_ends = np.flatnonzero((data == LINE_BREAK_BYTE) & ~is_quoted)
+    return record_ends, bool(is_quoted[-1])
+
+
+def get_csv_record_ranges(csv_file_path: Union[str, Path], records_per_range: int) -> List[CsvRange]:
+    """
+    Scan the csv-file once and split its records (except the header) into ranges of byte offsets,
+    each of them contains `records_per_range` records, the last one may contain fewer records.
+    Multi-line quoted values (for example, code fragments) are kept inside a single range.
+    """
+
+    boundaries = []
+    with open(csv_file_path, 'rb') as f:
+        start = len(f.readline())
+
+        offset, records, in_quotes = start, 0, False
+        while block := f.read(CSV_SCAN_BLOCK_SIZE):
+            record_ends, in_quotes = _find_record_ends(block, in_quotes)
+            record_numbers = np.arange(records + 1, records + len(record_ends) + 1)
+            boundaries.extend((offset + record_ends[record_numbers % records_per_range == 0] + 1).tolist())
+
+            offset += len(block)
+            records += len(record_ends)
+
+    if not boundaries or boundaries[-1] != offset:
+        boundaries.append(offset)
+
+    return [(range_start, range_end) for range_start, range_end in zip([start] + boundaries, boundaries)
+            if range_start < range_end]
+
+
+class CsvRangeReader(io.RawIOBase):
+    """
+    Binary stream with the header of the csv-file followed by the records from the given range,
+    so the range can be read as a separate csv-file without copying it.
+    """
+
+    def __init__(self, csv_file_path: Union[str, Path], csv_range: CsvRange):
+        super().__init__()
+        self._file = open(csv_file_path, 'rb')
+        self._header = self._file.readline()
+
+        start, end = csv_range
+        self._file.seek(start)
+        self._left = end - start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._header:
+            data, self._header = self._header[:len(buffer)], self._header[len(buffer):]
+        else:
+            data = self._file.read(min(len(buffer), self._left))
+            self._left -= len(data)
+
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self) -> None:
+        self._file.close()
+        super().close()
+
+
+def open_csv_range(csv_file_path: Union[str, Path], csv_range: CsvRange) -> io.BufferedReader:
+    return io.BufferedReader(CsvRangeReader(csv_file_path, csv_range))
+
+
+def read_csv_range(csv_file_path: Union[str, Path], csv_range: CsvRange) -> pd.DataFrame:
+    with open_csv_range(csv_file_path, csv_range) as f:
+        return pd.read_csv(f)
+
+
+def parse_csv_range(value: str) -> CsvRange:
+    start, end = value.split(':')
+    return int(start), int(end)
+
+
 @unique
 class ColumnName(Enum):
     CODE = 'code'
@@ -0,0 +1,63 @@
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, List, Set, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+IDS = 'ids'
+OUTPUT_SIZE = 'output_size'
+
+
+class Journal:
+    """
+    Append-only journal of checkpoints of a long-running process. Each checkpoint is a json line with the ids of
+    the processed fragments and the size of the output file after the results of these fragments were written.
+
+    The size allows to restore the output file to the state of the last checkpoint, so a crash in the middle of
+    writing results leaves neither duplicated nor partially written rows after the restart.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+
+    def read(self) -> Tuple[Set[Any], int]:
+        """
+        Read all checkpoints from the journal. A partially written last checkpoint is removed.
+
+        :return: ids of all processed fragments and the size of the output file at the last checkpoint.
+        """
+
+        done_ids = set()
+        output_size = 0
+        if not self.path.exists():
+            return done_ids, output_size
+
+        valid_size = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError('The checkpoint is not finished with a line break.')
+                    checkpoint = json.loads(line)
+                except ValueError:
+                    logger.warning(f'The journal {self.path} contains a partially written checkpoint.')
+                    break
+
+                done_ids.update(checkpoint[IDS])
+                output_size = checkpoint[OUTPUT_SIZE]
+                valid_size += len(line)
+
+        os.truncate(self.path, valid_size)
+        return done_ids, output_size
+
+    def append(self, ids: List[Any], output_size: int) -> None:
+        with open(self.path, 'a', encoding='utf8') as f:
+            f.write(json.dumps({IDS: ids, OUTPUT_SIZE: output_size}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def clear(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        open(self.path, 'w').close()
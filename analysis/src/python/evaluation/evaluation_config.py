@@ -5,8 +5,10 @@ from pathlib import Path
 from typing import List, Optional, Union
 
 from hyperstyle.src.python.common.tool_arguments import RunToolArgument
-from hyperstyle.src.python.review.application_config import LanguageVersion
+from hyperstyle.src.python.review.application_config import ApplicationConfig, LanguageVersion
+from hyperstyle.src.python.review.reviewers.perform_review import OutputFormat
 from analysis.src.python.evaluation.common.args_util import EvaluationArgument
+from analysis.src.python.evaluation.common.cache_util import InspectionCache, MEGABYTE
 from analysis.src.python.evaluation.common.file_util import AnalysisExtension, get_parent_folder, \
     get_restricted_extension
 
@@ -26,6 +28,9 @@ class EvaluationConfig:
                                                                      [AnalysisExtension.XLSX, AnalysisExtension.CSV])
         self.__init_output_file_name(args.output_file_name)
         self.to_drop_nan: bool = args.to_drop_nan
+        self.in_process: bool = args.in_process
+        self.cache_dir: Optional[Path] = args.cache_dir
+        self.cache_size_limit: int = args.cache_size_limit * MEGABYTE
 
     def __init_output_file_name(self, output_file_name: Optional[str]):
         if output_file_name is None:
@@ -51,6 +56,44 @@ class EvaluationConfig:
             command.extend([RunToolArgument.LANG_VERSION.value.long_name, lang])
         return command
 
+    # The same config as run_tool.py builds from the command returned by build_command
+    def build_application_config(self, lang: str, history: Optional[str]) -> ApplicationConfig:
+        language_version = None
+        if lang == LanguageVersion.JAVA_8.value or lang == LanguageVersion.JAVA_11.value:
+            language_version = LanguageVersion(lang)
+
+        inspectors_config = {
+            'language_version': language_version,
+            'n_cpu': 1,
+        }
+
+        return ApplicationConfig(
+            disabled_inspectors=set(),
+            allow_duplicates=False,
+            n_cpu=1,
+            inspectors_config=inspectors_config,
+            with_all_categories=False,
+            history=history if self.with_history else None,
+        )
+
+    def get_inspection_cache(self) -> Optional[InspectionCache]:
+        if self.cache_dir is None:
+            return None
+
+        if self.format != OutputFormat.JSON.value:
+            logger.warning('The inspection cache is used only with the json format, '
+                           'since the text format contains paths to the inspected files.')
+            return None
+
+        flags = {
+            'script': 'evaluation_run_tool',
+            'format': self.format,
+            'with_history': self.with_history,
+            # The in-process review uses the installed hyperstyle, otherwise results depend on the tool
+            'tool_path': None if self.in_process else str(self.tool_path),
+        }
+        return InspectionCache(self.cache_dir, flags, self.cache_size_limit)
+
     def get_tool_root(self) -> str:
         return self.tool_path.parent.parent.parent.parent
 
@@ -1,10 +1,12 @@
 import argparse
+import io
 import logging.config
 import os
 import re
 import sys
 import time
 import traceback
+from contextlib import redirect_stdout
 from pathlib import Path
 from typing import Optional
 
@@ -17,13 +19,14 @@ from analysis.src.python.evaluation.common.pandas_util import get_solutions_df,
 from analysis.src.python.evaluation.common.args_util import (
     EvaluationArgument, EvaluationRunToolArgument, script_structure_rule,
 )
+from analysis.src.python.evaluation.common.cache_util import DEFAULT_CACHE_SIZE_LIMIT_MB, inspect_with_cache
 from analysis.src.python.evaluation.common.parallel_util import run_in_subprocess_with_working_dir
 from analysis.src.python.evaluation.common.csv_util import ColumnName
 from analysis.src.python.evaluation.common.file_util import create_file
 from analysis.src.python.evaluation.evaluation_config import EvaluationConfig
 from hyperstyle.src.python.common.tool_arguments import RunToolArgument
 from hyperstyle.src.python.review.application_config import LanguageVersion
-from hyperstyle.src.python.review.reviewers.perform_review import OutputFormat
+from hyperstyle.src.python.review.reviewers.perform_review import OutputFormat, perform_and_print_review
 
 logger = logging.getLogger(__name__)
 
@@ -77,6 +80,24 @@ def configure_arguments(parser: argparse.ArgumentParser) -> None:
                         help='If True, empty code fragments will be deleted from df',
                         action='store_true')
 
+    parser.add_argument('--in-process',
+                        help='If True, fragments will be reviewed inside the long-lived parallel workers '
+                             'instead of running a new python process with the tool for each fragment. '
+                             'In that case, the installed hyperstyle package is used and '
+                             'the --tool-path argument is ignored.',
+                        action='store_true')
+
+    parser.add_argument(EvaluationRunToolArgument.CACHE_DIR.value.long_name,
+                        help=f'{EvaluationRunToolArgument.CACHE_DIR.value.description} '
+                             f'The cache is used only with the {OutputFormat.JSON.value} format.',
+                        default=None,
+                        type=lambda value: Path(value).absolute())
+
+    parser.add_argument(EvaluationRunToolArgument.CACHE_SIZE_LIMIT.value.long_name,
+                        help=EvaluationRunToolArgument.CACHE_SIZE_LIMIT.value.description,
+                        default=DEFAULT_CACHE_SIZE_LIMIT_MB,
+                        type=int)
+
 
 def get_language_version(lang_key: str) -> LanguageVersion:
     try:
@@ -87,6 +108,18 @@ def get_language_version(lang_key: str) -> LanguageVersion:
         raise KeyError(e)
 
 
+def __review_in_process(file_path: Path, lang: str, history: Optional[str], config: EvaluationConfig) -> str:
+    # Collect the tool output in the same form as it is printed by run_tool.py
+    output = io.StringIO()
+    with redirect_stdout(output):
+        try:
+            perform_and_print_review(file_path, OutputFormat(config.format),
+                                     config.build_application_config(lang, history))
+        except Exception:
+            logger.exception(f'An unexpected error during the review of {file_path}.')
+    return output.getvalue()
+
+
 def __inspect_row(lang: str, code: str, fragment_id: int, history: Optional[str],
                   config: EvaluationConfig) -> Optional[str]:
     print(f'current id: {fragment_id}')
@@ -95,8 +128,11 @@ def __inspect_row(lang: str, code: str, fragment_id: int, history: Optional[str]
     extension = get_language_version(lang).extension_by_language().value
     tmp_file_path = config.solutions_file_path.parent.absolute() / f'inspected_code_{fragment_id}{extension}'
     temp_file = next(create_file(tmp_file_path, code))
-    command = config.build_command(temp_file, lang, history, with_relative_path=True)
-    results = run_in_subprocess_with_working_dir(command, config.get_tool_root())
+    if config.in_process:
+        results = __review_in_process(temp_file, lang, history, config)
+    else:
+        command = config.build_command(temp_file, lang, history, with_relative_path=True)
+        results = run_in_subprocess_with_working_dir(command, config.get_tool_root())
     # results = run_in_subprocess(command)
     os.remove(temp_file)
     return results
@@ -116,17 +152,25 @@ def inspect_solutions_df(config: EvaluationConfig, lang_code_dataframe: pd.DataF
     report[ColumnName.TRACEBACK.value] = []
 
     pandarallel.initialize()
+    if config.in_process:
+        # run_tool.py disables the tool logs by default, so the same is done for the in-process review
+        logging.getLogger('hyperstyle').setLevel(logging.CRITICAL)
     if config.traceback:
         report[ColumnName.TRACEBACK.value] = []
     try:
         if config.to_drop_nan:
             lang_code_dataframe = lang_code_dataframe.dropna()
-        lang_code_dataframe[ColumnName.TRACEBACK.value] = lang_code_dataframe.parallel_apply(
-            lambda row: __inspect_row(row[ColumnName.LANG.value],
-                                      row[ColumnName.CODE.value],
-                                      row[ColumnName.ID.value],
-                                      row.get(ColumnName.HISTORY.value),
-                                      config), axis=1)
+        lang_code_dataframe[ColumnName.TRACEBACK.value] = inspect_with_cache(
+            lang_code_dataframe,
+            lambda df: df.parallel_apply(
+                lambda row: __inspect_row(row[ColumnName.LANG.value],
+                                          row[ColumnName.CODE.value],
+                                          row[ColumnName.ID.value],
+                                          row.get(ColumnName.HISTORY.value),
+                                          config), axis=1),
+            config.get_inspection_cache(),
+            history_column=ColumnName.HISTORY.value if config.with_history else None,
+        )
 
         lang_code_dataframe[ColumnName.GRADE.value] = lang_code_dataframe.parallel_apply(
             lambda row: __get_grade_from_traceback(row[ColumnName.TRACEBACK.value]), axis=1)
@@ -0,0 +1,69 @@
+import json
+from pathlib import Path
+from typing import Dict, List, Union
+
+import pandas as pd
+
+VALUES = 'values'
+COUNTS = 'counts'
+
+# For each language, the value counts of each statistic
+PartialStats = Dict[str, Dict[str, pd.Series]]
+
+
+def save_partial_stats(partial_stats: PartialStats, path: Union[str, Path]) -> None:
+    """
+    Save partial statistics to a json-file: for each language and statistic, the distinct values and their counts.
+    """
+
+    serialized_stats = {
+        lang: {
+            name: {VALUES: value_counts.index.tolist(), COUNTS: value_counts.tolist()}
+            for name, value_counts in value_counts_by_name.items()
+        }
+        for lang, value_counts_by_name in partial_stats.items()
+    }
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf8') as f:
+        json.dump(serialized_stats, f)
+
+
+def _get_values_index(values: List[Union[int, float]]) -> pd.Index:
+    # An empty index must not be of the object type, otherwise all values become objects after merging
+    return pd.Index(values) if values else pd.Index([], dtype='int64')
+
+
+def read_partial_stats(path: Union[str, Path]) -> PartialStats:
+    with open(path, encoding='utf8') as f:
+        serialized_stats = json.load(f)
+
+    return {
+        lang: {
+            name: pd.Series(
+                value_counts[COUNTS], index=_get_values_index(value_counts[VALUES]), name=name, dtype='int64',
+            )
+            for name, value_counts in value_counts_by_name.items()
+        }
+        for lang, value_counts_by_name in serialized_stats.items()
+    }
+
+
+def merge_partial_stats(partial_stats_list: List[PartialStats]) -> PartialStats:
+    """
+    Merge partial statistics: the counts of the same values of the same statistics are summed up.
+    """
+
+    merged_stats: PartialStats = {}
+    for partial_stats in partial_stats_list:
+        for lang, value_counts_by_name in partial_stats.items():
+            merged_value_counts_by_name = merged_stats.setdefault(lang, {})
+            for name, value_counts in value_counts_by_name.items():
+                if name not in merged_value_counts_by_name:
+                    merged_value_counts_by_name[name] = value_counts
+                    continue
+
+                merged_value_counts = merged_value_counts_by_name[name].add(value_counts, fill_value=0)
+                merged_value_counts_by_name[name] = merged_value_counts.astype('int64').rename(name)
+
+    return merged_stats
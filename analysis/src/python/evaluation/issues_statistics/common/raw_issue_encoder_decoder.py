@@ -1,5 +1,11 @@
 import json
+from dataclasses import dataclass
+from json import JSONDecodeError
 from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
 
 from hyperstyle.src.python.review.inspectors.inspector_type import InspectorType
 from hyperstyle.src.python.review.inspectors.issue import (
@@ -15,6 +21,34 @@ from hyperstyle.src.python.review.inspectors.issue import (
 
 MEASURE = 'measure'
 
+# Fields of the flat table, whose values are strings. They are stored as codes of the values in the dictionaries
+DICTIONARY_ENCODED_FIELDS = [
+    IssueData.ORIGIN_ClASS.value,
+    IssueData.DESCRIPTION.value,
+    IssueData.ISSUE_TYPE.value,
+    IssueData.INSPECTOR_TYPE.value,
+    IssueData.DIFFICULTY.value,
+]
+
+FIELD_TO_DTYPE = {
+    IssueData.ORIGIN_ClASS.value: np.int32,
+    IssueData.DESCRIPTION.value: np.int32,
+    IssueData.ISSUE_TYPE.value: np.int32,
+    IssueData.LINE_NUMBER.value: np.int32,
+    IssueData.COLUMN_NUMBER.value: np.int32,
+    IssueData.INSPECTOR_TYPE.value: np.int32,
+    IssueData.DIFFICULTY.value: np.int32,
+    MEASURE: np.float64,
+}
+
+# TODO: remove after analyzing raw issue statistics
+FIELD_TO_DEFAULT_VALUE = {
+    IssueData.DIFFICULTY.value: IssueDifficulty.HARD.value,
+    MEASURE: np.nan,
+}
+
+DEFAULT_FLAT_FIELDS = [IssueData.ISSUE_TYPE.value, IssueData.ORIGIN_ClASS.value, MEASURE]
+
 
 class RawIssueEncoder(json.JSONEncoder):
     to_safe_path: bool
@@ -65,3 +99,63 @@ class RawIssueDecoder(json.JSONDecoder):
             return measurable_issue_class(**json_dict)
 
         return CodeIssue(**json_dict)
+
+
+@dataclass(frozen=True)
+class FlatRawIssues:
+    """
+    Raw issues of a column decoded into a flat table of primitive arrays: one element per issue.
+
+    `fragment_index` contains positions of the fragments in the decoded column, `fields` contain values of the issue
+    fields, where fields from `DICTIONARY_ENCODED_FIELDS` are stored as codes of the values from `dictionaries`.
+    `is_decoded` shows for each fragment whether its raw issues were decoded successfully.
+    """
+
+    fragment_index: np.ndarray
+    fields: Dict[str, np.ndarray]
+    dictionaries: Dict[str, List[str]]
+    is_decoded: np.ndarray
+
+    @property
+    def size(self) -> int:
+        return len(self.fragment_index)
+
+
+def decode_raw_issues_to_flat_table(raw_issues: pd.Series, fields: Optional[List[str]] = None) -> FlatRawIssues:
+    """
+    Decode a column with raw issues into a flat table of primitive arrays.
+    Unlike RawIssueDecoder, no issue objects are created, so this is a much faster way to get only some fields.
+    """
+
+    if fields is None:
+        fields = DEFAULT_FLAT_FIELDS
+
+    fragments_issues = []
+    is_decoded = np.zeros(len(raw_issues), dtype=bool)
+    for i, fragment_raw_issues in enumerate(raw_issues):
+        try:
+            fragments_issues.append(json.loads(fragment_raw_issues))
+            is_decoded[i] = True
+        except (JSONDecodeError, TypeError):
+            fragments_issues.append([])
+
+    counts = np.fromiter((len(issues) for issues in fragments_issues), dtype=np.int64, count=len(fragments_issues))
+    fragment_index = np.repeat(np.arange(len(fragments_issues), dtype=np.int64), counts)
+
+    decoded_fields = {}
+    dictionaries = {}
+    for field in fields:
+        if field in FIELD_TO_DEFAULT_VALUE:
+            default_value = FIELD_TO_DEFAULT_VALUE[field]
+            values = [issue.get(field, default_value) for issues in fragments_issues for issue in issues]
+        else:
+            values = [issue[field] for issues in fragments_issues for issue in issues]
+
+        if field in DICTIONARY_ENCODED_FIELDS:
+            codes, uniques = pd.factorize(np.array(values, dtype=object))
+            decoded_fields[field] = codes.astype(FIELD_TO_DTYPE[field])
+            dictionaries[field] = uniques.tolist()
+        else:
+            decoded_fields[field] = np.array(values, dtype=FIELD_TO_DTYPE[field])
+
+    return FlatRawIssues(fragment_index, decoded_fields, dictionaries, is_decoded)
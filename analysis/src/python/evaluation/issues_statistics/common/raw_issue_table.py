@@ -0,0 +1,140 @@
+import json
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Union
+
+import numpy as np
+import pandas as pd
+
+from analysis.src.python.evaluation.issues_statistics.common.raw_issue_encoder_decoder import (
+    decode_raw_issues_to_flat_table, DICTIONARY_ENCODED_FIELDS, FIELD_TO_DTYPE,
+)
+
+logger = logging.getLogger(__name__)
+
+FRAGMENT_ID = 'fragment_id'
+
+COLUMN_TO_DTYPE = {FRAGMENT_ID: np.int64, **FIELD_TO_DTYPE}
+
+METADATA_FILE = 'metadata.json'
+COLUMN_FILE_EXTENSION = '.bin'
+SIZE = 'size'
+DICTIONARIES = 'dictionaries'
+
+
+def _get_column_path(table_path: Path, column: str) -> Path:
+    return table_path / f'{column}{COLUMN_FILE_EXTENSION}'
+
+
+@dataclass(frozen=True)
+class RawIssueTable:
+    """
+    Normalized columnar table of raw issues: one row per issue. Columns from `DICTIONARY_ENCODED_FIELDS` contain
+    codes of the values from `dictionaries`, the measure of not measurable issues is NaN.
+    """
+
+    columns: Dict[str, np.ndarray]
+    dictionaries: Dict[str, List[str]]
+
+    @property
+    def size(self) -> int:
+        return len(self.columns[FRAGMENT_ID])
+
+    def to_df(self) -> pd.DataFrame:
+        """
+        Convert the table to a dataframe, dictionary-encoded columns are converted to categorical ones.
+        """
+
+        df_columns = {}
+        for column, values in self.columns.items():
+            if column in DICTIONARY_ENCODED_FIELDS:
+                df_columns[column] = pd.Categorical.from_codes(values, categories=self.dictionaries[column])
+            else:
+                df_columns[column] = values
+
+        return pd.DataFrame(df_columns)
+
+
+class RawIssueTableWriter:
+    """
+    Writes raw issues to a directory with the columnar table: every column is stored in a separate binary file and
+    the metadata file contains the size of the table and the dictionaries. The issues can be appended by parts,
+    so the whole dataset with raw issues is never kept in memory.
+    """
+
+    def __init__(self, table_path: Union[str, Path]):
+        self.table_path = Path(table_path)
+        self.size = 0
+        self.value_to_code: Dict[str, Dict[str, int]] = {column: {} for column in DICTIONARY_ENCODED_FIELDS}
+
+        self.table_path.mkdir(parents=True, exist_ok=True)
+        for column in COLUMN_TO_DTYPE.keys():
+            open(_get_column_path(self.table_path, column), 'wb').close()
+
+    def _encode(self, column: str, value: str) -> int:
+        return self.value_to_code[column].setdefault(value, len(self.value_to_code[column]))
+
+    def append(self, fragment_ids: pd.Series, raw_issues: pd.Series) -> None:
+        flat_issues = decode_raw_issues_to_flat_table(raw_issues, list(FIELD_TO_DTYPE.keys()))
+
+        for fragment_id in np.asarray(fragment_ids)[~flat_issues.is_decoded]:
+            logger.warning(f'{fragment_id}: failed to decode issues.')
+
+        columns = {FRAGMENT_ID: np.asarray(fragment_ids, dtype=np.int64)[flat_issues.fragment_index]}
+        for column, values in flat_issues.fields.items():
+            if column in DICTIONARY_ENCODED_FIELDS:
+                # Convert codes of the decoded part to codes of the whole table
+                table_codes = [self._encode(column, value) for value in flat_issues.dictionaries[column]]
+                values = np.array(table_codes, dtype=COLUMN_TO_DTYPE[column])[values]
+            columns[column] = values
+
+        for column, values in columns.items():
+            with open(_get_column_path(self.table_path, column), 'ab') as f:
+                values.astype(COLUMN_TO_DTYPE[column]).tofile(f)
+
+        self.size += flat_issues.size
+
+    def close(self) -> None:
+        dictionaries = {
+            column: list(value_to_code.keys()) for column, value_to_code in self.value_to_code.items()
+        }
+
+        with open(self.table_path / METADATA_FILE, 'w', encoding='utf8') as f:
+            json.dump({SIZE: self.size, DICTIONARIES: dictionaries}, f)
+
+    def __enter__(self) -> 'RawIssueTableWriter':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def write_raw_issue_table(table_path: Union[str, Path], fragment_ids: pd.Series, raw_issues: pd.Series) -> None:
+    with RawIssueTableWriter(table_path) as writer:
+        writer.append(fragment_ids, raw_issues)
+
+
+def read_raw_issue_table(table_path: Union[str, Path], to_mmap: bool = True) -> RawIssueTable:
+    """
+    Read the columnar table of raw issues. If `to_mmap` is True, the columns are memory-mapped instead of being
+    read into memory.
+    """
+
+    table_path = Path(table_path)
+
+    with open(table_path / METADATA_FILE, encoding='utf8') as f:
+        metadata = json.load(f)
+
+    size = metadata[SIZE]
+    columns = {}
+    for column, dtype in COLUMN_TO_DTYPE.items():
+        column_path = _get_column_path(table_path, column)
+        if size == 0:
+            columns[column] = np.empty(0, dtype=dtype)
+        elif to_mmap:
+            columns[column] = np.memmap(column_path, dtype=dtype, mode='r', shape=(size,))
+        else:
+            columns[column] = np.fromfile(column_path, dtype=dtype, count=size)
+
+    return RawIssueTable(columns, metadata[DICTIONARIES])
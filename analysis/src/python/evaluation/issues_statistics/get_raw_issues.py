@@ -3,8 +3,10 @@ import json
 import logging
 import os
 import sys
+from collections import defaultdict
+from contextlib import nullcontext
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 sys.path.append('')
 
@@ -13,14 +15,25 @@ import pandas as pd
 from pandarallel import pandarallel
 from hyperstyle.src.python.common.tool_arguments import RunToolArgument
 from analysis.src.python.evaluation.common.pandas_util import get_solutions_df_by_file_path, write_df_to_file
-from analysis.src.python.evaluation.common.csv_util import ColumnName
+from analysis.src.python.evaluation.common.cache_util import (
+    DEFAULT_CACHE_SIZE_LIMIT_MB, inspect_with_cache, InspectionCache, MEGABYTE,
+)
+from analysis.src.python.evaluation.common.csv_util import (
+    append_dataframe_to_csv, ColumnName, CsvRange, open_csv_range, parse_csv_range, read_csv_range,
+    write_dataframe_to_csv,
+)
 from analysis.src.python.evaluation.common.file_util import AnalysisExtension, create_file, get_name_from_path, \
-    get_parent_folder
+    get_parent_folder, remove_directory
+from analysis.src.python.evaluation.common.journal_util import Journal
 from analysis.src.python.evaluation.issues_statistics.common.raw_issue_encoder_decoder import RawIssueEncoder
+from analysis.src.python.evaluation.issues_statistics.common.raw_issue_table import (
+    RawIssueTableWriter, write_raw_issue_table,
+)
 from analysis.src.python.evaluation.common.args_util import EvaluationRunToolArgument
 from hyperstyle.src.python.review.application_config import LanguageVersion
 from hyperstyle.src.python.review.common.file_system import Extension
 from hyperstyle.src.python.review.common.language import Language
+from hyperstyle.src.python.review.inspectors.base_inspector import BaseInspector
 from hyperstyle.src.python.review.inspectors.issue import (
     BaseIssue,
     IssueType,
@@ -42,6 +55,17 @@ ERROR_CODES = [
     'E0001',  # pylint
 ]
 
+# Issues that are found by comparing several files, so they make no sense when the fragments are inspected together
+CROSS_FILE_ORIGIN_CLASSES = [
+    'R0401',  # pylint (cyclic-import)
+    'R0801',  # pylint (duplicate-code)
+]
+
+PYTHON_PACKAGE_INIT_FILE = '__init__.py'
+
+JOURNAL_SUFFIX = '.journal'
+RAW_ISSUE_TABLE_SUFFIX = '_table'
+
 logger = logging.getLogger(__name__)
 
 
@@ -79,16 +103,73 @@ def configure_arguments(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
         '-o', '--output',
         type=lambda value: Path(value).absolute(),
-        help='Path where the dataset with raw issues will be saved. '
+        help='Path where the dataset with raw issues will be saved. If the path is an existing folder, '
+             'the dataset will be saved to this folder. '
              'If not specified, the dataset will be saved next to the original one.',
     )
 
+    parser.add_argument(
+        '--input-range',
+        type=parse_csv_range,
+        default=None,
+        help='Range of byte offsets "start:end" of the csv-file with solutions. If specified, only the records '
+             'from this range are read and inspected. It is used by batching to process the slices of a dataset '
+             'without copying them.',
+    )
+
     parser.add_argument(
         '-l', '--log-output',
         type=lambda value: Path(value).absolute(),
         help='Path where logs will be stored. If not specified, then logs will be output to stderr.',
     )
 
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=1,
+        help='The number of fragments in the same language that are inspected by a single run of each inspector. '
+             'By default, every fragment is inspected separately.',
+    )
+
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=None,
+        help='If specified, the dataset is read and inspected by chunks of this size, and the results of each chunk '
+             'are appended to the output as soon as the chunk is inspected. The finished fragments are recorded to '
+             'a journal next to the output. Only csv-files are supported in this mode.',
+    )
+
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Continue the interrupted inspection in the chunk mode: '
+             'the fragments recorded in the journal are skipped. '
+             'By default, the output and the journal are overwritten.',
+    )
+
+    parser.add_argument(
+        '--raw-issues-table',
+        action='store_true',
+        help='Additionally save raw issues as a columnar binary table, which can be loaded without json decoding. '
+             'The table is saved to a folder next to the output.',
+    )
+
+    parser.add_argument(
+        EvaluationRunToolArgument.CACHE_DIR.value.long_name,
+        type=lambda value: Path(value).absolute(),
+        default=None,
+        help=f'{EvaluationRunToolArgument.CACHE_DIR.value.description} '
+             'The cache is not used if the --to-save-path flag is set.',
+    )
+
+    parser.add_argument(
+        EvaluationRunToolArgument.CACHE_SIZE_LIMIT.value.long_name,
+        type=int,
+        default=DEFAULT_CACHE_SIZE_LIMIT_MB,
+        help=EvaluationRunToolArgument.CACHE_SIZE_LIMIT.value.description,
+    )
+
 
 def _filter_issues(
         issues: List[BaseIssue],
@@ -117,65 +198,89 @@ def _check_issues_for_errors(issues: List[BaseIssue]) -> bool:
     return any(error_code in origin_classes for error_code in ERROR_CODES)
 
 
-def _inspect_row(
-        row: pd.Series,
-        solutions_file_path: Path,
-        allow_duplicates: bool,
-        allow_zero_measure_issues: bool,
-        allow_info_issues: bool,
-        to_safe_path: bool,
-) -> Optional[str]:
-    print(f'{row[ID]}: processing started')
-
+def _get_inspectors(row: pd.Series) -> Optional[Tuple[LanguageVersion, List[BaseInspector]]]:
     if pd.isnull(row[LANG]):
         logger.warning(f'{row[ID]}: no lang.')
-        return np.nan
+        return None
 
     if pd.isnull(row[CODE]):
         logger.warning(f'{row[ID]}: no code.')
-        return np.nan
+        return None
 
     # If we were unable to identify the language version, we return None
     language_version = LanguageVersion.from_value(row[LANG])
     if language_version is None:
         logger.warning(f'{row[ID]}: it was not possible to determine the language version from "{row[LANG]}"')
-        return np.nan
+        return None
 
     # If we were unable to identify the language, we return None
     language = Language.from_language_version(language_version)
     if language == Language.UNKNOWN:
         logger.warning(f'{row[ID]}: it was not possible to determine the language from "{language_version}"')
-        return np.nan
+        return None
 
     # If there are no inspectors for the language, then return None
     inspectors = LANGUAGE_TO_INSPECTORS.get(language, [])
     if not inspectors:
         logger.warning(f'{row[ID]}: no inspectors were found for the {language}.')
-        return np.nan
+        return None
 
-    tmp_file_extension = language_version.extension_by_language().value
-    tmp_file_path = solutions_file_path.parent.absolute() / f'fragment_{row[ID]}{tmp_file_extension}'
-    temp_file = next(create_file(tmp_file_path, row[CODE]))
+    return language_version, inspectors
+
+
+def _get_fragment_file_name(row: pd.Series, language_version: LanguageVersion) -> str:
+    return f'fragment_{row[ID]}{language_version.extension_by_language().value}'
 
-    inspectors_config = {
+
+def _get_inspectors_config(language_version: LanguageVersion) -> Dict[str, Any]:
+    return {
         'language_version': language_version,
         'n_cpu': 1,
     }
 
-    raw_issues = []
 
-    for inspector in inspectors:
-        try:
-            issues = inspector.inspect(temp_file, inspectors_config)
+def _run_inspector(
+        inspector: BaseInspector,
+        path: Path,
+        inspectors_config: Dict[str, Any],
+        fragment_id: Any,
+) -> List[BaseIssue]:
+    try:
+        issues = inspector.inspect(path, inspectors_config)
+    except Exception:
+        logger.warning(f'{fragment_id}: inspector {inspector.inspector_type.value} failed.')
+        return []
 
-            if _check_issues_for_errors(issues):
-                logger.warning(f'{row[ID]}: inspector {inspector.inspector_type.value} failed.')
-                continue
+    if _check_issues_for_errors(issues):
+        logger.warning(f'{fragment_id}: inspector {inspector.inspector_type.value} failed.')
+        return []
 
-            raw_issues.extend(issues)
+    return issues
 
-        except Exception:
-            logger.warning(f'{row[ID]}: inspector {inspector.inspector_type.value} failed.')
+
+def _inspect_row(
+        row: pd.Series,
+        solutions_file_path: Path,
+        allow_duplicates: bool,
+        allow_zero_measure_issues: bool,
+        allow_info_issues: bool,
+        to_safe_path: bool,
+) -> Optional[str]:
+    print(f'{row[ID]}: processing started')
+
+    language_version_and_inspectors = _get_inspectors(row)
+    if language_version_and_inspectors is None:
+        return np.nan
+    language_version, inspectors = language_version_and_inspectors
+
+    tmp_file_path = solutions_file_path.parent.absolute() / _get_fragment_file_name(row, language_version)
+    temp_file = next(create_file(tmp_file_path, row[CODE]))
+
+    inspectors_config = _get_inspectors_config(language_version)
+
+    raw_issues = []
+    for inspector in inspectors:
+        raw_issues.extend(_run_inspector(inspector, temp_file, inspectors_config, row[ID]))
 
     os.remove(temp_file)
 
@@ -188,6 +293,145 @@ def _inspect_row(
     return json_issues
 
 
+def _inspect_batch_by_inspector(
+        inspector: BaseInspector,
+        batch_dir: Path,
+        inspectors_config: Dict[str, Any],
+        file_name_to_id: Dict[str, Any],
+) -> Dict[str, List[BaseIssue]]:
+    """
+    Run the inspector once over the whole batch directory and split the found issues by the fragment files.
+    If the inspector fails on the batch, the fragments are inspected one by one.
+    """
+
+    try:
+        issues = inspector.inspect(batch_dir, inspectors_config)
+    except Exception:
+        logger.warning(
+            f'Inspector {inspector.inspector_type.value} failed on the batch {batch_dir.name}. '
+            'The fragments will be inspected one by one.',
+        )
+        return {
+            file_name: _run_inspector(inspector, batch_dir / file_name, inspectors_config, fragment_id)
+            for file_name, fragment_id in file_name_to_id.items()
+        }
+
+    issues_by_file_name = defaultdict(list)
+    for issue in issues:
+        if issue.origin_class not in CROSS_FILE_ORIGIN_CLASSES:
+            issues_by_file_name[Path(issue.file_path).name].append(issue)
+
+    fragment_issues = {}
+    for file_name, fragment_id in file_name_to_id.items():
+        issues = issues_by_file_name.get(file_name, [])
+        if _check_issues_for_errors(issues):
+            logger.warning(f'{fragment_id}: inspector {inspector.inspector_type.value} failed.')
+            issues = []
+        fragment_issues[file_name] = issues
+
+    return fragment_issues
+
+
+def _inspect_batch_in_dir(
+        batch: pd.DataFrame,
+        batch_dir: Path,
+        allow_duplicates: bool,
+        allow_zero_measure_issues: bool,
+        allow_info_issues: bool,
+        to_safe_path: bool,
+) -> Dict[Any, str]:
+    """
+    Write the fragments of the batch into `batch_dir` and inspect them.
+
+    :return: raw issues by the indices of the inspected fragments.
+    """
+
+    language_version = None
+    inspectors = []
+    file_name_to_id = {}
+    file_name_to_index = {}
+    for index, row in batch.iterrows():
+        print(f'{row[ID]}: processing started')
+
+        language_version_and_inspectors = _get_inspectors(row)
+        if language_version_and_inspectors is None:
+            continue
+        language_version, inspectors = language_version_and_inspectors
+
+        file_name = _get_fragment_file_name(row, language_version)
+        next(create_file(batch_dir / file_name, row[CODE]))
+        file_name_to_id[file_name] = row[ID]
+        file_name_to_index[file_name] = index
+
+    if not file_name_to_id:
+        return {}
+
+    # Pylint inspects a directory only if it is a package
+    if Language.from_language_version(language_version) == Language.PYTHON:
+        next(create_file(batch_dir / PYTHON_PACKAGE_INIT_FILE, ''))
+
+    inspectors_config = _get_inspectors_config(language_version)
+
+    raw_issues = defaultdict(list)
+    for inspector in inspectors:
+        issues_by_file_name = _inspect_batch_by_inspector(inspector, batch_dir, inspectors_config, file_name_to_id)
+        for file_name, issues in issues_by_file_name.items():
+            raw_issues[file_name].extend(issues)
+
+    results = {}
+    for file_name, index in file_name_to_index.items():
+        issues = _filter_issues(raw_issues[file_name], allow_duplicates, allow_zero_measure_issues, allow_info_issues)
+        results[index] = json.dumps(issues, cls=RawIssueEncoder, to_safe_path=to_safe_path)
+        print(f'{file_name_to_id[file_name]}: processing finished.')
+
+    return results
+
+
+def _inspect_batch(
+        batch: pd.DataFrame,
+        solutions_file_path: Path,
+        allow_duplicates: bool,
+        allow_zero_measure_issues: bool,
+        allow_info_issues: bool,
+        to_safe_path: bool,
+) -> List[Optional[str]]:
+    """
+    Inspect a batch of fragments written in the same language: all fragments are written into a scratch directory
+    and each inspector is run once over this directory.
+
+    :return: a list of raw issues in the same order as the fragments in the batch.
+    """
+
+    batch_dir = solutions_file_path.parent.absolute() / f'fragments_{batch[ID].iloc[0]}'
+    try:
+        results = _inspect_batch_in_dir(
+            batch, batch_dir, allow_duplicates, allow_zero_measure_issues, allow_info_issues, to_safe_path,
+        )
+    finally:
+        remove_directory(batch_dir)
+
+    return [results.get(index, np.nan) for index in batch.index]
+
+
+def _split_into_batches(solutions_df: pd.DataFrame, batch_size: int) -> List[pd.DataFrame]:
+    batches = []
+    for _, lang_df in solutions_df.groupby(LANG, sort=False, dropna=False):
+        for start in range(0, lang_df.shape[0], batch_size):
+            batches.append(lang_df.iloc[start:start + batch_size])
+    return batches
+
+
+def _inspect_in_batches(solutions_df: pd.DataFrame, batch_size: int, *args) -> pd.Series:
+    batches = _split_into_batches(solutions_df, batch_size)
+    batches_results = pd.Series(batches, dtype=object).parallel_apply(_inspect_batch, args=args)
+
+    results = {}
+    for batch, batch_results in zip(batches, batches_results):
+        results.update(zip(batch.index, batch_results))
+
+    return pd.Series([results[index] for index in solutions_df.index], index=solutions_df.index)
+
+
 def _is_correct_output_path(output_path: Path) -> bool:
     try:
         output_extension = AnalysisExtension.get_extension_from_file(str(output_path))
@@ -198,17 +442,46 @@ def _is_correct_output_path(output_path: Path) -> bool:
 
 
 def _get_output_path(solutions_file_path: Path, output_path: Optional[Path]) -> Path:
+    output_dir = get_parent_folder(solutions_file_path)
     if output_path is not None:
-        if _is_correct_output_path(output_path):
+        if output_path.is_dir():
+            output_dir = output_path
+        elif _is_correct_output_path(output_path):
             return output_path
-        logger.warning('The output path is not correct. The resulting dataset will be saved next to the original one.')
+        else:
+            logger.warning(
+                'The output path is not correct. The resulting dataset will be saved next to the original one.',
+            )
 
     extension = AnalysisExtension.get_extension_from_file(str(solutions_file_path))
-    output_dir = get_parent_folder(solutions_file_path)
     dataset_name = get_name_from_path(solutions_file_path, with_extension=False)
     return output_dir / f'{dataset_name}_with_raw_issues{extension.value}'
 
 
+def get_inspection_cache(
+        cache_dir: Optional[Path],
+        cache_size_limit: int,
+        allow_duplicates: bool,
+        allow_zero_measure_issues: bool,
+        allow_info_issues: bool,
+        to_save_path: bool,
+) -> Optional[InspectionCache]:
+    if cache_dir is None:
+        return None
+
+    if to_save_path:
+        logger.warning('The inspection cache is not used, since raw issues contain paths to the inspected files.')
+        return None
+
+    flags = {
+        'script': 'get_raw_issues',
+        'allow_duplicates': allow_duplicates,
+        'allow_zero_measure_issues': allow_zero_measure_issues,
+        'allow_info_issues': allow_info_issues,
+    }
+    return InspectionCache(cache_dir, flags, cache_size_limit * MEGABYTE)
+
+
 def inspect_solutions(
         solutions_df: pd.DataFrame,
         solutions_file_path: Path,
@@ -216,19 +489,104 @@ def inspect_solutions(
         allow_zero_measure_issues: bool,
         allow_info_issues: bool,
         to_save_path: bool,
+        cache: Optional[InspectionCache] = None,
+        batch_size: int = 1,
 ) -> pd.DataFrame:
     pandarallel.initialize()
 
-    solutions_df[RAW_ISSUES] = solutions_df.parallel_apply(
-        _inspect_row,
-        args=(solutions_file_path, allow_duplicates, allow_zero_measure_issues, allow_info_issues, to_save_path),
-        axis=1,
-    )
+    args = (solutions_file_path, allow_duplicates, allow_zero_measure_issues, allow_info_issues, to_save_path)
+
+    if batch_size > 1:
+        def inspect(df: pd.DataFrame) -> pd.Series:
+            return _inspect_in_batches(df, batch_size, *args)
+    else:
+        def inspect(df: pd.DataFrame) -> pd.Series:
+            return df.parallel_apply(_inspect_row, args=args, axis=1)
+
+    solutions_df[RAW_ISSUES] = inspect_with_cache(solutions_df, inspect, cache)
 
     return solutions_df
 
 
-def main() -> None:
+def _get_journal_path(output_path: Path) -> Path:
+    return output_path.parent / f'{output_path.name}{JOURNAL_SUFFIX}'
+
+
+def _get_raw_issue_table_path(output_path: Path) -> Path:
+    return output_path.parent / f'{get_name_from_path(output_path, with_extension=False)}{RAW_ISSUE_TABLE_SUFFIX}'
+
+
+def save_raw_issue_table_from_csv(output_path: Path, table_path: Path, chunk_size: int) -> None:
+    with RawIssueTableWriter(table_path) as writer:
+        for chunk in pd.read_csv(output_path, chunksize=chunk_size, usecols=[ID, RAW_ISSUES]):
+            writer.append(chunk[ID], chunk[RAW_ISSUES])
+
+
+def inspect_solutions_in_chunks(
+        solutions_file_path: Path,
+        output_path: Path,
+        chunk_size: int,
+        resume: bool,
+        allow_duplicates: bool,
+        allow_zero_measure_issues: bool,
+        allow_info_issues: bool,
+        to_save_path: bool,
+        cache: Optional[InspectionCache] = None,
+        batch_size: int = 1,
+        input_range: Optional[CsvRange] = None,
+) -> None:
+    """
+    Inspect the csv-file with solutions by chunks and append the results of each chunk to the output csv-file.
+    The ids of the inspected fragments are recorded to the journal, so if `resume` is True, only the fragments that
+    were not inspected in the previous runs are inspected. If `input_range` is specified, only the records from this
+    range of the csv-file are inspected.
+    """
+
+    journal = Journal(_get_journal_path(output_path))
+
+    done_ids, output_size = set(), 0
+    if resume:
+        done_ids, output_size = journal.read()
+        logger.info(f'Resuming the inspection: {len(done_ids)} fragments have already been inspected.')
+    else:
+        journal.clear()
+
+    if output_path.exists():
+        # Discard the results that were written after the last checkpoint
+        os.truncate(output_path, output_size)
+
+    solutions_file = nullcontext(solutions_file_path) if input_range is None \
+        else open_csv_range(solutions_file_path, input_range)
+
+    with solutions_file as solutions:
+        for index, chunk in enumerate(pd.read_csv(solutions, chunksize=chunk_size)):
+            chunk = chunk[~chunk[ID].isin(list(done_ids))]
+            if chunk.empty:
+                continue
+
+            logger.info(f'Inspecting the chunk {index}.')
+
+            chunk = inspect_solutions(
+                chunk,
+                solutions_file_path,
+                allow_duplicates,
+                allow_zero_measure_issues,
+                allow_info_issues,
+                to_save_path,
+                cache,
+                batch_size,
+            )
+
+            if output_size == 0:
+                write_dataframe_to_csv(output_path, chunk)
+            else:
+                append_dataframe_to_csv(output_path, chunk)
+
+            output_size = output_path.stat().st_size
+            journal.append(chunk[ID].tolist(), output_size)
+
+
+def main() -> int:
     parser = argparse.ArgumentParser()
     configure_arguments(parser)
     args = parser.parse_args()
@@ -240,7 +598,56 @@ def main() -> None:
         filename=args.log_output, filemode='w', level=logging.INFO, format='%(asctime)s | %(levelname)s | %(message)s',
     )
 
-    solutions = get_solutions_df_by_file_path(args.solutions_file_path)
+    cache = get_inspection_cache(
+        args.cache_dir,
+        args.cache_size_limit,
+        args.allow_duplicates,
+        args.allow_zero_measure_issues,
+        args.allow_info_issues,
+        args.to_save_path,
+    )
+
+    output_path = _get_output_path(args.solutions_file_path, args.output)
+
+    is_csv_input = AnalysisExtension.get_extension_from_file(str(args.solutions_file_path)) == AnalysisExtension.CSV
+    if args.input_range is not None and not is_csv_input:
+        logger.error('The input range is supported only for csv-files.')
+        return 2
+
+    if args.chunk_size is not None:
+        if not is_csv_input or AnalysisExtension.get_extension_from_file(str(output_path)) != AnalysisExtension.CSV:
+            logger.error('Only csv-files are supported in the chunk mode.')
+            return 2
+
+        logger.info('Dataset inspection by chunks started.')
+
+        inspect_solutions_in_chunks(
+            args.solutions_file_path,
+            output_path,
+            args.chunk_size,
+            args.resume,
+            args.allow_duplicates,
+            args.allow_zero_measure_issues,
+            args.allow_info_issues,
+            args.to_save_path,
+            cache,
+            args.batch_size,
+            args.input_range,
+        )
+
+        logger.info(f'Dataset inspection finished. The results were saved to a file: {output_path}.')
+
+        if args.raw_issues_table:
+            table_path = _get_raw_issue_table_path(output_path)
+            logger.info(f'Saving the raw issues table to a folder: {table_path}.')
+            save_raw_issue_table_from_csv(output_path, table_path, args.chunk_size)
+
+        return 0
+
+    if args.input_range is not None:
+        solutions = read_csv_range(args.solutions_file_path, args.input_range)
+    else:
+        solutions = get_solutions_df_by_file_path(args.solutions_file_path)
 
     logger.info('Dataset inspection started.')
 
@@ -251,19 +658,26 @@ def main() -> None:
         args.allow_zero_measure_issues,
         args.allow_info_issues,
         args.to_save_path,
+        cache,
+        args.batch_size,
     )
 
     logger.info('Dataset inspection finished.')
 
-    output_path = _get_output_path(args.solutions_file_path, args.output)
     output_extension = Extension.get_extension_from_file(str(output_path))
 
     logger.info(f'Saving the dataframe to a file: {output_path}.')
 
     write_df_to_file(solutions_with_raw_issues, output_path, output_extension)
 
+    if args.raw_issues_table:
+        table_path = _get_raw_issue_table_path(output_path)
+        logger.info(f'Saving the raw issues table to a folder: {table_path}.')
+        write_raw_issue_table(table_path, solutions_with_raw_issues[ID], solutions_with_raw_issues[RAW_ISSUES])
+
     logger.info('Saving complete.')
+    return 0
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
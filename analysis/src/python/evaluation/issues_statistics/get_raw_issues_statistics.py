@@ -1,42 +1,40 @@
 import argparse
-import json
 import logging
 import sys
-from collections import Counter
-from json import JSONDecodeError
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Optional, Union
 
 sys.path.append('')
 sys.path.append('../../..')
 
+import numpy as np
 import pandas as pd
-from pandarallel import pandarallel
 from hyperstyle.src.python.review.application_config import LanguageVersion
 from hyperstyle.src.python.review.common.file_system import Extension, get_total_code_lines_from_code
 from hyperstyle.src.python.review.common.language import Language
-from hyperstyle.src.python.review.inspectors.issue import BaseIssue, ISSUE_TYPE_TO_CLASS, IssueType, Measurable
+from hyperstyle.src.python.review.inspectors.issue import ISSUE_TYPE_TO_CLASS, IssueData, IssueType, Measurable
 from hyperstyle.src.python.review.quality.rules.code_style_scoring import CodeStyleRule
 from hyperstyle.src.python.review.quality.rules.line_len_scoring import LineLengthRule
-from hyperstyle.src.python.review.reviewers.utils.code_statistics import get_code_style_lines
 from analysis.src.python.evaluation.common.pandas_util import get_solutions_df_by_file_path, write_df_to_file
 from analysis.src.python.evaluation.common.csv_util import ColumnName
-from analysis.src.python.evaluation.common.file_util import get_parent_folder
-from analysis.src.python.evaluation.issues_statistics.common.raw_issue_encoder_decoder import RawIssueDecoder
+from analysis.src.python.evaluation.common.file_util import AnalysisExtension, get_parent_folder
+from analysis.src.python.evaluation.issues_statistics.common.partial_statistics import PartialStats, save_partial_stats
+from analysis.src.python.evaluation.issues_statistics.common.raw_issue_encoder_decoder import (
+    decode_raw_issues_to_flat_table, MEASURE,
+)
 from analysis.src.python.evaluation.issues_statistics.get_raw_issues import RAW_ISSUES
 
 ID = ColumnName.ID.value
 LANG = ColumnName.LANG.value
 CODE = ColumnName.CODE.value
 
-CODE_STYLE_LINES = f'{IssueType.CODE_STYLE.value}_lines'
 CODE_STYLE_RATIO = f'{IssueType.CODE_STYLE.value}_ratio'
-LINE_LEN_NUMBER = f'{IssueType.LINE_LEN.value}_number'
 LINE_LEN_RATIO = f'{IssueType.LINE_LEN.value}_ratio'
 TOTAL_LINES = 'total_lines'
 VALUE = 'value'
 
 OUTPUT_DF_NAME = 'stats'
+PARTIAL_STATS_FILE_NAME = 'partial_stats.json'
 DEFAULT_OUTPUT_FOLDER_NAME = 'raw_issues_statistics'
 
 logger = logging.getLogger(__name__)
@@ -57,6 +55,14 @@ def configure_arguments(parser: argparse.ArgumentParser) -> None:
              'If not specified, the datasets will be saved in the folder next to the original one.',
     )
 
+    parser.add_argument(
+        '--partial',
+        action='store_true',
+        help=f'Save partial statistics to the "{PARTIAL_STATS_FILE_NAME}" file in the output folder '
+             f'instead of the datasets with statistics. Partial statistics of several datasets can be merged '
+             f'with reduce_raw_issues_statistics.py.',
+    )
+
     parser.add_argument(
         '-l', '--log-output',
         type=lambda value: Path(value).absolute(),
@@ -80,108 +86,168 @@ def _convert_language_code_to_language(fragment_id: str, language_code: str) ->
     return language.value
 
 
-def _extract_stats_from_issues(row: pd.Series) -> pd.Series:
-    print(f'{row[ID]}: extracting stats.')
+def _convert_ratio_to_int(ratio: float):
+    """
+    Round the ratio to 2 decimal places, multiply by 100, and take the integer part.
+    """
+    return int((round(ratio, 2) * 100))
 
-    if pd.isnull(row[CODE]):
-        logger.warning(f'{row[ID]}: no code.')
-        row[CODE] = ""
 
-    if pd.isnull(row[LANG]):
-        logger.warning(f'{row[ID]}: no lang.')
-        row[LANG] = ""
+def _get_int_ratios(
+        numerators: np.ndarray,
+        denominators: np.ndarray,
+        get_ratio: Callable[[int, int], float],
+) -> np.ndarray:
+    """
+    Calculate the ratios with the `get_ratio` function and convert them to int.
+    There are few unique pairs of the numerator and the denominator, so the function is called once for each pair.
+    """
 
-    try:
-        issues: List[BaseIssue] = json.loads(row[RAW_ISSUES], cls=RawIssueDecoder)
-    except (JSONDecodeError, TypeError):
-        logger.warning(f'{row[ID]}: failed to decode issues.')
-        issues: List[BaseIssue] = []
+    pairs, inverse = np.unique(np.stack([numerators, denominators]), axis=1, return_inverse=True)
+    ratios = np.array(
+        [_convert_ratio_to_int(get_ratio(int(numerator), int(denominator))) for numerator, denominator in pairs.T],
+        dtype=np.int64,
+    )
+    return ratios[inverse.reshape(-1)]
 
-    counter = Counter([issue.type for issue in issues])
 
-    for issue_type, issue_class in ISSUE_TYPE_TO_CLASS.items():
-        if issubclass(issue_class, Measurable):
-            row[issue_type.value] = [issue.measure() for issue in issues if isinstance(issue, issue_class)]
-        else:
-            row[issue_type.value] = counter[issue_type]
+def _get_value_counts(values: np.ndarray, name: str) -> pd.Series:
+    unique_values, counts = np.unique(values, return_counts=True)
 
-    row[CODE_STYLE_LINES] = get_code_style_lines(issues)
-    row[LINE_LEN_NUMBER] = counter[IssueType.LINE_LEN]
-    row[TOTAL_LINES] = get_total_code_lines_from_code(row[CODE])
+    # Measures are decoded as floats, but usually they are integers
+    if unique_values.dtype.kind == 'f' and np.all(np.mod(unique_values, 1) == 0):
+        unique_values = unique_values.astype(np.int64)
 
-    row[LANG] = _convert_language_code_to_language(row[ID], row[LANG])
+    return pd.Series(counts, index=unique_values, name=name)
 
-    print(f'{row[ID]}: extraction of statistics is complete.')
 
-    return row
+def _get_languages(solutions_with_raw_issues: pd.DataFrame) -> pd.Series:
+    language_codes = solutions_with_raw_issues[LANG]
+    for fragment_id in solutions_with_raw_issues.loc[language_codes.isnull(), ID]:
+        logger.warning(f'{fragment_id}: no lang.')
+    language_codes = language_codes.fillna('').astype(str)
 
+    # The language is determined once for each language code
+    first_ids = solutions_with_raw_issues[ID].groupby(language_codes, sort=False).first()
+    code_to_language = {
+        language_code: _convert_language_code_to_language(fragment_id, language_code)
+        for language_code, fragment_id in first_ids.items()
+    }
 
-def _convert_ratio_to_int(ratio: float):
+    return language_codes.map(code_to_language)
+
+
+def _get_total_lines(solutions_with_raw_issues: pd.DataFrame) -> np.ndarray:
+    code = solutions_with_raw_issues[CODE]
+    for fragment_id in solutions_with_raw_issues.loc[code.isnull(), ID]:
+        logger.warning(f'{fragment_id}: no code.')
+
+    return code.fillna('').astype(str).map(get_total_code_lines_from_code).to_numpy(dtype=np.int64)
+
+
+def get_partial_stats(solutions_with_raw_issues: pd.DataFrame) -> PartialStats:
     """
-    Round the ratio to 2 decimal places, multiply by 100, and take the integer part.
+    Calculate value distributions of the statistics for each language.
+    Raw issues are decoded into flat arrays, so all statistics are calculated with numpy operations over the arrays.
+
+    :return: for each language, the value counts of each statistic. Such statistics of several datasets
+             can be merged with `merge_partial_stats`.
     """
-    return int((round(ratio, 2) * 100))
 
+    n_fragments = solutions_with_raw_issues.shape[0]
 
-def _group_stats_by_lang(df_with_stats: pd.DataFrame) -> Dict[str, pd.DataFrame]:
-    logger.info('The grouping of statistics by language has started.')
+    languages = _get_languages(solutions_with_raw_issues)
+    total_lines = _get_total_lines(solutions_with_raw_issues)
 
-    result = {}
+    logger.info('Decoding of raw issues has started.')
 
-    df_grouped_by_lang = df_with_stats.groupby(LANG)
-    for lang in df_grouped_by_lang.groups:
-        logger.info(f'"{lang}" statistics grouping started.')
+    flat_issues = decode_raw_issues_to_flat_table(
+        solutions_with_raw_issues[RAW_ISSUES], [IssueData.ISSUE_TYPE.value, IssueData.LINE_NUMBER.value, MEASURE],
+    )
+    for fragment_id in solutions_with_raw_issues[ID].to_numpy()[~flat_issues.is_decoded]:
+        logger.warning(f'{fragment_id}: failed to decode issues.')
+
+    logger.info('Decoding of raw issues has finished.')
+
+    fragment_index = flat_issues.fragment_index
+    issue_type_codes = flat_issues.fields[IssueData.ISSUE_TYPE.value]
+    issue_type_to_code = {
+        issue_type: code for code, issue_type in enumerate(flat_issues.dictionaries[IssueData.ISSUE_TYPE.value])
+    }
+
+    def get_issue_type_mask(issue_type: IssueType) -> np.ndarray:
+        return issue_type_codes == issue_type_to_code.get(issue_type.value, -1)
+
+    issue_counts = {
+        issue_type: np.bincount(fragment_index[get_issue_type_mask(issue_type)], minlength=n_fragments)
+        for issue_type in ISSUE_TYPE_TO_CLASS.keys()
+    }
+
+    # The number of lines with code style issues is the number of unique (fragment, line) pairs
+    code_style_mask = get_issue_type_mask(IssueType.CODE_STYLE)
+    code_style_pairs = np.unique(
+        np.stack([fragment_index[code_style_mask], flat_issues.fields[IssueData.LINE_NUMBER.value][code_style_mask]]),
+        axis=1,
+    )
+    code_style_lines = np.bincount(code_style_pairs[0], minlength=n_fragments)
 
-        lang_group = df_grouped_by_lang.get_group(lang)
+    line_len_ratio = _get_int_ratios(issue_counts[IssueType.LINE_LEN], total_lines, LineLengthRule.get_ratio)
 
-        columns_with_stats = []
+    language_codes, unique_languages = pd.factorize(languages)
+    issue_language_codes = language_codes[fragment_index]
 
-        for issue_type, issue_class in ISSUE_TYPE_TO_CLASS.items():
-            column = lang_group[issue_type.value]
-            if issubclass(issue_class, Measurable):
-                column = column.explode()
-            columns_with_stats.append(column.value_counts())
+    result = {}
+    for language_code, lang in sorted(enumerate(unique_languages), key=lambda item: item[1]):
+        logger.info(f'"{lang}" statistics grouping started.')
 
-        columns_with_stats.append(lang_group[TOTAL_LINES].value_counts())
+        lang_mask = language_codes == language_code
+        lang_issue_mask = issue_language_codes == language_code
 
-        line_len_ratio_column = lang_group.apply(
-            lambda row: LineLengthRule.get_ratio(row[LINE_LEN_NUMBER], row[TOTAL_LINES]),
-            axis=1,
-        )
-        line_len_ratio_column = line_len_ratio_column.apply(_convert_ratio_to_int)
-        line_len_ratio_column.name = LINE_LEN_RATIO
-        columns_with_stats.append(line_len_ratio_column.value_counts())
-
-        code_style_ratio_column = lang_group.apply(
-            lambda row: CodeStyleRule.get_ratio(
-                row[CODE_STYLE_LINES], row[TOTAL_LINES], Language.from_value(str(lang), default=Language.UNKNOWN),
-            ),
-            axis=1,
+        value_counts = {}
+        for issue_type, issue_class in ISSUE_TYPE_TO_CLASS.items():
+            if issubclass(issue_class, Measurable):
+                measures = flat_issues.fields[MEASURE][lang_issue_mask & get_issue_type_mask(issue_type)]
+                value_counts[issue_type.value] = _get_value_counts(measures, issue_type.value)
+            else:
+                counts = issue_counts[issue_type][lang_mask]
+                value_counts[issue_type.value] = _get_value_counts(counts, issue_type.value)
+
+        value_counts[TOTAL_LINES] = _get_value_counts(total_lines[lang_mask], TOTAL_LINES)
+        value_counts[LINE_LEN_RATIO] = _get_value_counts(line_len_ratio[lang_mask], LINE_LEN_RATIO)
+
+        language = Language.from_value(str(lang), default=Language.UNKNOWN)
+        code_style_ratio = _get_int_ratios(
+            code_style_lines[lang_mask],
+            total_lines[lang_mask],
+            lambda n_code_style_lines, n_lines: CodeStyleRule.get_ratio(n_code_style_lines, n_lines, language),
         )
-        code_style_ratio_column = code_style_ratio_column.apply(_convert_ratio_to_int)
-        code_style_ratio_column.name = CODE_STYLE_RATIO
-        columns_with_stats.append(code_style_ratio_column.value_counts())
+        value_counts[CODE_STYLE_RATIO] = _get_value_counts(code_style_ratio, CODE_STYLE_RATIO)
 
-        stats = pd.concat(columns_with_stats, axis=1).fillna(0).astype(int)
+        result[str(lang)] = value_counts
+        logger.info(f'"{lang}" statistics grouping finished.')
 
-        # Put values in a separate column
-        stats.index.name = VALUE
-        stats.reset_index(inplace=True)
+    return result
 
-        result[str(lang)] = stats
-        logger.info(f'"{lang}" statistics grouping finished.')
 
-    logger.info('The grouping of statistics by language has finished.')
+def build_stats(value_counts: Dict[str, pd.Series]) -> pd.DataFrame:
+    stats = pd.concat(value_counts.values(), axis=1).sort_index().fillna(0).astype(int)
 
-    return result
+    # Put values in a separate column
+    stats.index.name = VALUE
+    stats.reset_index(inplace=True)
+
+    return stats
 
 
 def inspect_raw_issues(solutions_with_raw_issues: pd.DataFrame) -> Dict[str, pd.DataFrame]:
-    pandarallel.initialize()
+    logger.info('The grouping of statistics by language has started.')
 
-    solutions_with_raw_issues = solutions_with_raw_issues.parallel_apply(_extract_stats_from_issues, axis=1)
+    value_counts_by_lang = get_partial_stats(solutions_with_raw_issues)
+    result = {lang: build_stats(value_counts) for lang, value_counts in value_counts_by_lang.items()}
 
-    return _group_stats_by_lang(solutions_with_raw_issues)
+    logger.info('The grouping of statistics by language has finished.')
+
+    return result
 
 
 def _get_output_folder(solutions_file_path: Path, output_folder: Optional[Path]):
@@ -191,10 +257,21 @@ def _get_output_folder(solutions_file_path: Path, output_folder: Optional[Path])
     return get_parent_folder(solutions_file_path) / DEFAULT_OUTPUT_FOLDER_NAME
 
 
+def _get_partial_output_path(solutions_file_path: Path, output_folder: Optional[Path]) -> Path:
+    return _get_output_folder(solutions_file_path, output_folder) / PARTIAL_STATS_FILE_NAME
+
+
 def _save_stats(stats_by_lang: Dict[str, pd.DataFrame], solutions_file_path: Path, output_path: Optional[Path]) -> None:
     output_folder = _get_output_folder(solutions_file_path, output_path)
     output_extension = Extension.get_extension_from_file(str(solutions_file_path))
+    save_stats(stats_by_lang, output_folder, output_extension)
+
 
+def save_stats(
+        stats_by_lang: Dict[str, pd.DataFrame],
+        output_folder: Path,
+        output_extension: Union[Extension, AnalysisExtension],
+) -> None:
     logger.info(f'Saving statistics to a folder: {output_folder}.')
 
     for lang, stats in stats_by_lang.items():
@@ -221,8 +298,17 @@ if __name__ == "__main__":
 
     logger.info("Dataset inspection started.")
 
-    stats_by_lang = inspect_raw_issues(solutions_with_raw_issues)
+    if args.partial:
+        partial_stats = get_partial_stats(solutions_with_raw_issues)
+
+        logger.info("Dataset inspection finished.")
+
+        partial_output = _get_partial_output_path(args.solutions_with_raw_issues, args.output)
+        logger.info(f'Saving partial statistics to a file: {partial_output}.')
+        save_partial_stats(partial_stats, partial_output)
+    else:
+        stats_by_lang = inspect_raw_issues(solutions_with_raw_issues)
 
-    logger.info("Dataset inspection finished.")
+        logger.info("Dataset inspection finished.")
 
-    _save_stats(stats_by_lang, args.solutions_with_raw_issues, args.output)
+        _save_stats(stats_by_lang, args.solutions_with_raw_issues, args.output)
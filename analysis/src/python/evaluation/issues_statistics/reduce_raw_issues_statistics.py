@@ -0,0 +1,96 @@
+import argparse
+import logging
+import sys
+from pathlib import Path
+from typing import Dict
+
+sys.path.append('')
+sys.path.append('../../..')
+
+import pandas as pd
+from analysis.src.python.evaluation.common.file_util import AnalysisExtension, get_parent_folder
+from analysis.src.python.evaluation.issues_statistics.common.partial_statistics import (
+    merge_partial_stats, PartialStats, read_partial_stats, save_partial_stats,
+)
+from analysis.src.python.evaluation.issues_statistics.get_raw_issues_statistics import (
+    build_stats, DEFAULT_OUTPUT_FOLDER_NAME, save_stats,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def configure_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        'partial_stats',
+        type=lambda value: Path(value).absolute(),
+        nargs='+',
+        help='Paths to json-files with partial statistics, which were received with get_raw_issues_statistics.py.',
+    )
+
+    parser.add_argument(
+        '-o', '--output',
+        type=lambda value: Path(value).absolute(),
+        help='Path to the folder where datasets with statistics will be saved. '
+             'If not specified, the datasets will be saved in the folder next to the first file '
+             'with partial statistics.',
+    )
+
+    parser.add_argument(
+        '--output-extension',
+        type=str,
+        choices=[AnalysisExtension.CSV.value, AnalysisExtension.XLSX.value],
+        default=AnalysisExtension.CSV.value,
+        help='Extension of the datasets with statistics. By default, csv-files are saved.',
+    )
+
+    parser.add_argument(
+        '--partial-output',
+        type=lambda value: Path(value).absolute(),
+        help='Path to the json-file where the merged partial statistics will be saved. '
+             'It can be merged later with new partial statistics.',
+    )
+
+    parser.add_argument(
+        '-l', '--log-output',
+        type=lambda value: Path(value).absolute(),
+        help='Path where logs will be stored. If not specified, then logs will be output to stderr.',
+    )
+
+
+def reduce_partial_stats(partial_stats: PartialStats) -> Dict[str, pd.DataFrame]:
+    return {lang: build_stats(value_counts) for lang, value_counts in partial_stats.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    configure_arguments(parser)
+    args = parser.parse_args()
+
+    if args.log_output is not None:
+        args.log_output.parent.mkdir(parents=True, exist_ok=True)
+
+    logging.basicConfig(
+        filename=args.log_output, filemode='w', level=logging.INFO, format='%(asctime)s | %(levelname)s | %(message)s',
+    )
+
+    logger.info(f'Merging of {len(args.partial_stats)} partial statistics started.')
+
+    partial_stats = merge_partial_stats([read_partial_stats(path) for path in args.partial_stats])
+
+    logger.info('Merging of partial statistics finished.')
+
+    if args.partial_output is not None:
+        logger.info(f'Saving merged partial statistics to a file: {args.partial_output}.')
+        save_partial_stats(partial_stats, args.partial_output)
+
+    stats_by_lang = reduce_partial_stats(partial_stats)
+
+    output_folder = args.output
+    if output_folder is None:
+        output_folder = get_parent_folder(args.partial_stats[0]) / DEFAULT_OUTPUT_FOLDER_NAME
+
+    save_stats(stats_by_lang, output_folder, AnalysisExtension(args.output_extension))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+from pathlib import Path
+
+import pandas as pd
+from analysis.src.python.data_analysis.model.column_name import SubmissionColumns
+from analysis.src.python.data_analysis.preprocessing.build_submissions_series import (
+    build_submission_series, filter_submissions_series,
+)
+
+ID = SubmissionColumns.ID.value
+USER_ID = SubmissionColumns.USER_ID.value
+STEP_ID = SubmissionColumns.STEP_ID.value
+GROUP = SubmissionColumns.GROUP.value
+CODE = SubmissionColumns.CODE.value
+TIME = SubmissionColumns.TIME.value
+ATTEMPT = SubmissionColumns.ATTEMPT.value
+LAST_ATTEMPT = SubmissionColumns.LAST_ATTEMPT.value
+
+DIFF_RATIO = 30.0
+
+# Each submission is compared with the previous submission of its series, even if the previous one is dropped
+SUBMISSIONS = [
+    # id, group, minute, code, is kept
+    (1, 0, 1, 'abc', True),
+    (2, 0, 2, ' abc \n', False),  # the same code up to whitespaces
+    (3, 0, 3, 'd' * 180, True),  # length ratio is 6 / 180, exactly 1 / `DIFF_RATIO`
+    (4, 0, 4, 'e' * 6, True),  # length ratio is 180 / 6, exactly `DIFF_RATIO`
+    (5, 0, 5, 'f' * 181, False),  # length ratio is 6 / 181
+    (6, 0, 6, 'g' * 6, False),  # length ratio is 181 / 6
+    (7, 0, 7, 'h' * 10, True),
+    (8, 1, 1, 'h' * 10, True),  # the same code as in the previous row, but in another series
+    (9, 1, 2, 'h' * 10 + '\n', False),
+    (10, 2, 1, 'print(1)', True),
+]
+
+EXPECTED_ATTEMPTS = {
+    1: (1, 4),
+    3: (2, 4),
+    4: (3, 4),
+    7: (4, 4),
+    8: (1, 1),
+    10: (1, 1),
+}
+
+
+def _get_submissions_df() -> pd.DataFrame:
+    df = pd.DataFrame([
+        {ID: submission_id, GROUP: group, TIME: f'2021-01-01 10:{minute:02d}:00', CODE: code}
+        for submission_id, group, minute, code, _ in SUBMISSIONS
+    ])
+    # Submissions are sorted by time while filtering
+    return df.iloc[::-1].reset_index(drop=True)
+
+
+def _get_attempts(df: pd.DataFrame):
+    return {row[ID]: (row[ATTEMPT], row[LAST_ATTEMPT]) for _, row in df.iterrows()}
+
+
+def test_filter_submissions_series():
+    df_filtered = filter_submissions_series(_get_submissions_df(), DIFF_RATIO)
+
+    assert df_filtered[ID].tolist() == [submission[0] for submission in SUBMISSIONS if submission[4]]
+    assert _get_attempts(df_filtered) == EXPECTED_ATTEMPTS
+
+
+def test_build_submission_series(tmp_path: Path):
+    df = _get_submissions_df()
+    df[USER_ID] = df[GROUP] // 2
+    df[STEP_ID] = df[GROUP] % 2
+    submissions_path = tmp_path / 'submissions.csv'
+    df.drop(columns=[GROUP]).to_csv(submissions_path, index=False)
+
+    output_path = tmp_path / 'submissions_series.csv'
+    build_submission_series(str(submissions_path), str(output_path), DIFF_RATIO)
+
+    df_series = pd.read_csv(output_path)
+    assert _get_attempts(df_series) == EXPECTED_ATTEMPTS
+    assert df_series.groupby(GROUP)[ID].apply(list).tolist() == [[1, 3, 4, 7], [8], [10]]
@@ -0,0 +1,92 @@
+import json
+import random
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from analysis.src.python.data_analysis.model.column_name import SubmissionColumns
+from analysis.src.python.data_analysis.utils.statistics_utils import (
+    get_statistics_by_group, get_statistics_by_group_from_csv,
+)
+
+ID = SubmissionColumns.ID.value
+GROUP = SubmissionColumns.GROUP.value
+ATTEMPT = SubmissionColumns.ATTEMPT.value
+CLIENT = SubmissionColumns.CLIENT.value
+
+
+def _get_submissions_df(groups_count: int = 100, submissions_count: int = 1000) -> pd.DataFrame:
+    rnd = random.Random(0)
+    return pd.DataFrame([
+        {
+            ID: i,
+            GROUP: rnd.randrange(groups_count),
+            ATTEMPT: rnd.randint(1, 10),
+            CLIENT: rnd.choice(['web', 'idea']),
+        }
+        for i in range(submissions_count)
+    ])
+
+
+def get_client_series(series: pd.DataFrame) -> pd.Series:
+    series = series.sort_values([ATTEMPT, ID])
+    return pd.Series({
+        ID: series[ID].values[0],
+        CLIENT: json.dumps(list(series[CLIENT].values)),
+    })
+
+
+def _get_expected_statistics(tmp_path: Path) -> bytes:
+    """ Statistics which are calculated sequentially in one chunk. """
+
+    statistics_path = tmp_path / 'expected_statistics.csv'
+    get_statistics_by_group(_get_submissions_df(), str(statistics_path), 1000, get_client_series)
+    return statistics_path.read_bytes()
+
+
+def test_get_statistics_by_group(tmp_path: Path):
+    df = _get_submissions_df()
+    statistics_path = tmp_path / 'statistics.csv'
+    get_statistics_by_group(df, str(statistics_path), 7, get_client_series)
+
+    df_statistics = pd.read_csv(statistics_path)
+    df_expected = df.groupby(GROUP).apply(get_client_series).reset_index(drop=True)
+    assert df_statistics[ID].tolist() == df_expected[ID].tolist()
+    assert df_statistics[CLIENT].tolist() == df_expected[CLIENT].tolist()
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 100])
+@pytest.mark.parametrize('jobs', [1, 3])
+def test_get_statistics_by_group_in_parallel(tmp_path: Path, chunk_size: int, jobs: int):
+    expected_statistics = _get_expected_statistics(tmp_path)
+    statistics_path = tmp_path / 'statistics.csv'
+    get_statistics_by_group(_get_submissions_df(), str(statistics_path), chunk_size, get_client_series, jobs)
+
+    assert statistics_path.read_bytes() == expected_statistics
+    # Partial results are removed
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['expected_statistics.csv', 'statistics.csv']
+
+
+@pytest.mark.parametrize(('chunk_size', 'rows_chunk_size'), [(1, 1), (7, 5), (7, 97), (13, 10000)])
+@pytest.mark.parametrize('jobs', [1, 3])
+def test_get_statistics_by_group_from_csv(tmp_path: Path, chunk_size: int, rows_chunk_size: int, jobs: int):
+    expected_statistics = _get_expected_statistics(tmp_path)
+    submissions_path = tmp_path / 'submissions.csv'
+    _get_submissions_df().sort_values(GROUP, kind='mergesort').to_csv(submissions_path, index=False)
+
+    statistics_path = tmp_path / 'statistics.csv'
+    get_statistics_by_group_from_csv(
+        str(submissions_path), str(statistics_path), chunk_size, get_client_series, jobs, rows_chunk_size,
+    )
+
+    assert statistics_path.read_bytes() == expected_statistics
+
+
+def test_get_statistics_by_group_from_unsorted_csv(tmp_path: Path):
+    submissions_path = tmp_path / 'submissions.csv'
+    _get_submissions_df().to_csv(submissions_path, index=False)
+
+    with pytest.raises(ValueError):
+        get_statistics_by_group_from_csv(
+            str(submissions_path), str(tmp_path / 'statistics.csv'), 10, get_client_series, rows_chunk_size=100,
+        )
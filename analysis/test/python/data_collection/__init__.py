@@ -0,0 +1,35 @@
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+from analysis.src.python.data_collection.api.platform_objects import Platform
+from analysis.src.python.data_collection.benchmark.fake_platform import FakePlatformConfig, FakePlatformServer
+from analysis.src.python.data_collection.benchmark.run_benchmark import benchmark_client
+from analysis.src.python.data_collection.hyperskill.hyperskill_client import HyperskillClient
+from analysis.src.python.data_collection.stepik.stepik_client import StepikClient
+
+
+@contextmanager
+def run_fake_platform(config: FakePlatformConfig) -> Iterator[FakePlatformServer]:
+    """ Runs fake platform in a background thread while the context is active. """
+
+    server = FakePlatformServer(config)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def create_hyperskill_client(server: FakePlatformServer, workers: int = 1) -> HyperskillClient:
+    client = benchmark_client[Platform.HYPERSKILL](workers=workers)
+    client.host = server.url
+    return client
+
+
+def create_stepik_client(server: FakePlatformServer, workers: int = 1) -> StepikClient:
+    client = benchmark_client[Platform.STEPIK](workers=workers)
+    client.host = server.url
+    return client
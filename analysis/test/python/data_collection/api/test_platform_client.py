@@ -0,0 +1,180 @@
+import random
+import time
+from dataclasses import replace
+from email.utils import formatdate
+from typing import Callable, List
+from urllib.parse import urlparse
+
+import pytest
+import requests
+from analysis.src.python.data_collection.api.platform_client import PageQuery, PlatformClient
+from analysis.src.python.data_collection.api.platform_objects import BaseRequestParams, Object, Platform
+from analysis.src.python.data_collection.benchmark.fake_platform import FakePlatformConfig
+from analysis.src.python.data_collection.hyperskill.api.submissions import SubmissionRequestParams, SubmissionResponse
+from analysis.src.python.data_collection.hyperskill.api.topics import TopicsResponse
+from analysis.src.python.data_collection.hyperskill.hyperskill_objects import ObjectClass
+from analysis.test.python.data_collection import create_hyperskill_client, create_stepik_client, run_fake_platform
+
+OBJECTS_COUNT = 250
+PAGE_SIZE = 20
+
+CONFIG = FakePlatformConfig(objects_count=OBJECTS_COUNT, max_page_size=PAGE_SIZE)
+
+
+def _get_ids(objects: List[Object]) -> List[int]:
+    return [obj.id for obj in objects]
+
+
+def _shuffle_completion(client: PlatformClient, seed: int = 0):
+    """ Delays requests of the client randomly, so pages are received out of order. """
+
+    rnd = random.Random(seed)
+    fetch_page = client._fetch_page
+
+    def delayed_fetch_page(*args):
+        time.sleep(rnd.random() * 0.02)
+        return fetch_page(*args)
+
+    client._fetch_page = delayed_fetch_page
+
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_pages_are_returned_in_order(workers: int):
+    with run_fake_platform(CONFIG) as server:
+        client = create_hyperskill_client(server, workers)
+        _shuffle_completion(client)
+        queries = [PageQuery(BaseRequestParams(page_size=PAGE_SIZE)), PageQuery(BaseRequestParams(page_size=7))]
+        objects = client._get_objects_by_queries(ObjectClass.TOPIC, TopicsResponse, queries)
+
+    expected_ids = list(range(1, OBJECTS_COUNT + 1)) + list(range(1, OBJECTS_COUNT + 1))
+    assert _get_ids(objects) == expected_ids
+
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_pages_are_passed_to_sink_in_order(workers: int):
+    with run_fake_platform(CONFIG) as server:
+        client = create_hyperskill_client(server, workers)
+        _shuffle_completion(client)
+        pages = []
+        client.sink = lambda obj_class, objects: pages.append(_get_ids(objects))
+        objects = client._get_objects_by_queries(
+            ObjectClass.TOPIC, TopicsResponse, [PageQuery(BaseRequestParams(page_size=PAGE_SIZE))],
+        )
+
+    assert objects == []
+    assert pages == [list(range(start, min(start + PAGE_SIZE, OBJECTS_COUNT + 1)))
+                     for start in range(1, OBJECTS_COUNT + 1, PAGE_SIZE)]
+
+
+@pytest.mark.parametrize('count', [1, 20, 45, OBJECTS_COUNT, OBJECTS_COUNT + 10])
+def test_exact_count(count: int):
+    with run_fake_platform(CONFIG) as server:
+        client = create_hyperskill_client(server, workers=4)
+        _shuffle_completion(client)
+        objects = client._get_objects_by_queries(
+            ObjectClass.TOPIC, TopicsResponse, [PageQuery(BaseRequestParams(page_size=PAGE_SIZE))], count=count,
+        )
+
+    assert _get_ids(objects) == list(range(1, min(count, OBJECTS_COUNT) + 1))
+
+
+def test_exact_count_by_ids():
+    ids = list(range(OBJECTS_COUNT, 0, -3))
+    with run_fake_platform(CONFIG) as server:
+        client = create_hyperskill_client(server, workers=4)
+        objects = client._get_objects(ObjectClass.TOPIC, TopicsResponse,
+                                      BaseRequestParams(page_size=PAGE_SIZE, ids=ids), count=50)
+
+    assert _get_ids(objects) == ids[:50]
+
+
+IDS_QUERY_TEST_DATA = [
+    (Platform.HYPERSKILL, create_hyperskill_client, 'ids=5%2C3%2C8'),
+    (Platform.STEPIK, create_stepik_client, 'ids%5B%5D=5&ids%5B%5D=3&ids%5B%5D=8'),
+]
+
+
+@pytest.mark.parametrize(('platform', 'create_client', 'expected_ids_query'), IDS_QUERY_TEST_DATA)
+def test_ids_query(platform: Platform, create_client: Callable, expected_ids_query: str):
+    ids = [5, 3, 8]
+    with run_fake_platform(replace(CONFIG, platform=platform)) as server:
+        client = create_client(server)
+        queries = []
+        get = client.session.get
+
+        def recording_get(*args, **kwargs) -> requests.Response:
+            response = get(*args, **kwargs)
+            queries.append(urlparse(response.url).query)
+            return response
+
+        client.session.get = recording_get
+        objects = client.get_steps(ids)
+
+    assert _get_ids(objects) == ids
+    assert queries == [f'page=1&page_size=1000&{expected_ids_query}']
+
+
+def test_retries_throttled_requests():
+    config = FakePlatformConfig(objects_count=OBJECTS_COUNT, max_page_size=PAGE_SIZE, throttle_rate=0.2, seed=1)
+    with run_fake_platform(config) as server:
+        client = create_hyperskill_client(server, workers=4)
+        objects = client._get_objects_by_queries(
+            ObjectClass.TOPIC, TopicsResponse, [PageQuery(BaseRequestParams(page_size=PAGE_SIZE))],
+        )
+        statistics = server.get_statistics()
+
+    assert _get_ids(objects) == list(range(1, OBJECTS_COUNT + 1))
+    assert statistics['throttled'] > 0
+
+
+def test_retry_after_pauses_requests():
+    config = FakePlatformConfig(objects_count=10, max_page_size=PAGE_SIZE, throttle_rate=0.5, retry_after=1, seed=1)
+    with run_fake_platform(config) as server:
+        client = create_hyperskill_client(server)
+        start = time.perf_counter()
+        objects = client._get_objects_by_queries(
+            ObjectClass.TOPIC, TopicsResponse, [PageQuery(BaseRequestParams(page_size=PAGE_SIZE))],
+        )
+        seconds = time.perf_counter() - start
+        throttled = server.get_statistics()['throttled']
+
+    assert _get_ids(objects) == list(range(1, 11))
+    assert throttled > 0
+    assert seconds >= throttled
+
+
+RETRY_DELAY_TEST_DATA = [
+    ({'Retry-After': '3'}, 0, 3.0),
+    ({}, 0, 1.0),
+    ({}, 2, 4.0),
+    ({}, 10, 60.0),
+    ({'Retry-After': 'unknown'}, 1, 2.0),
+]
+
+
+@pytest.mark.parametrize(('headers', 'attempt', 'expected_delay'), RETRY_DELAY_TEST_DATA)
+def test_get_retry_delay(headers, attempt: int, expected_delay: float):
+    response = requests.Response()
+    response.headers.update(headers)
+    assert PlatformClient._get_retry_delay(response, attempt) == expected_delay
+
+
+def test_get_retry_delay_by_date():
+    response = requests.Response()
+    response.headers['Retry-After'] = formatdate(time.time() + 30, usegmt=True)
+    assert 25 <= PlatformClient._get_retry_delay(response, 0) <= 30
+
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_is_new_stops_paging(workers: int):
+    watermark = 130
+    with run_fake_platform(CONFIG) as server:
+        client = create_hyperskill_client(server, workers)
+        _shuffle_completion(client)
+        query = PageQuery(SubmissionRequestParams(page_size=PAGE_SIZE), is_new=lambda obj: obj.id > watermark)
+        objects = client._get_objects_by_queries(ObjectClass.SUBMISSION, SubmissionResponse, [query])
+        requests_count = server.get_statistics()['requests']
+
+    # Submissions are returned from the newest to the oldest, the 7th page contains the watermark
+    assert _get_ids(objects) == list(range(OBJECTS_COUNT, watermark, -1))
+    assert requests_count <= 7 + workers
@@ -0,0 +1,36 @@
+from pathlib import Path
+
+import pytest
+from analysis.src.python.data_collection.api.sync_state import SyncState
+from analysis.src.python.data_collection.benchmark.fake_platform import FakePlatformConfig
+from analysis.test.python.data_collection import create_hyperskill_client, run_fake_platform
+
+PAGE_SIZE = 20
+FIRST_RUN_COUNT = 250
+SECOND_RUN_COUNT = 300
+
+
+@pytest.mark.parametrize('newest_first', [True, False])
+@pytest.mark.parametrize('workers', [1, 4])
+def test_sync_submissions(tmp_path: Path, newest_first: bool, workers: int):
+    sync_state = SyncState(str(tmp_path / 'sync_state.json'))
+
+    def sync(objects_count: int):
+        config = FakePlatformConfig(objects_count=objects_count, max_page_size=PAGE_SIZE, newest_first=newest_first)
+        with run_fake_platform(config) as server:
+            submissions = create_hyperskill_client(server, workers).get_submissions(sync_state=sync_state)
+            return sorted(submission.id for submission in submissions), server.get_statistics()['requests']
+
+    ids, _ = sync(FIRST_RUN_COUNT)
+    assert ids == list(range(1, FIRST_RUN_COUNT + 1))
+    assert sync_state.watermarks['all'].id == FIRST_RUN_COUNT
+
+    # New submissions appeared on the platform since the first run
+    ids, requests_count = sync(SECOND_RUN_COUNT)
+    assert ids == list(range(FIRST_RUN_COUNT + 1, SECOND_RUN_COUNT + 1))
+    assert sync_state.watermarks['all'].id == SECOND_RUN_COUNT
+    if newest_first:
+        assert requests_count <= 3 + workers
+    else:
+        # Platform returns the new submissions last, so all pages are requested
+        assert requests_count >= SECOND_RUN_COUNT // PAGE_SIZE
@@ -0,0 +1,22 @@
+import sys
+from pathlib import Path
+from typing import Callable, List
+
+from analysis.src.python.evaluation.batching.batch_scheduler import Batch
+
+POLL_INTERVAL = 0.01
+
+# Every run of the batch appends a line to the file `runs` in the output directory
+RECORD_RUN = 'import sys, os; open(os.path.join(sys.argv[2], "runs"), "a").write("run\\n")'
+
+
+def get_python_command(code: str) -> Callable[[Batch], List[str]]:
+    def get_command(batch: Batch) -> List[str]:
+        return [sys.executable, '-c', code, str(batch.index), batch.output_path]
+
+    return get_command
+
+
+def get_runs(batch: Batch) -> int:
+    runs_path = Path(batch.output_path) / 'runs'
+    return len(runs_path.read_text().splitlines()) if runs_path.exists() else 0
@@ -0,0 +1,98 @@
+import os
+from pathlib import Path
+from typing import List
+
+import pandas as pd
+import pytest
+from analysis.src.python.evaluation.batching.batch_merge import merge_files, merge_files_by_name
+from analysis.src.python.evaluation.batching.batch_processing import merge_batch_results
+from analysis.src.python.evaluation.common.file_util import AnalysisExtension
+from analysis.src.python.evaluation.common.pandas_util import read_df_from_file, write_df_to_file
+
+BATCH_DFS = [
+    pd.DataFrame({'id': [1, 2], 'code': ['a\nb', 'c']}),
+    pd.DataFrame({'id': [3, 4], 'code': ['d', 'e,f']}),
+    pd.DataFrame({'id': [5], 'code': ['g']}),
+]
+
+
+def _write_batches(tmp_path: Path, dfs: List[pd.DataFrame], extension: AnalysisExtension) -> List[Path]:
+    files = []
+    for i, df in enumerate(dfs):
+        file = tmp_path / f'result_batch_{i}{extension.value}'
+        write_df_to_file(df, file, extension)
+        files.append(file)
+    return files
+
+
+@pytest.mark.parametrize('extension', [AnalysisExtension.CSV, AnalysisExtension.XLSX])
+def test_merge_files(tmp_path: Path, extension: AnalysisExtension):
+    files = _write_batches(tmp_path, BATCH_DFS, extension)
+    output_path = tmp_path / f'result{extension.value}'
+
+    assert merge_files(files, output_path)
+    assert read_df_from_file(output_path).equals(pd.concat(BATCH_DFS, ignore_index=True))
+
+
+def test_merge_csv_files_without_trailing_line_break(tmp_path: Path):
+    files = [tmp_path / 'first.csv', tmp_path / 'second.csv']
+    files[0].write_bytes(b'id,code\n1,a')
+    files[1].write_bytes(b'id,code\n2,b\n')
+    output_path = tmp_path / 'result.csv'
+
+    assert merge_files(files, output_path)
+    assert output_path.read_bytes() == b'id,code\n1,a\n2,b\n'
+
+
+def test_merge_csv_files_with_different_headers(tmp_path: Path):
+    dfs = [BATCH_DFS[0], BATCH_DFS[1].rename(columns={'code': 'text'})]
+    files = _write_batches(tmp_path, dfs, AnalysisExtension.CSV)
+    output_path = tmp_path / 'result.csv'
+
+    assert not merge_files(files, output_path)
+    assert not output_path.exists()
+
+
+def test_merge_line_based_files(tmp_path: Path):
+    files = [tmp_path / 'first.txt', tmp_path / 'second.txt']
+    files[0].write_bytes(b'first\nsecond')
+    files[1].write_bytes(b'third\n')
+    output_path = tmp_path / 'result.txt'
+
+    assert merge_files(files, output_path)
+    assert output_path.read_bytes() == b'first\nsecond\nthird\n'
+
+
+@pytest.mark.parametrize('jobs', [1, 3])
+def test_merge_files_by_name(tmp_path: Path, jobs: int):
+    output_files_by_name = {}
+    for extension in [AnalysisExtension.CSV, AnalysisExtension.XLSX]:
+        batches_path = tmp_path / extension.name
+        batches_path.mkdir()
+        output_files_by_name[f'result{extension.value}'] = _write_batches(batches_path, BATCH_DFS, extension)
+    output_files_by_name['result.json'] = [tmp_path / 'result_batch_0.json']
+
+    assert not merge_files_by_name(output_files_by_name, tmp_path, jobs)
+
+    expected_df = pd.concat(BATCH_DFS, ignore_index=True)
+    assert read_df_from_file(tmp_path / 'result.csv').equals(expected_df)
+    assert read_df_from_file(tmp_path / 'result.xlsx').equals(expected_df)
+
+
+def test_merge_batch_results_skips_unknown_files(tmp_path: Path):
+    batch_paths = []
+    for i, df in enumerate(BATCH_DFS):
+        batch_output_path = tmp_path / f'batch_{i}'
+        batch_output_path.mkdir()
+        write_df_to_file(df, batch_output_path / 'result.csv', AnalysisExtension.CSV)
+        # The chunk mode journal and other service files are left next to the output
+        (batch_output_path / 'result.csv.journal').write_text('0\n')
+        (batch_output_path / 'result.csv.lease').write_text('worker')
+        batch_paths.append((i, '', '', str(batch_output_path)))
+
+    output_path = tmp_path / 'output'
+    output_path.mkdir()
+
+    assert merge_batch_results(batch_paths, str(output_path))
+    assert sorted(os.listdir(output_path)) == ['result.csv']
+    assert read_df_from_file(output_path / 'result.csv').equals(pd.concat(BATCH_DFS, ignore_index=True))
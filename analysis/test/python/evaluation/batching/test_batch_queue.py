@@ -0,0 +1,140 @@
+import os
+import threading
+import time
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+from analysis.src.python.evaluation.batching.batch_queue import BatchQueue, run_worker, wait_for_batches
+from analysis.src.python.evaluation.batching.batch_scheduler import Batch, BatchStatus
+from analysis.test.python.evaluation.batching import get_python_command, get_runs, POLL_INTERVAL, RECORD_RUN
+
+
+def _create_queue(tmp_path: Path, number_of_batches: int, lease_timeout: float = 60.0) -> BatchQueue:
+    batches = []
+    for index in range(number_of_batches):
+        batch_path = tmp_path / f'batch_{index}'
+        batch_path.mkdir()
+        batches.append(Batch(index, str(batch_path / 'input.csv'), str(batch_path), str(batch_path)))
+    return BatchQueue(tmp_path / 'queue', batches, lease_timeout)
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_run_workers(tmp_path: Path, workers: int):
+    queue = _create_queue(tmp_path, 6)
+
+    # Each worker has its own view of the batches, as if it was run on a different machine
+    threads = [
+        threading.Thread(target=run_worker, kwargs={
+            'queue': BatchQueue(queue.path, [replace(batch) for batch in queue.batches]),
+            'get_command': get_python_command(RECORD_RUN),
+            'worker_id': f'worker_{i}',
+            'poll_interval': POLL_INTERVAL,
+        })
+        for i in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert wait_for_batches(queue, POLL_INTERVAL)
+    assert all(queue.get_status(batch) == BatchStatus.DONE for batch in queue.batches)
+    assert all(get_runs(batch) == 1 for batch in queue.batches)
+
+
+def test_failed_batches(tmp_path: Path):
+    queue = _create_queue(tmp_path, 3)
+    fail_second = f'{RECORD_RUN}; sys.exit(int(sys.argv[1]) == 1)'
+
+    assert run_worker(queue, get_python_command(fail_second), retries=2, poll_interval=POLL_INTERVAL) == 3
+
+    assert not wait_for_batches(queue, POLL_INTERVAL)
+    assert queue.get_batches_by_status(BatchStatus.FAILED) == [queue.batches[1]]
+    assert [get_runs(batch) for batch in queue.batches] == [1, 3, 1]
+
+
+def test_restart_failed_batches(tmp_path: Path):
+    queue = _create_queue(tmp_path, 3)
+    fail_second_once = f'{RECORD_RUN}; sys.exit(int(sys.argv[1]) == 1 and not os.path.exists(sys.argv[2] + "/ok"))'
+
+    run_worker(queue, get_python_command(fail_second_once), poll_interval=POLL_INTERVAL)
+    assert queue.get_batches_by_status(BatchStatus.FAILED) == [queue.batches[1]]
+
+    (Path(queue.batches[1].output_path) / 'ok').touch()
+    assert run_worker(queue, get_python_command(fail_second_once), poll_interval=POLL_INTERVAL) == 1
+
+    assert wait_for_batches(queue, POLL_INTERVAL)
+    assert [get_runs(batch) for batch in queue.batches] == [1, 2, 1]
+
+
+def test_claim(tmp_path: Path):
+    queue = _create_queue(tmp_path, 1)
+    batch = queue.batches[0]
+
+    assert queue.try_claim(batch, 'first')
+    assert not queue.try_claim(batch, 'second')
+    assert queue.get_status(batch) == BatchStatus.RUNNING
+    assert queue.renew(batch, 'first')
+    assert not queue.renew(batch, 'second')
+
+    queue.finish(batch, BatchStatus.DONE, 'first')
+    assert queue.get_status(batch) == BatchStatus.DONE
+    assert not queue.try_claim(batch, 'second')
+
+
+def test_reclaim_expired_lease(tmp_path: Path):
+    queue = _create_queue(tmp_path, 1, lease_timeout=10)
+    batch = queue.batches[0]
+    assert queue.try_claim(batch, 'dead')
+
+    # The lease is not expired yet
+    assert not queue.try_claim(batch, 'alive')
+
+    lease_path = queue.path / 'batch_0.lease'
+    expired_time = time.time() - 20
+    os.utime(lease_path, (expired_time, expired_time))
+
+    assert queue.try_claim(batch, 'alive')
+    assert not queue.renew(batch, 'dead')
+    assert queue.renew(batch, 'alive')
+    assert os.listdir(queue.path) == ['batch_0.lease']
+
+
+def test_renew_while_lease_is_checked(tmp_path: Path):
+    queue = _create_queue(tmp_path, 1)
+    batch = queue.batches[0]
+    assert queue.try_claim(batch, 'owner')
+
+    # Another worker moves the lease away for a moment to check whether it expired
+    lease_path = queue.path / 'batch_0.lease'
+    stale_path = queue.path / 'batch_0.lease.another.stale'
+    os.rename(lease_path, stale_path)
+    timer = threading.Timer(0.02, os.rename, args=(stale_path, lease_path))
+    timer.start()
+
+    assert queue.renew(batch, 'owner')
+    timer.join()
+    assert os.listdir(queue.path) == ['batch_0.lease']
+
+
+def test_lost_lease(tmp_path: Path):
+    queue = _create_queue(tmp_path, 1, lease_timeout=1.0)
+    batch = queue.batches[0]
+
+    def steal_lease():
+        # Wait for the worker to claim the batch, then another worker takes the lease over
+        lease_path = queue.path / 'batch_0.lease'
+        while not lease_path.exists():
+            time.sleep(POLL_INTERVAL)
+        lease_path.write_text('another')
+        time.sleep(0.2)
+        queue.finish(batch, BatchStatus.DONE, 'another')
+
+    thread = threading.Thread(target=steal_lease)
+    thread.start()
+    processed = run_worker(queue, get_python_command('import time; time.sleep(5)'), poll_interval=POLL_INTERVAL)
+    thread.join()
+
+    assert processed == 0
+    assert queue.get_status(batch) == BatchStatus.DONE
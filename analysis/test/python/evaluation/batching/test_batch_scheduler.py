@@ -0,0 +1,53 @@
+from pathlib import Path
+
+import pytest
+from analysis.src.python.evaluation.batching.batch_scheduler import (
+    BatchState, BatchStatus, run_batches, STATE_FILE_NAME,
+)
+from analysis.test.python.evaluation.batching import get_python_command, get_runs, POLL_INTERVAL, RECORD_RUN
+
+
+def _create_state(tmp_path: Path, number_of_batches: int) -> BatchState:
+    batch_paths = []
+    for index in range(number_of_batches):
+        batch_path = tmp_path / f'batch_{index}'
+        batch_path.mkdir()
+        batch_paths.append((index, str(batch_path / 'input.csv'), str(batch_path), str(batch_path)))
+    return BatchState.from_batch_paths(tmp_path / STATE_FILE_NAME, batch_paths)
+
+
+@pytest.mark.parametrize('jobs', [1, 3, 10])
+def test_run_batches(tmp_path: Path, jobs: int):
+    state = _create_state(tmp_path, 5)
+
+    assert run_batches(state, get_python_command(RECORD_RUN), jobs=jobs, poll_interval=POLL_INTERVAL)
+
+    loaded_state = BatchState.load(tmp_path / STATE_FILE_NAME)
+    assert all(batch.status == BatchStatus.DONE for batch in loaded_state.batches)
+    assert all(get_runs(batch) == 1 for batch in state.batches)
+
+
+@pytest.mark.parametrize('retries', [0, 2])
+def test_retries(tmp_path: Path, retries: int):
+    state = _create_state(tmp_path, 3)
+    # The batch 1 always fails
+    code = f'{RECORD_RUN}; sys.exit(int(sys.argv[1] == "1"))'
+
+    assert not run_batches(state, get_python_command(code), jobs=2, retries=retries, poll_interval=POLL_INTERVAL)
+
+    assert [batch.status for batch in state.batches] == [BatchStatus.DONE, BatchStatus.FAILED, BatchStatus.DONE]
+    assert [get_runs(batch) for batch in state.batches] == [1, retries + 1, 1]
+
+
+def test_restart(tmp_path: Path):
+    state = _create_state(tmp_path, 4)
+    state.batches[0].status = BatchStatus.DONE
+    state.batches[1].status = BatchStatus.RUNNING
+    state.batches[2].status = BatchStatus.FAILED
+    state.save()
+
+    loaded_state = BatchState.load(tmp_path / STATE_FILE_NAME)
+    assert run_batches(loaded_state, get_python_command(RECORD_RUN), jobs=2, poll_interval=POLL_INTERVAL)
+
+    assert all(batch.status == BatchStatus.DONE for batch in loaded_state.batches)
+    assert [get_runs(batch) for batch in loaded_state.batches] == [0, 1, 1, 1]
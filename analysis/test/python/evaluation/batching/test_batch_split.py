@@ -0,0 +1,72 @@
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from analysis.src.python.evaluation.batching.batch_processing import (
+    _is_stale_lock, load_or_create_state, renewed_lock, split_to_batch_ranges, split_to_batches,
+    STATE_LOCK_FILE_NAME,
+)
+from analysis.src.python.evaluation.batching.batch_scheduler import BatchState, STATE_FILE_NAME
+from analysis.src.python.evaluation.common.csv_util import read_csv_range
+
+TEST_DF = pd.DataFrame({
+    'id': range(10),
+    'code': ['a = 1\nprint(a)', 'print("a,\nb")'] * 5,
+    'lang': 'python3',
+})
+
+
+@pytest.mark.parametrize('batch_size', [1, 3, 10, 20])
+def test_split_to_batch_ranges(tmp_path: Path, batch_size: int):
+    dataset_path = tmp_path / 'solutions.csv'
+    TEST_DF.to_csv(dataset_path, index=False)
+
+    copied_batches_path = tmp_path / 'copied'
+    copied_batches_path.mkdir()
+    copied_batches = split_to_batches(str(dataset_path), str(copied_batches_path), batch_size)
+
+    ranges_path = tmp_path / 'ranges'
+    ranges_path.mkdir()
+    batches = split_to_batch_ranges(str(dataset_path), str(ranges_path), batch_size)
+
+    assert len(batches) == len(copied_batches)
+    for batch, (_, copied_input_file_path, _, _) in zip(batches, copied_batches):
+        assert read_csv_range(batch.input_file_path, batch.input_range).equals(pd.read_csv(copied_input_file_path))
+
+    state_path = ranges_path / STATE_FILE_NAME
+    BatchState(state_path, batches).save()
+    assert BatchState.load(state_path).batches == batches
+
+
+def test_load_or_create_state_removes_stale_lock(tmp_path: Path):
+    dataset_path = tmp_path / 'solutions.csv'
+    TEST_DF.to_csv(dataset_path, index=False)
+
+    # The lock of a process that was killed while splitting the input
+    output_path = tmp_path / 'output'
+    output_path.mkdir()
+    lock_path = output_path / STATE_LOCK_FILE_NAME
+    lock_path.touch()
+    os.utime(lock_path, (time.time() - 10, time.time() - 10))
+
+    state = load_or_create_state(str(dataset_path), str(output_path), 3, True, lock_timeout=1)
+
+    assert len(state.batches) == 4
+    assert (output_path / STATE_FILE_NAME).exists()
+    assert not lock_path.exists()
+
+
+def test_renewed_lock_is_not_stale(tmp_path: Path):
+    lock_path = tmp_path / STATE_LOCK_FILE_NAME
+    lock_path.touch()
+    lock_timeout = 0.3
+
+    with renewed_lock(str(lock_path), lock_timeout):
+        # The work takes longer than the lock timeout
+        for _ in range(5):
+            time.sleep(lock_timeout / 2)
+            assert not _is_stale_lock(str(lock_path), lock_timeout)
+
+    assert not lock_path.exists()
@@ -0,0 +1,145 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from analysis.src.python.evaluation.common.cache_util import inspect_with_cache, InspectionCache, is_valid_result
+from analysis.src.python.evaluation.common.csv_util import ColumnName
+
+ID = ColumnName.ID.value
+CODE = ColumnName.CODE.value
+LANG = ColumnName.LANG.value
+
+FLAGS = {'allow_duplicates': False}
+
+GET_KEY_TEST_DATA = [
+    (('print(1)\n', 'python3'), ('print(1)\r\n', 'python3'), True),
+    (('print(1)\n', 'python3'), ('print(2)\n', 'python3'), False),
+    (('print(1)\n', 'python3'), ('print(1)\n', 'java11'), False),
+]
+
+
+@pytest.mark.parametrize(('first', 'second', 'is_equal'), GET_KEY_TEST_DATA)
+def test_get_key(tmp_path: Path, first, second, is_equal: bool):
+    cache = InspectionCache(tmp_path, FLAGS)
+    assert (cache.get_key(*first) == cache.get_key(*second)) == is_equal
+
+
+def test_key_depends_on_flags(tmp_path: Path):
+    cache = InspectionCache(tmp_path, FLAGS)
+    other_cache = InspectionCache(tmp_path, {'allow_duplicates': True})
+    assert cache.get_key('print(1)', 'python3') != other_cache.get_key('print(1)', 'python3')
+
+
+def test_get_and_put(tmp_path: Path):
+    cache = InspectionCache(tmp_path, FLAGS)
+    key = cache.get_key('print(1)', 'python3')
+
+    assert cache.get(key) is None
+    cache.put(key, '[]')
+    assert cache.get(key) == '[]'
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_evict(tmp_path: Path):
+    cache = InspectionCache(tmp_path, FLAGS, size_limit=10)
+    keys = [cache.get_key(f'print({i})', 'python3') for i in range(3)]
+    for i, key in enumerate(keys):
+        cache.put(key, 'x' * 5)
+        path = tmp_path / key[:2] / key
+        os.utime(path, (i, i))
+
+    cache.evict()
+
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[1]) == 'x' * 5
+    assert cache.get(keys[2]) == 'x' * 5
+
+
+def test_inspect_with_cache(tmp_path: Path):
+    df = pd.DataFrame({
+        ID: [1, 2, 3, 4],
+        CODE: ['print(1)', 'print(2)', 'print(1)', np.nan],
+        LANG: ['python3', 'python3', 'python3', 'python3'],
+    })
+
+    inspected_ids = []
+
+    def inspect(df_to_inspect: pd.DataFrame) -> pd.Series:
+        inspected_ids.extend(df_to_inspect[ID].tolist())
+        return df_to_inspect[CODE].apply(lambda code: f'["{code}"]' if isinstance(code, str) else np.nan)
+
+    cache = InspectionCache(tmp_path, FLAGS)
+    results = inspect_with_cache(df, inspect, cache)
+    assert results.tolist()[:3] == ['["print(1)"]', '["print(2)"]', '["print(1)"]']
+    assert pd.isnull(results[3])
+    assert inspected_ids == [1, 2, 4]
+
+    inspected_ids.clear()
+    results = inspect_with_cache(df, inspect, InspectionCache(tmp_path, FLAGS))
+    assert results.tolist()[:3] == ['["print(1)"]', '["print(2)"]', '["print(1)"]']
+    assert inspected_ids == [4]
+
+
+def test_get_size_is_updated_by_put(tmp_path: Path):
+    cache = InspectionCache(tmp_path, FLAGS)
+    keys = [cache.get_key(f'print({i})', 'python3') for i in range(2)]
+    cache.put(keys[0], 'x' * 5)
+    assert cache.get_size() == 5
+
+    cache.put(keys[1], 'x' * 3)
+    cache.put(keys[0], 'x' * 2)
+    assert cache.get_size() == 5
+    assert InspectionCache(tmp_path, FLAGS).get_size() == 5
+
+
+def test_evict_does_not_scan_cache_under_limit(tmp_path: Path, monkeypatch):
+    cache = InspectionCache(tmp_path, FLAGS, size_limit=10)
+    cache.put(cache.get_key('print(1)', 'python3'), 'x' * 5)
+    assert cache.get_size() == 5
+
+    def scan():
+        raise AssertionError('The cache directory should not be scanned')
+
+    monkeypatch.setattr(cache, '_get_files', scan)
+    cache.put(cache.get_key('print(2)', 'python3'), 'x' * 5)
+    cache.evict()
+
+
+IS_VALID_RESULT_TEST_DATA = [
+    ('[]', True),
+    ('{"quality": {"code": "EXCELLENT"}, "issues": []}\n', True),
+    ('', False),
+    ('  \n', False),
+    ('Traceback (most recent call last):', False),
+    ('[{"origin_class": "E0001"', False),
+    (np.nan, False),
+]
+
+
+@pytest.mark.parametrize(('result', 'is_valid'), IS_VALID_RESULT_TEST_DATA)
+def test_is_valid_result(result, is_valid: bool):
+    assert is_valid_result(result) == is_valid
+
+
+def test_failed_inspection_is_not_cached(tmp_path: Path):
+    df = pd.DataFrame({
+        ID: [1, 2],
+        CODE: ['print(1)', 'print(2)'],
+        LANG: ['python3', 'python3'],
+    })
+
+    inspected_ids = []
+
+    def inspect(df_to_inspect: pd.DataFrame) -> pd.Series:
+        inspected_ids.extend(df_to_inspect[ID].tolist())
+        # The inspection of the second fragment failed and printed nothing
+        return df_to_inspect[ID].apply(lambda fragment_id: '[]' if fragment_id == 1 else '')
+
+    inspect_with_cache(df, inspect, InspectionCache(tmp_path, FLAGS))
+    inspected_ids.clear()
+    results = inspect_with_cache(df, inspect, InspectionCache(tmp_path, FLAGS))
+
+    assert results.tolist() == ['[]', '']
+    assert inspected_ids == [2]
@@ -0,0 +1,52 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from analysis.src.python.evaluation.common import csv_util
+from analysis.src.python.evaluation.common.csv_util import get_csv_record_ranges, parse_csv_range, read_csv_range
+
+CODE_FRAGMENTS = [
+    'print("Hello, world!")',
+    'a = input()\nprint(a)',
+    'x, y = 1, 2',
+    'print("""\n"quoted"\n""")\n',
+    'pass',
+    'if True:\n    print("a,\nb")',
+]
+
+TEST_DF = pd.DataFrame({
+    'id': range(len(CODE_FRAGMENTS) * 3),
+    'code': CODE_FRAGMENTS * 3,
+    'lang': 'python3',
+})
+
+
+@pytest.mark.parametrize('records_per_range', [1, 2, 5, 7, 100])
+@pytest.mark.parametrize('block_size', [3, 64, csv_util.CSV_SCAN_BLOCK_SIZE])
+def test_csv_record_ranges(tmp_path: Path, monkeypatch, records_per_range: int, block_size: int):
+    # Small blocks check that the quoted values split between blocks are handled
+    monkeypatch.setattr(csv_util, 'CSV_SCAN_BLOCK_SIZE', block_size)
+
+    csv_path = tmp_path / 'solutions.csv'
+    TEST_DF.to_csv(csv_path, index=False)
+
+    ranges = get_csv_record_ranges(csv_path, records_per_range)
+    dfs = [read_csv_range(csv_path, csv_range) for csv_range in ranges]
+
+    assert all(df.shape[0] == records_per_range for df in dfs[:-1])
+    assert 0 < dfs[-1].shape[0] <= records_per_range
+    assert pd.concat(dfs, ignore_index=True).equals(pd.read_csv(csv_path))
+
+
+def test_csv_record_ranges_without_trailing_line_break(tmp_path: Path):
+    csv_path = tmp_path / 'solutions.csv'
+    csv_path.write_bytes(b'id,code\n1,"a\nb"\n2,c')
+
+    ranges = get_csv_record_ranges(csv_path, 1)
+
+    assert ranges == [(8, 16), (16, 19)]
+    assert read_csv_range(csv_path, ranges[1]).equals(pd.DataFrame({'id': [2], 'code': ['c']}))
+
+
+def test_parse_csv_range():
+    assert parse_csv_range('10:200') == (10, 200)
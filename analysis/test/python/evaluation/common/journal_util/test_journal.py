@@ -0,0 +1,37 @@
+from pathlib import Path
+
+from analysis.src.python.evaluation.common.journal_util import Journal
+
+
+def test_read_empty_journal(tmp_path: Path):
+    assert Journal(tmp_path / 'journal').read() == (set(), 0)
+
+
+def test_append_and_read(tmp_path: Path):
+    journal = Journal(tmp_path / 'journal')
+    journal.clear()
+    journal.append([1, 2], 100)
+    journal.append([3], 150)
+
+    assert journal.read() == ({1, 2, 3}, 150)
+
+
+def test_read_partially_written_checkpoint(tmp_path: Path):
+    journal = Journal(tmp_path / 'journal')
+    journal.clear()
+    journal.append([1, 2], 100)
+    with open(journal.path, 'a') as f:
+        f.write('{"ids": [3, 4], "output_si')
+
+    assert journal.read() == ({1, 2}, 100)
+
+    journal.append([3], 150)
+    assert journal.read() == ({1, 2, 3}, 150)
+
+
+def test_clear(tmp_path: Path):
+    journal = Journal(tmp_path / 'journal')
+    journal.append([1, 2], 100)
+    journal.clear()
+
+    assert journal.read() == (set(), 0)
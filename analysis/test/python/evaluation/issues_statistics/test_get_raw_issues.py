@@ -1,5 +1,9 @@
+import json
+import os
+import subprocess
+import sys
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 import pandas as pd
 import pytest
@@ -12,9 +16,13 @@ from hyperstyle.src.python.review.inspectors.issue import (
     LineLenIssue,
     MaintainabilityLackIssue,
 )
+from hyperstyle.src.python.review.common.language import Language
+from analysis.src.python.evaluation.common.csv_util import ColumnName, get_csv_record_ranges
 from analysis.src.python.evaluation.common.pandas_util import equal_df, get_solutions_df_by_file_path
+from analysis.src.python.evaluation.issues_statistics import get_raw_issues
 from analysis.src.python.evaluation.issues_statistics.get_raw_issues import (
-    _filter_issues, _get_output_path, inspect_solutions,
+    _filter_issues, _get_journal_path, _get_output_path, _inspect_batch, inspect_solutions,
+    inspect_solutions_in_chunks,
 )
 from analysis.test.python.evaluation.issues_statistics import (
     GET_RAW_ISSUES_TARGET_FILES_FOLDER, GET_RAW_ISSUES_TEST_FILES_FOLDER,
@@ -342,3 +350,195 @@ def test_correct_output(test_file: str, target_file: str):
     target_dataframe = pd.read_csv(GET_RAW_ISSUES_TARGET_FILES_FOLDER / target_file)
 
     assert equal_df(target_dataframe, test_dataframe)
+
+
+BATCHED_INSPECTION_TEST_DATA = [
+    ('test_fragment_per_language.csv', 2),
+    ('test_fragment_per_language.csv', 100),
+    ('test_incorrect_language.csv', 2),
+    ('test_incorrect_code.csv', 2),
+    ('test_rows_with_null.csv', 3),
+]
+
+
+@pytest.mark.parametrize(('test_file', 'batch_size'), BATCHED_INSPECTION_TEST_DATA)
+def test_batched_inspection(test_file: str, batch_size: int):
+    solutions_file_path = Path(GET_RAW_ISSUES_TEST_FILES_FOLDER / test_file)
+
+    def inspect(current_batch_size: int) -> pd.DataFrame:
+        return inspect_solutions(
+            get_solutions_df_by_file_path(solutions_file_path),
+            solutions_file_path,
+            allow_duplicates=False,
+            allow_info_issues=False,
+            allow_zero_measure_issues=False,
+            to_save_path=False,
+            batch_size=current_batch_size,
+        )
+
+    assert equal_df(inspect(1), inspect(batch_size))
+
+
+def _create_issue(origin_class: str, file_path: Path) -> CodeIssue:
+    return CodeIssue(
+        origin_class=origin_class,
+        type=IssueType.CODE_STYLE,
+        description='Some description',
+        file_path=file_path,
+        line_no=1,
+        column_no=1,
+        inspector_type=InspectorType.PYLINT,
+        difficulty=IssueDifficulty.EASY,
+    )
+
+
+class StubInspector:
+    """ Inspector that finds an issue named after the fragment id in each fragment of the batch
+    and a duplicate-code issue which is found by comparing the fragments. """
+
+    inspector_type = InspectorType.PYLINT
+
+    def __init__(self):
+        self.inspected_paths = []
+
+    def inspect(self, path: Path, config: Dict[str, Any]) -> List[BaseIssue]:
+        self.inspected_paths.append(path)
+        issues = [
+            _create_issue(f'C{file_path.stem.split("_")[1]}', file_path)
+            for file_path in sorted(path.glob('fragment_*'))
+        ]
+        issues.append(_create_issue('R0801', path / 'fragment_1.py'))
+        return issues
+
+
+BATCH = pd.DataFrame({
+    ColumnName.ID.value: [1, 2, 3],
+    ColumnName.CODE.value: ['print(1)', 'print(2)', 'print(3)'],
+    ColumnName.LANG.value: ['python3', 'python3', 'python3'],
+})
+
+
+def test_inspect_batch_splits_issues_by_fragments(tmp_path: Path, monkeypatch):
+    inspector = StubInspector()
+    monkeypatch.setattr(get_raw_issues, 'LANGUAGE_TO_INSPECTORS', {Language.PYTHON: [inspector]})
+
+    results = _inspect_batch(BATCH, tmp_path / 'solutions.csv', False, False, True, False)
+
+    assert inspector.inspected_paths == [tmp_path / 'fragments_1']
+    assert [[issue['origin_class'] for issue in json.loads(result)] for result in results] == [
+        ['C1'], ['C2'], ['C3'],
+    ]
+    assert not (tmp_path / 'fragments_1').exists()
+
+
+def test_inspect_batch_removes_batch_dir_on_error(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(get_raw_issues, 'LANGUAGE_TO_INSPECTORS', {Language.PYTHON: [StubInspector()]})
+
+    def filter_issues(*args):
+        raise ValueError('Filtering failed')
+
+    monkeypatch.setattr(get_raw_issues, '_filter_issues', filter_issues)
+
+    with pytest.raises(ValueError):
+        _inspect_batch(BATCH, tmp_path / 'solutions.csv', False, False, True, False)
+    assert not (tmp_path / 'fragments_1').exists()
+
+
+CHUNK_MODE_TEST_DATA = [
+    ('test_fragment_per_language.csv', 1),
+    ('test_fragment_per_language.csv', 3),
+    ('test_incorrect_language.csv', 2),
+    ('test_rows_with_null.csv', 10),
+]
+
+
+def _inspect_in_chunks(solutions_file_path: Path, output_path: Path, chunk_size: int, resume: bool):
+    inspect_solutions_in_chunks(
+        solutions_file_path,
+        output_path,
+        chunk_size,
+        resume,
+        allow_duplicates=False,
+        allow_info_issues=False,
+        allow_zero_measure_issues=False,
+        to_save_path=False,
+    )
+
+
+@pytest.mark.parametrize(('test_file', 'chunk_size'), CHUNK_MODE_TEST_DATA)
+def test_chunk_mode(tmp_path: Path, test_file: str, chunk_size: int):
+    solutions_file_path = Path(GET_RAW_ISSUES_TEST_FILES_FOLDER / test_file)
+    expected_dataframe = inspect_solutions(
+        get_solutions_df_by_file_path(solutions_file_path),
+        solutions_file_path,
+        allow_duplicates=False,
+        allow_info_issues=False,
+        allow_zero_measure_issues=False,
+        to_save_path=False,
+    )
+
+    output_path = tmp_path / 'output.csv'
+    _inspect_in_chunks(solutions_file_path, output_path, chunk_size, resume=False)
+
+    assert equal_df(expected_dataframe, pd.read_csv(output_path))
+
+
+def test_resume_chunk_mode(tmp_path: Path):
+    solutions_file_path = Path(GET_RAW_ISSUES_TEST_FILES_FOLDER / 'test_fragment_per_language.csv')
+    output_path = tmp_path / 'output.csv'
+    _inspect_in_chunks(solutions_file_path, output_path, chunk_size=1, resume=False)
+    expected_dataframe = pd.read_csv(output_path)
+
+    # Simulate a crash after the second chunk: the third chunk is written, but it is not recorded to the journal
+    journal_path = _get_journal_path(output_path)
+    checkpoints = journal_path.read_text().splitlines(keepends=True)
+    journal_path.write_text(''.join(checkpoints[:2]))
+
+    _inspect_in_chunks(solutions_file_path, output_path, chunk_size=1, resume=True)
+
+    assert equal_df(expected_dataframe, pd.read_csv(output_path))
+    assert journal_path.read_text().splitlines(keepends=True)[:2] == checkpoints[:2]
+
+
+def test_chunk_mode_with_input_range(tmp_path: Path):
+    solutions_file_path = Path(GET_RAW_ISSUES_TEST_FILES_FOLDER / 'test_fragment_per_language.csv')
+    _inspect_in_chunks(solutions_file_path, tmp_path / 'output.csv', chunk_size=1, resume=False)
+    expected_dataframe = pd.read_csv(tmp_path / 'output.csv')
+
+    range_dataframes = []
+    for index, input_range in enumerate(get_csv_record_ranges(solutions_file_path, 2)):
+        output_path = tmp_path / f'output_{index}.csv'
+        inspect_solutions_in_chunks(
+            solutions_file_path,
+            output_path,
+            chunk_size=1,
+            resume=False,
+            allow_duplicates=False,
+            allow_info_issues=False,
+            allow_zero_measure_issues=False,
+            to_save_path=False,
+            input_range=input_range,
+        )
+        range_dataframes.append(pd.read_csv(output_path))
+
+    assert equal_df(expected_dataframe, pd.concat(range_dataframes))
+
+
+ROOT_PATH = Path(__file__).parents[5]
+
+INVALID_ARGUMENTS_TEST_DATA = [
+    ['solutions.xlsx', '--input-range=0:10'],
+    ['solutions.xlsx', '--chunk-size=10'],
+    ['solutions.csv', '--chunk-size=10', '-o=output.xlsx'],
+]
+
+
+@pytest.mark.parametrize('arguments', INVALID_ARGUMENTS_TEST_DATA)
+def test_invalid_arguments_exit_code(tmp_path: Path, arguments: List[str]):
+    # The batch scheduler marks a batch as done only if the script exits with zero code
+    process = subprocess.run(
+        [sys.executable, '-m', 'analysis.src.python.evaluation.issues_statistics.get_raw_issues', *arguments],
+        cwd=tmp_path,
+        env={**os.environ, 'PYTHONPATH': os.pathsep.join([str(ROOT_PATH), os.environ.get('PYTHONPATH', '')])},
+    )
+    assert process.returncode != 0
@@ -8,8 +8,10 @@ from analysis.src.python.evaluation.common.pandas_util import equal_df, get_solu
 from analysis.src.python.evaluation.issues_statistics.get_raw_issues_statistics import (
     _convert_language_code_to_language,
     _get_output_folder,
+    _get_partial_output_path,
     DEFAULT_OUTPUT_FOLDER_NAME,
     inspect_raw_issues,
+    PARTIAL_STATS_FILE_NAME,
 )
 from analysis.test.python.evaluation.issues_statistics import (
     GET_RAW_ISSUES_STATISTICS_TARGET_FILES_FOLDER,
@@ -38,6 +40,27 @@ def test_get_output_folder(solutions_file_path: Path, output_folder: Optional[Pa
     assert actual_output_folder == expected_output_folder
 
 
+GET_PARTIAL_OUTPUT_PATH_TEST_DATA = [
+    (DF_PATH, None, DEFAULT_OUTPUT_PATH / PARTIAL_STATS_FILE_NAME),
+    (DF_PATH, Path(NEW_FOLDER), Path(NEW_FOLDER) / PARTIAL_STATS_FILE_NAME),
+    # Batches are processed with the same arguments except the output folder, so their partial statistics must not
+    # overwrite each other
+    (DF_PATH, Path(NEW_FOLDER) / 'batch_1', Path(NEW_FOLDER) / 'batch_1' / PARTIAL_STATS_FILE_NAME),
+]
+
+
+@pytest.mark.parametrize(
+    ('solutions_file_path', 'output_folder', 'expected_partial_output_path'),
+    GET_PARTIAL_OUTPUT_PATH_TEST_DATA,
+)
+def test_get_partial_output_path(
+    solutions_file_path: Path,
+    output_folder: Optional[Path],
+    expected_partial_output_path: Path,
+):
+    assert _get_partial_output_path(solutions_file_path, output_folder) == expected_partial_output_path
+
+
 CONVERT_LANGUAGE_CODE_TO_LANGUAGE_TEST_DATA = [
     ('java7', 'JAVA'),
     ('java8', 'JAVA'),
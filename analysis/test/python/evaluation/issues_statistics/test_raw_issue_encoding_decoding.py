@@ -2,6 +2,8 @@ import json
 import textwrap
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
 import pytest
 from hyperstyle.src.python.review.inspectors.inspector_type import InspectorType
 from hyperstyle.src.python.review.inspectors.issue import (
@@ -10,13 +12,15 @@ from hyperstyle.src.python.review.inspectors.issue import (
     CodeIssue,
     CohesionIssue,
     FuncLenIssue,
+    IssueData,
     IssueDifficulty,
     IssueType,
     LineLenIssue,
     MaintainabilityLackIssue,
+    Measurable,
 )
 from analysis.src.python.evaluation.issues_statistics.common.raw_issue_encoder_decoder import (
-    RawIssueDecoder, RawIssueEncoder,
+    decode_raw_issues_to_flat_table, MEASURE, RawIssueDecoder, RawIssueEncoder,
 )
 
 FILE_PATH = 'some_file.py'
@@ -201,3 +205,30 @@ def test_decode_encode(issue: BaseIssue, json_issue: str):
         json.dumps(json.loads(json_issue, cls=RawIssueDecoder), cls=RawIssueEncoder, indent=4)
         == textwrap.dedent(json_issue).strip()
     )
+
+
+def test_decode_raw_issues_to_flat_table():
+    issues = [issue for issue, _ in ISSUE_AND_JSON_ISSUE]
+    raw_issues = pd.Series([
+        json.dumps(issues[:2], cls=RawIssueEncoder),
+        np.nan,
+        json.dumps([], cls=RawIssueEncoder),
+        json.dumps(issues[2:], cls=RawIssueEncoder),
+    ])
+
+    flat_issues = decode_raw_issues_to_flat_table(
+        raw_issues, [IssueData.ISSUE_TYPE.value, IssueData.LINE_NUMBER.value, MEASURE],
+    )
+
+    assert flat_issues.size == len(issues)
+    assert flat_issues.is_decoded.tolist() == [True, False, True, True]
+    assert flat_issues.fragment_index.tolist() == [0, 0] + [3] * (len(issues) - 2)
+
+    issue_types = flat_issues.dictionaries[IssueData.ISSUE_TYPE.value]
+    assert [issue_types[code] for code in flat_issues.fields[IssueData.ISSUE_TYPE.value]] == [
+        issue.type.value for issue in issues
+    ]
+    assert flat_issues.fields[IssueData.LINE_NUMBER.value].tolist() == [issue.line_no for issue in issues]
+    assert flat_issues.fields[MEASURE].tolist() == pytest.approx(
+        [issue.measure() if isinstance(issue, Measurable) else np.nan for issue in issues], nan_ok=True,
+    )
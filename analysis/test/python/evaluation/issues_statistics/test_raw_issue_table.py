@@ -0,0 +1,90 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from hyperstyle.src.python.review.inspectors.inspector_type import InspectorType
+from hyperstyle.src.python.review.inspectors.issue import (
+    CodeIssue,
+    IssueDifficulty,
+    IssueType,
+    LineLenIssue,
+)
+from analysis.src.python.evaluation.issues_statistics.common.raw_issue_encoder_decoder import RawIssueEncoder
+from analysis.src.python.evaluation.issues_statistics.common.raw_issue_table import (
+    FRAGMENT_ID, read_raw_issue_table, RawIssueTableWriter, write_raw_issue_table,
+)
+
+CODE_ISSUE = CodeIssue(
+    origin_class='SomeCodeIssueClass',
+    type=IssueType.CODE_STYLE,
+    description='Some description',
+    file_path=Path(''),
+    line_no=656,
+    column_no=42,
+    inspector_type=InspectorType.CHECKSTYLE,
+    difficulty=IssueDifficulty.EASY,
+)
+
+LINE_LEN_ISSUE = LineLenIssue(
+    origin_class='SomeLineLenIssueClass',
+    type=IssueType.LINE_LEN,
+    description='Some description',
+    file_path=Path(''),
+    line_no=983,
+    column_no=428,
+    inspector_type=InspectorType.PYLINT,
+    line_len=123,
+    difficulty=IssueDifficulty.EASY,
+)
+
+FRAGMENT_IDS = pd.Series([1, 2, 3, 4])
+RAW_ISSUES = pd.Series([
+    json.dumps([CODE_ISSUE, LINE_LEN_ISSUE], cls=RawIssueEncoder),
+    json.dumps([], cls=RawIssueEncoder),
+    np.nan,
+    json.dumps([CODE_ISSUE], cls=RawIssueEncoder),
+])
+
+EXPECTED_TABLE = pd.DataFrame({
+    'fragment_id': [1, 1, 4],
+    'origin_class': ['SomeCodeIssueClass', 'SomeLineLenIssueClass', 'SomeCodeIssueClass'],
+    'description': ['Some description', 'Some description', 'Some description'],
+    'type': ['CODE_STYLE', 'LINE_LEN', 'CODE_STYLE'],
+    'line_no': [656, 983, 656],
+    'column_no': [42, 428, 42],
+    'inspector_type': ['CHECKSTYLE', 'PYLINT', 'CHECKSTYLE'],
+    'difficulty': ['EASY', 'EASY', 'EASY'],
+    'measure': [np.nan, 123, np.nan],
+})
+
+
+def _assert_table(table_df: pd.DataFrame, expected_df: pd.DataFrame):
+    for column in expected_df.columns:
+        assert table_df[column].astype(object).tolist() == pytest.approx(expected_df[column].tolist(), nan_ok=True)
+
+
+@pytest.mark.parametrize('to_mmap', [True, False])
+def test_write_and_read(tmp_path: Path, to_mmap: bool):
+    write_raw_issue_table(tmp_path, FRAGMENT_IDS, RAW_ISSUES)
+    table = read_raw_issue_table(tmp_path, to_mmap)
+
+    assert table.size == 3
+    _assert_table(table.to_df(), EXPECTED_TABLE)
+
+
+def test_append(tmp_path: Path):
+    with RawIssueTableWriter(tmp_path) as writer:
+        writer.append(FRAGMENT_IDS[:2], RAW_ISSUES[:2])
+        writer.append(FRAGMENT_IDS[2:], RAW_ISSUES[2:])
+
+    _assert_table(read_raw_issue_table(tmp_path).to_df(), EXPECTED_TABLE)
+
+
+def test_empty_table(tmp_path: Path):
+    write_raw_issue_table(tmp_path, FRAGMENT_IDS[1:3], RAW_ISSUES[1:3])
+    table = read_raw_issue_table(tmp_path)
+
+    assert table.size == 0
+    assert table.to_df()[FRAGMENT_ID].tolist() == []
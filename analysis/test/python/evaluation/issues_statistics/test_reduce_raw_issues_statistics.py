@@ -0,0 +1,39 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from analysis.src.python.evaluation.common.pandas_util import equal_df, get_solutions_df_by_file_path
+from analysis.src.python.evaluation.issues_statistics.common.partial_statistics import (
+    merge_partial_stats, read_partial_stats, save_partial_stats,
+)
+from analysis.src.python.evaluation.issues_statistics.get_raw_issues_statistics import (
+    get_partial_stats, inspect_raw_issues,
+)
+from analysis.src.python.evaluation.issues_statistics.reduce_raw_issues_statistics import reduce_partial_stats
+from analysis.test.python.evaluation.issues_statistics import GET_RAW_ISSUES_STATISTICS_TEST_FILES_FOLDER
+
+REDUCE_TEST_DATA = [
+    ('test_df_multi_lang.csv', 1),
+    ('test_df_multi_lang.csv', 2),
+    ('test_df_multi_lang.csv', 5),
+    ('test_df_with_null.csv', 2),
+    ('test_df_single_lang.csv', 3),
+]
+
+
+@pytest.mark.parametrize(('test_file', 'number_of_parts'), REDUCE_TEST_DATA)
+def test_reduce_partial_stats(tmp_path: Path, test_file: str, number_of_parts: int):
+    test_df = get_solutions_df_by_file_path(GET_RAW_ISSUES_STATISTICS_TEST_FILES_FOLDER / test_file)
+
+    partial_stats_list = []
+    for i, part in enumerate(np.array_split(np.arange(test_df.shape[0]), number_of_parts)):
+        partial_stats_path = tmp_path / f'partial_{i}.json'
+        save_partial_stats(get_partial_stats(test_df.iloc[part]), partial_stats_path)
+        partial_stats_list.append(read_partial_stats(partial_stats_path))
+
+    expected_stats = inspect_raw_issues(test_df)
+    actual_stats = reduce_partial_stats(merge_partial_stats(partial_stats_list))
+
+    assert expected_stats.keys() == actual_stats.keys()
+    for lang, stats in expected_stats.items():
+        assert equal_df(stats, actual_stats[lang])
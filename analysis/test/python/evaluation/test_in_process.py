@@ -0,0 +1,26 @@
+import pytest
+from analysis.src.python.evaluation.common.pandas_util import equal_df
+from analysis.src.python.evaluation.evaluation_config import EvaluationConfig
+from analysis.src.python.evaluation.evaluation_run_tool import get_solutions_df, inspect_solutions_df
+from analysis.test.python.evaluation import XLSX_DATA_FOLDER
+from analysis.test.python.evaluation.testing_config import get_testing_arguments
+
+FILE_NAMES = [
+    'test_sorted_order.xlsx',
+    'test_unsorted_order.xlsx',
+]
+
+
+def _inspect(file_name: str, in_process: bool):
+    testing_arguments_dict = get_testing_arguments(to_add_traceback=True, to_add_tool_path=True)
+    testing_arguments_dict.solutions_file_path = XLSX_DATA_FOLDER / file_name
+    testing_arguments_dict.in_process = in_process
+
+    config = EvaluationConfig(testing_arguments_dict)
+    lang_code_dataframe = get_solutions_df(config.extension, config.solutions_file_path)
+    return inspect_solutions_df(config, lang_code_dataframe)
+
+
+@pytest.mark.parametrize('file_name', FILE_NAMES)
+def test_in_process_output(file_name: str):
+    assert equal_df(_inspect(file_name, in_process=False), _inspect(file_name, in_process=True))
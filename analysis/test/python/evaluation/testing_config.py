@@ -3,6 +3,7 @@ from argparse import Namespace
 from hyperstyle.src.python.review.reviewers.perform_review import OutputFormat
 from analysis import HYPERSTYLE_RUNNER_PATH
 from analysis.src.python.evaluation.common.args_util import EvaluationArgument
+from analysis.src.python.evaluation.common.cache_util import DEFAULT_CACHE_SIZE_LIMIT_MB
 
 
 def get_testing_arguments(to_add_traceback=None, to_add_tool_path=None, to_add_history=None) -> Namespace:
@@ -22,5 +23,8 @@ def get_testing_arguments(to_add_traceback=None, to_add_tool_path=None, to_add_h
 
     testing_arguments.solutions_file_path = None
     testing_arguments.to_drop_nan = False
+    testing_arguments.in_process = False
+    testing_arguments.cache_dir = None
+    testing_arguments.cache_size_limit = DEFAULT_CACHE_SIZE_LIMIT_MB
 
     return testing_arguments